@@ -48,12 +48,41 @@ def make_database_parameters(parser: argparse.ArgumentParser) -> None:
 
 
 def make_general_graph_parameters_generator(parser: argparse.ArgumentParser) -> None:
-    parser.add_argument('graphtype', type=str, default='clique', choices=['clique', 'cliques-graph', 'k-partite'],
+    parser.add_argument('graphtype', type=str, default='clique',
+                        choices=['clique', 'cliques-graph', 'k-partite', 'rmat', 'gnp', 'gnm', 'barabasi-albert'],
                         help='Source kind')
     parser.add_argument('--num_vertices', '-s', type=int, nargs='?', default=10000,
                         help='The number of vertices.')
 
 
+def make_server_side_parameters(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--server_side', action='store_true',  # default: False
+                        help='Generate the vertices and edges on the server with AQL queries instead of sending them. '
+                             'Only the sizes of the cliques or parts are chosen on the client.')
+    parser.add_argument('--server_jobs', type=int, default=4,
+                        help='With --server_side, the number of AQL queries running at the same time. The vertices, '
+                             'the edges in cliques and the edges between parts are each split into this many ranges '
+                             'with about the same number of documents.')
+
+
+def make_generator_process_parameters(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--num_processes', type=int,
+                        help='The number of processes generating the documents (without --server_side). The default '
+                             'is one per core.')
+    parser.add_argument('--num_insert_threads', type=int, default=4,
+                        help='The number of threads sending the generated documents to the server. The processes '
+                             'pass them encoded through shared memory, so generating and sending do not wait for '
+                             'each other. If 0, every process sends its documents itself. Ignored with --dump_dir.')
+    parser.add_argument('--seed', type=int,
+                        help='Derive all random values from this non-negative number, so that the same graph is '
+                             'generated again, whatever the number of processes (with the same parameters, including '
+                             '--bulk_size). Every piece of work gets its own random stream.')
+    parser.add_argument('--shard', type=str,
+                        help='With --seed, i/n to generate only the slice i (0 <= i < n) of n slices of the graph with '
+                             'about the same number of documents, e.g., on n machines. Shard 0 creates the graph and '
+                             'must be started first, the other shards insert into it.')
+
+
 def make_cliques_graph_parameters(parser: argparse.ArgumentParser) -> None:
     parser.add_argument('--num_cliques', type=int,
                         help='Number of cliques in a cliques-graph. Ignored for other graphs.')
@@ -67,9 +96,10 @@ def make_cliques_graph_parameters(parser: argparse.ArgumentParser) -> None:
     parser.add_argument('--prob_missing_all', type=float,
                         help='The probability that there are edges between two cliques in a cliques-graph. '
                              'Ignored for other graphs.')
-    parser.add_argument('--prob_missing_one_between', type=float, default=0.5,
-                        help='The probability for an edge between two parts to be missing in a cliques-graph or in '
-                             'a k-partite graph.')
+    parser.add_argument('--prob_missing_one_between', type=float,
+                        help='The probability for an edge between two parts to be missing in a cliques-graph '
+                             '(default 0.5) or in a k-partite graph (default 0.0). Edges are made by skipping the '
+                             'missing ones, so sparse graphs are made in time proportional to their edges.')
 
 
 def make_k_partite_parameters(parser: argparse.ArgumentParser) -> None:
@@ -81,6 +111,40 @@ def make_k_partite_parameters(parser: argparse.ArgumentParser) -> None:
                         help='Maximum part num_vertices in a k-partite graph. Ignored for other graphs.')
 
 
+def make_rmat_parameters(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--scale', type=int, default=16,
+                        help='The logarithm to base 2 of the number of vertices of an R-MAT graph. Ignored for other '
+                             'graphs.')
+    parser.add_argument('--edge_factor', type=int, default=16,
+                        help='The number of edges per vertex of an R-MAT graph. Ignored for other graphs.')
+    parser.add_argument('--rmat_probabilities', type=float, nargs=4, default=[0.57, 0.19, 0.19, 0.05],
+                        help='The probabilities a, b, c, d of the quadrants of the adjacency matrix of an R-MAT graph '
+                             '(top left, top right, bottom left, bottom right), their sum must be 1. The default are '
+                             'the values of Graph 500. Ignored for other graphs.')
+    parser.add_argument('--permute_vertices', action='store_true',  # default: False
+                        help='Permute the vertex ids of an R-MAT graph, so that the vertices with high degrees do not '
+                             'have the small ids. Ignored for other graphs.')
+
+
+def make_erdos_renyi_parameters(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--prob_edge', type=float,
+                        help='The probability of every possible edge in a G(n, p) graph (graph type gnp) with '
+                             '--num_vertices vertices. Ignored for other graphs.')
+    parser.add_argument('--num_edges', type=int,
+                        help='The number of edges of a G(n, m) graph (graph type gnm) with --num_vertices vertices, '
+                             'they are chosen uniformly among all possible edges. Ignored for other graphs.')
+    parser.add_argument('--directed', action='store_true',  # default: False
+                        help='Make a directed G(n, p) or G(n, m) graph, where (i, j) and (j, i) are different '
+                             'possible edges. Otherwise, every pair of vertices is at most one edge. G(n, p) and '
+                             'G(n, m) graphs have no self-loops. Ignored for other graphs.')
+
+
+def make_barabasi_albert_parameters(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--edges_per_vertex', type=int, default=4,
+                        help='The number m of edges of every new vertex in a Barabási–Albert graph with '
+                             '--num_vertices vertices. Ignored for other graphs.')
+
+
 def make_attribute_parameters(parser: argparse.ArgumentParser) -> None:
     parser.add_argument('--vertex_property_type', nargs='?', choices=['none', 'random'], default='none',
                         help="""Vertex property_ kind. Default is \'none\', then --vertex_property is ignored and 
@@ -122,6 +186,172 @@ def make_importer_files_parameters(parser: argparse.ArgumentParser) -> None:
                         help='For Graphalytics graphs, the file containing the properties of the graph.')
     parser.add_argument('--edges_file_edge_list', default='graph.txt', type=str, nargs='?',
                         help='For graphs given by an edge list, the file containing the edges.')
+    parser.add_argument('--edges_file_binary', type=str, nargs='?',
+                        help='For the source types binary, numpy, parquet and arrow, the file containing the edges.')
+    parser.add_argument('--binary_id_type', default='int64', choices=['int32', 'int64'],
+                        help='For the source type binary, the type of the little-endian vertex ids.')
+    parser.add_argument('--source_column', default='src',
+                        help='For .npz, structured .npy, Parquet and Arrow files, the column containing the from ids.')
+    parser.add_argument('--target_column', default='dst',
+                        help='For .npz, structured .npy, Parquet and Arrow files, the column containing the to ids.')
+    parser.add_argument('--weight_column', default='weight',
+                        help='For .npz, structured .npy, Parquet and Arrow files, the column containing the weights. '
+                             'If the column does not exist, no weights are written.')
+    parser.add_argument('--manifest', type=str, nargs='?',
+                        help='For graphs with several collections, the JSON file listing the vertex and edge files, '
+                             'the collections they go into and, for edge files, the collections of their from and '
+                             'to vertices.')
+    parser.add_argument('--property_columns', type=str, nargs='*', default=[],
+                        help='For .npz, structured .npy, Parquet and Arrow files, further columns that are written '
+                             'into the edges as attributes (separator: space).')
+
+
+def make_numeric_encoding_parameters(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--typed_attributes', action='store_true',  # default: False
+                        help='Store numeric attributes (ids that are not smart attribute values, weights and '
+                             'generated properties) as numbers instead of strings.')
+    parser.add_argument('--float_precision', type=int,
+                        help='With --typed_attributes, round floats to this number of digits after the decimal point.')
+
+
+def make_import_parameters(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--concurrent_phases', action='store_true',  # default: False
+                        help='For Graphalytics graphs, import vertices and edges at the same time instead of '
+                             'one after another.')
+    parser.add_argument('--num_insert_threads', type=int, default=4,
+                        help='With --concurrent_phases and for multi-collection graphs, the number of insert '
+                             'requests sent at the same time. With --concurrent_phases, must be at least 2.')
+    parser.add_argument('--edge_share', type=float, default=0.5,
+                        help='With --concurrent_phases, the share of --num_insert_threads used for edges while '
+                             'vertices are imported. Afterwards, all threads are used for edges.')
+    parser.add_argument('--edges_ahead', action='store_true',  # default: False
+                        help='With --concurrent_phases, let the edge import get relatively further in its file '
+                             'than the vertex import. Otherwise, edges wait for the vertices.')
+
+
+def make_incremental_parameters(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--incremental', action='store_true',  # default: False
+                        help='For edge lists that are only appended to, import only the lines appended since the '
+                             'last import. How far the file has been imported is stored in --metadata_collection.')
+
+
+def make_metadata_parameters(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--metadata_collection', type=str, default='importer_metadata',
+                        help='The collection for documents about the graphs, e.g., how far a file has been imported '
+                             'with --incremental and statistics with --statistics_to_db.')
+
+
+def make_statistics_parameters(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--statistics_file', type=str,
+                        help='Collect statistics of the graph (numbers of vertices and edges, degree distributions, '
+                             'weight range and histogram) while it is written and save them as JSON in this file.')
+    parser.add_argument('--statistics_to_db', action='store_true',  # default: False
+                        help='Collect the statistics as with --statistics_file and store them as the document '
+                             '<graph name>_statistics in --metadata_collection.')
+
+
+def make_edge_preprocessing_parameters(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--sort_edges', action='store_true',  # default: False
+                        help='For edge lists and Graphalytics graphs, sort the edges by (from id, to id) before '
+                             'inserting them. Implied by --deduplicate_edges, --undirected and --drop_self_loops.')
+    parser.add_argument('--deduplicate_edges', action='store_true',  # default: False
+                        help='Insert only the first of several edges with the same endpoints.')
+    parser.add_argument('--undirected', action='store_true',  # default: False
+                        help='Treat edges as undirected: write every edge with the smaller id first, so that, '
+                             'with --deduplicate_edges, only one direction is inserted.')
+    parser.add_argument('--drop_self_loops', action='store_true',  # default: False
+                        help='Do not insert edges from a vertex to itself.')
+    parser.add_argument('--sort_run_size', type=int, default=1000000,
+                        help='The number of edges sorted in memory at once. Longer inputs are sorted in runs '
+                             'that are written to disk and merged.')
+    parser.add_argument('--sort_tmp_dir', type=str,
+                        help='The directory for the sorted runs. Default is the system temporary directory.')
+
+
+def make_sampling_parameters(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--sample', choices=['edges', 'vertices', 'snowball'],
+                        help='Import a sample of the graph instead of the whole graph: \'edges\' keeps every edge '
+                             'with probability --sample_fraction, \'vertices\' keeps every vertex with probability '
+                             '--sample_fraction (and the edges between kept vertices), \'snowball\' keeps the '
+                             'vertices at most --sample_hops hops away from --sample_seeds.')
+    parser.add_argument('--sample_fraction', type=float, default=0.1,
+                        help='For --sample edges and vertices, the fraction of edges or vertices to keep.')
+    parser.add_argument('--sample_seeds', type=str, nargs='+',
+                        help='For --sample snowball, the ids of the vertices to start from.')
+    parser.add_argument('--sample_hops', type=int, default=2,
+                        help='For --sample snowball, the maximum distance of a kept vertex from the seeds.')
+    parser.add_argument('--sample_max_vertices', type=int, default=1000000,
+                        help='For --sample snowball, the maximum number of vertices to keep.')
+    parser.add_argument('--sample_random_seed', type=int, default=0,
+                        help='The seed for the random choices of --sample. The same seed gives the same sample.')
+
+
+def make_cache_parameters(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--cache', action='store_true',  # default: False
+                        help='For Graphalytics files, read the graph from a binary cache (in compressed sparse row '
+                             'form) instead of parsing the files. If there is no cache or the files have changed, '
+                             'the files are parsed once and the cache is written.')
+    parser.add_argument('--cache_dir', type=str,
+                        help='The directory for the caches. Default is the directory of the edge file.')
+
+
+def make_partitioning_parameters(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--smart_partitioner', choices=['ldg'],
+                        help='For SmartGraphs from Graphalytics files, choose the values of the smart attribute with '
+                             'a partitioner run over the edge file before the import, such that few edges connect '
+                             'different shards. \'ldg\' is linear deterministic greedy streaming partitioning. '
+                             'Without this option, the vertex id is the smart value.')
+    parser.add_argument('--num_partitions', type=int,
+                        help='The number of parts for --smart_partitioner. Default is --num_shards.')
+    parser.add_argument('--partition_imbalance', type=float, default=0.05,
+                        help='For --smart_partitioner, a part may have up to 1 + this times the average number of '
+                             'vertices.')
+    parser.add_argument('--partition_passes', type=int, default=1,
+                        help='For --smart_partitioner, how often the vertices are streamed through the partitioner. '
+                             'Further passes usually reduce the edge-cut.')
+
+
+def make_dump_parameters(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--dump_dir', type=str,
+                        help='Write the graph into this directory in the format of arangodump instead of sending it '
+                             'to --endpoint. The directory can be restored with arangorestore.')
+    parser.add_argument('--dump_no_compression', action='store_true',  # default: False
+                        help='With --dump_dir, write the data files without gzip compression.')
+    parser.add_argument('--dump_docs_per_file', type=int, default=500000,
+                        help='With --dump_dir, the maximum number of documents in one data file.')
+    parser.add_argument('--dump_threads', type=int, default=4,
+                        help='With --dump_dir, the number of threads compressing and writing data files.')
+
+
+def make_clone_parameters(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--target_endpoint', required=True,
+                        help='Endpoint to clone the graph to, e.g. http://otherhost:8529/_db/_system')
+    parser.add_argument('--target_user', nargs='?', default='root', help='User name for the target server.')
+    parser.add_argument('--target_pwd', nargs='?', default='', help='Password for the target server.')
+    parser.add_argument('--target_graphname',
+                        help='Name of the graph in the target, which must be another server or database than the '
+                             'source. Default is --graphname.')
+    parser.add_argument('--num_shards', type=int,
+                        help='Number of shards in the target. Default is the number of shards of the source graph.')
+    parser.add_argument('--repl_factor', type=int,
+                        help='Replication factor in the target. Default is the replication factor of the source graph.')
+    parser.add_argument('--overwrite', action='store_true',  # default: false
+                        help='Overwrite the graph and its collections in the target if they already exist.')
+    parser.add_argument('--num_read_threads', type=int, default=4,
+                        help='The number of streaming cursors reading from the source at the same time. Every '
+                             'collection is split into this many key ranges.')
+    parser.add_argument('--num_write_threads', type=int, default=4,
+                        help='The number of insert requests sent to the target at the same time.')
+
+
+def make_warm_up_parameters(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--warm_up', action='store_true',  # default: False
+                        help='Before starting Pregel, load the indexes of the graph\'s collections into memory and '
+                             'wait until the server has finished, so that the Pregel times do not include it.')
+    parser.add_argument('--warm_up_sample', type=int, default=0,
+                        help='With --warm_up, also read this many documents of every collection.')
+    parser.add_argument('--warm_up_timeout', type=float, default=600.0,
+                        help='With --warm_up, the maximum time in seconds to wait for the load to finish.')
 
 
 def make_pregel_watch_parameters(parser: argparse.ArgumentParser) -> None:
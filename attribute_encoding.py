@@ -0,0 +1,151 @@
+import os
+from typing import Optional, Union, Dict, List
+
+Number = Union[int, float]
+
+
+class NumericEncoder:
+    """
+    Encode numeric attribute values of vertices and edges. By default (typed is False), numbers are stored as strings,
+    as it was always done. If typed is True, integers are stored as integers and floats as floats rounded to precision
+    digits after the decimal point (if precision is given).
+    If track_size is True, the encoder counts how many bytes the encoded values take in the JSON documents compared to
+    the stringified values. Copies of an encoder (also in other processes) share the totals, the counts of a copy are
+    added to them in flush().
+    """
+
+    def __init__(self, typed: bool = False, precision: Optional[int] = None, track_size: bool = False):
+        self.typed = typed
+        self.precision = precision
+        self.track_size = track_size
+        # number of values, bytes as strings, bytes as encoded
+        self._totals = None
+        if track_size:
+            import multiprocessing  # only here, so that scripts without encoders do not load it
+
+            self._totals = multiprocessing.Array('q', 3)
+        self._num_values = 0
+        self._string_bytes = 0
+        self._encoded_bytes = 0
+
+    def copy(self):
+        encoder = NumericEncoder(self.typed, self.precision)
+        encoder.track_size = self.track_size
+        encoder._totals = self._totals
+        return encoder
+
+    def _count(self, as_string: str, encoded: Union[str, Number]):
+        self._num_values += 1
+        self._string_bytes += len(as_string) + 2  # the quotes
+        self._encoded_bytes += len(encoded) + 2 if type(encoded) is str else len(repr(encoded))
+
+    def _round(self, value: float) -> float:
+        return value if self.precision is None else round(value, self.precision)
+
+    def float_value(self, value: float) -> Union[str, float]:
+        encoded = self._round(value) if self.typed else str(value)
+        if self.track_size:
+            self._count(str(value), encoded)
+        return encoded
+
+    def int_value(self, value: int) -> Union[str, int]:
+        encoded = value if self.typed else str(value)
+        if self.track_size:
+            self._count(str(value), encoded)
+        return encoded
+
+    def token_value(self, token: str, kind: str = 'float') -> Union[str, Number]:
+        """
+        Encode a number given as text, e.g., a weight read from a file.
+        :param token: the text
+        :param kind: 'int', 'float' or 'auto'. With 'auto', the token is stored as an integer or a float if it can be
+               parsed as one and as a string otherwise.
+        :return: the encoded value
+        """
+        if not self.typed:
+            encoded = token
+        elif kind == 'int':
+            encoded = int(token)
+        elif kind == 'float':
+            encoded = self._round(float(token))
+        else:
+            try:
+                encoded = int(token)
+            except ValueError:
+                try:
+                    encoded = self._round(float(token))
+                except ValueError:
+                    encoded = token
+        if self.track_size:
+            self._count(token, encoded)
+        return encoded
+
+    def float_column(self, values) -> List[Union[str, float]]:
+        """
+        Encode a numpy array of floats.
+        """
+        if not self.typed:
+            encoded = list(map(str, values.tolist()))
+        elif self.precision is None:
+            encoded = values.tolist()
+        else:
+            encoded = values.round(self.precision).tolist()
+        if self.track_size:
+            for value, encoded_value in zip(values.tolist(), encoded):
+                self._count(str(value), encoded_value)
+        return encoded
+
+    def flush(self):
+        if self._totals is None:
+            return
+        with self._totals.get_lock():
+            self._totals[0] += self._num_values
+            self._totals[1] += self._string_bytes
+            self._totals[2] += self._encoded_bytes
+        self._num_values = self._string_bytes = self._encoded_bytes = 0
+
+    def size_reduction_string(self) -> str:
+        """
+        Flush the counts of this encoder and return a description of the size of the numeric attributes as strings
+        and as encoded values.
+        """
+        self.flush()
+        if self._totals is None or self._totals[0] == 0:
+            return 'No numeric attributes were encoded.'
+        num_values, string_bytes, encoded_bytes = self._totals[:]
+        saved = string_bytes - encoded_bytes
+        return (f'Numeric attributes: {num_values} values, {string_bytes} bytes as strings, {encoded_bytes} bytes '
+                f'encoded. The documents are {saved} bytes ({100 * saved / string_bytes:.1f}% of these attributes, '
+                f'{saved / num_values:.2f} bytes per value) smaller.')
+
+
+def get_numeric_encoder(args) -> NumericEncoder:
+    if args.float_precision is not None and args.float_precision < 0:
+        raise RuntimeError('--float_precision must not be negative.')
+    return NumericEncoder(args.typed_attributes, args.float_precision,
+                          track_size=args.typed_attributes and not args.silent)
+
+
+def get_edge_property_types_graphalytics(properties_filename: str) -> Dict[str, str]:
+    """
+    Return the edge properties declared in a Graphalytics properties file as a dictionary from the property name to
+    'int' or 'float'. The properties file declares them in the lines
+    graph.<name>.edge-properties.names = <name1>, <name2>, ... and graph.<name>.edge-properties.types = <type1>, ...
+    where the types are 'int' or 'real'.
+    :param properties_filename: the Graphalytics properties file
+    :return: the dictionary, empty if there are no edge properties or the file does not exist
+    """
+    if not properties_filename or not os.path.isfile(properties_filename):
+        return dict()
+    names, types = [], []
+    with open(properties_filename, 'r') as f:
+        for line in f:
+            if '=' not in line:
+                continue
+            key, value = (part.strip() for part in line.split('=', 1))
+            values = [v.strip() for v in value.split(',') if v.strip()]
+            if key.endswith('.edge-properties.names'):
+                names = values
+            elif key.endswith('.edge-properties.types'):
+                types = values
+    return {name: 'int' if kind in ['int', 'integer', 'long'] else 'float' for name, kind in zip(names, types)}
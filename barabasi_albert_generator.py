@@ -0,0 +1,152 @@
+import random
+from typing import List, Optional, Tuple, Iterable
+
+import numpy as np
+
+from edges_generator import MIN_BLOCK_SIZE, in_bulks, make_edge_documents, vertex_id_list
+from generator_pool import Task, create_generated_graph, make_range_tasks, make_range_vertices, BA_VERTICES_TASK, \
+    BA_EDGES_TASK
+from helper_classes import DatabaseInfo, GraphInfo, BarabasiAlbertGraphInfo
+
+
+def mix_hash(key: int, values: np.ndarray) -> np.ndarray:
+    """
+    Return the SplitMix64 hashes of the non-negative int64 values with the given key as uint64 numbers.
+    """
+    with np.errstate(over='ignore'):
+        z = values.astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15) + np.uint64(key)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return z ^ (z >> np.uint64(31))
+
+
+def power_law_exponent(degrees: np.ndarray, min_degree: int) -> Optional[float]:
+    """
+    Return the maximum likelihood estimate of the exponent of a power law fitted to the degrees of at least
+    min_degree (with the approximation of Clauset, Shalizi and Newman for discrete values) or None if there are none.
+    """
+    min_degree = max(1, min_degree)
+    tail = degrees[degrees >= min_degree]
+    if not len(tail):
+        return None
+    log_sum = float(np.sum(np.log(tail / (min_degree - 0.5))))
+    return 1.0 + len(tail) / log_sum
+
+
+class BarabasiAlbertGenerator:
+    """
+    Make the documents of a Barabási–Albert graph described in ba_info with generator_pool.run_generator_tasks(). As
+    in the linear-time algorithm of Batagelj and Brandes, the edges are numbered, the edge e goes from the new vertex
+    e // m to the vertex at a random position r in [0, 2e] of the list of the endpoints of the edges before it: the
+    even position 2k is the from vertex k // m of the edge k, the odd position 2k + 1 is the to vertex of the edge k.
+    So every vertex is chosen with probability proportional to its degree and self-loops and multiple edges are
+    possible. Instead of drawing r from a random stream, r is a hash of e and a key drawn from seed (if not None) when
+    the generator is made. Then every process can make any range of edges: the to vertices of the task are kept in
+    a compact NumPy array and a position in an earlier range is followed by recomputing its hash until an even
+    position or an edge of the task is reached, which takes about two steps on average. So the edges are made
+    exactly as by the sequential algorithm, split into tasks by their indexes.
+    """
+
+    def __init__(self, ba_info: BarabasiAlbertGraphInfo, seed: Optional[int] = None):
+        self.ba_info = ba_info
+        self.key = random.Random(seed).getrandbits(64)
+
+    def num_vertices(self) -> int:
+        return self.ba_info.num_vertices
+
+    def num_edges(self) -> int:
+        return self.ba_info.num_vertices * self.ba_info.edges_per_vertex
+
+    def make_tasks(self, num_tasks: int) -> List[Tuple[float, Task]]:
+        """
+        Split the vertices and the edges into tasks of at most about 1 / num_tasks of all documents and return them
+        with their costs, the numbers of documents, the most expensive ones first.
+        """
+        return make_range_tasks([(BA_VERTICES_TASK, self.num_vertices()), (BA_EDGES_TASK, self.num_edges())],
+                                num_tasks)
+
+    def to_vertices(self, edges: np.ndarray, first: int, targets: np.ndarray) -> np.ndarray:
+        """
+        Return the to vertices of the edges, given that targets holds the to vertices of the edges first, first + 1,
+        ... before them.
+        """
+        m = self.ba_info.edges_per_vertex
+        result = np.empty(len(edges), dtype=targets.dtype)
+        pending = np.arange(len(edges))
+        current = edges
+        while len(pending):
+            positions = mix_hash(self.key, current) % (2 * current.astype(np.uint64) + np.uint64(1))
+            positions = positions.astype(np.int64)
+            even = positions % 2 == 0
+            result[pending[even]] = positions[even] // 2 // m
+            referenced = positions[~even] // 2
+            pending, current = pending[~even], referenced
+            known = (current >= first) & (current < first + len(targets))
+            result[pending[known]] = targets[current[known] - first]
+            pending, current = pending[~known], current[~known]
+        return result
+
+    def make_documents(self, task: Task, db_info: DatabaseInfo, graph_info: GraphInfo, bulk_size: int,
+                       rng: np.random.Generator) -> Iterable[Tuple[bool, List[dict]]]:
+        """
+        Yield the documents of the task in lists of (at most) bulk_size documents, each with True for edges and False
+        for vertices.
+        """
+        kind, first, end, _ = task
+        if kind == BA_VERTICES_TASK:
+            yield from make_range_vertices(db_info, graph_info, first, end, bulk_size)
+            return
+
+        block_size = max(bulk_size, MIN_BLOCK_SIZE)
+        targets = np.empty(end - first, dtype=np.int32 if self.ba_info.num_vertices < 1 << 31 else np.int64)
+
+        def edge_blocks():
+            for start in range(first, end, block_size):
+                edges = np.arange(start, min(start + block_size, end), dtype=np.int64)
+                tos = self.to_vertices(edges, first, targets[:start - first])
+                targets[start - first:start - first + len(edges)] = tos
+                yield make_edge_documents(vertex_id_list(db_info, edges // self.ba_info.edges_per_vertex),
+                                          vertex_id_list(db_info, tos), db_info, graph_info, rng)
+
+        for edges in in_bulks(edge_blocks(), bulk_size):
+            yield True, edges
+
+
+def print_degree_report(graph_info: GraphInfo, ba_info: BarabasiAlbertGraphInfo):
+    """
+    Print the distribution of the degrees (in- plus out-degrees) of the generated vertices and the exponent of a power
+    law fitted to the tail of the degrees, which is about 3 for a Barabási–Albert graph. The degrees of at least
+    4 m (and at least 10) are used, since the smaller ones do not follow the power law yet.
+    """
+    degrees = graph_info.statistics.total_degrees()
+    if degrees is None or not len(degrees):
+        return
+    distribution = ', '.join(f'{bucket}: {count}' for bucket, count in
+                             graph_info.statistics.to_dict()['degrees']['degreeDistribution'].items())
+    print(f'Degrees: max {int(degrees.max())}, mean {float(degrees.mean()):.2f}, vertices per degree {distribution}.')
+    min_degree = max(10, 4 * ba_info.edges_per_vertex)
+    exponent = power_law_exponent(degrees, min_degree)
+    if exponent is not None:
+        print(f'Estimated power-law exponent of the degrees of at least {min_degree}: {exponent:.2f}.')
+
+
+def create_barabasi_albert_graph(db_info: DatabaseInfo,
+                                 graph_info: GraphInfo,
+                                 ba_info: BarabasiAlbertGraphInfo,
+                                 bulk_size: int,
+                                 num_processes: Optional[int] = None,
+                                 num_insert_threads: int = 0,
+                                 shard: Optional[Tuple[int, int]] = None,
+                                 be_verbose: bool = True
+                                 ) -> None:
+    """
+    Create a Barabási–Albert graph as described in ba_info. The vertices and the edges are made by num_processes
+    processes (by default, one per core) and sent by num_insert_threads threads, see generator_pool.py. With
+    shard = (i, n), only the slice i of n slices of the graph is made. If be_verbose and graph_info.statistics are
+    collected, the degree distribution is printed at the end.
+    """
+    if not create_generated_graph(db_info, graph_info, BarabasiAlbertGenerator(ba_info, graph_info.seed), bulk_size,
+                                  num_processes, num_insert_threads, shard, be_verbose):
+        return
+    if be_verbose and graph_info.statistics is not None:
+        print_degree_report(graph_info, ba_info)
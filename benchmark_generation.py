@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+import argparse
+import time
+from typing import Callable, Iterable
+
+from attribute_encoding import NumericEncoder
+from clique_generator import make_edges_generalized_clique
+from edges_generator import make_edges_generalized_clique_piece
+from general import get_time_difference_string
+from helper_classes import DatabaseInfo, GraphInfo, VertexOrEdgeProperty
+
+
+def get_arguments():
+    parser = argparse.ArgumentParser(description='Measure how fast the edges of a clique are made, without a server. '
+                                                 'The pair-by-pair generator is compared with the vectorized one.')
+    parser.add_argument('--num_vertices', type=int, default=3000, help='The number of vertices of the clique.')
+    parser.add_argument('--bulk_size', type=int, default=10000, help='The number of edges per list.')
+    parser.add_argument('--prob_missing', type=float, default=0.0, help='The probability that an edge is missing.')
+    parser.add_argument('--smart', action='store_true',  # default: False
+                        help='Make the _from and _to values of a SmartGraph.')
+    parser.add_argument('--edge_property', type=float, nargs=2,
+                        help='Give the edges a random attribute between the two values.')
+    parser.add_argument('--typed_attributes', action='store_true',  # default: False
+                        help='Store the attribute as a number instead of a string.')
+    parser.add_argument('--repeat', type=int, default=3, help='The number of runs of every generator, the fastest '
+                                                              'run is reported.')
+    parser.add_argument('--skip_reference', action='store_true',  # default: False
+                        help='Only run the vectorized generator, e.g., for cliques too big for the other one.')
+    return parser.parse_args()
+
+
+def measure(make_edges: Callable[[], Iterable[list]], repeat: int):
+    """
+    Return the number of made edges and the fastest time of repeat runs of make_edges.
+    """
+    best = float('inf')
+    num_edges = 0
+    for _ in range(repeat):
+        start = time.monotonic()
+        num_edges = sum(len(edges) for edges in make_edges())
+        best = min(best, time.monotonic() - start)
+    return num_edges, best
+
+
+if __name__ == "__main__":
+    args = get_arguments()
+    db_info = DatabaseInfo('http://localhost:8529/_db/_system', 'benchmark', isSmart=args.smart)
+    edge_property = VertexOrEdgeProperty('random', *args.edge_property) if args.edge_property else None
+    graph_info = GraphInfo(None, edge_property, NumericEncoder(args.typed_attributes))
+    n = args.num_vertices
+
+    generators = [('vectorized', lambda: make_edges_generalized_clique_piece(
+        db_info, graph_info, args.bulk_size, args.prob_missing, 0, n, n))]
+    if not args.skip_reference:
+        generators.insert(0, ('pair by pair', lambda: make_edges_generalized_clique(
+            db_info, graph_info, args.bulk_size, args.prob_missing, 0, n)))
+
+    print(f'Clique with {n} vertices, bulk size {args.bulk_size}, probability of missing edges {args.prob_missing}, '
+          f'best of {args.repeat} runs.')
+    times = []
+    for name, make_edges in generators:
+        num_edges, t = measure(make_edges, args.repeat)
+        times.append(t)
+        print(f'{name:>12}: {num_edges:12} edges in {get_time_difference_string(t):>10}, '
+              f'{num_edges / max(t, 1e-9):14.0f} edges/sec')
+    if len(times) == 2:
+        print(f'Speedup: {times[0] / max(times[1], 1e-9):.1f}')
@@ -5,12 +5,11 @@ import time
 from typing import Optional
 from urllib.request import urlopen
 
-import zstandard
-from tqdm import tqdm
-
-from arguments import make_global_parameters, make_database_parameters, make_pregel_parameters
-from general import get_time_difference_string, arangodIsRunning
-from graphalytics_importer import import_graphalytics, import_graphalytics_get_files
+from arguments import make_global_parameters, make_database_parameters, make_pregel_parameters, \
+    make_import_parameters, make_numeric_encoding_parameters, make_edge_preprocessing_parameters, \
+    make_sampling_parameters, make_metadata_parameters, make_statistics_parameters, \
+    make_partitioning_parameters, make_cache_parameters, make_warm_up_parameters
+from general import get_time_difference_string, arangodIsReachable, get_import_info, write_statistics
 from helper_classes import DatabaseInfo
 from start_Pregel import call_pregel_algorithm, print_pregel_status
 
@@ -71,6 +70,15 @@ def get_arguments():
     make_global_parameters(parser)
     make_database_parameters(parser)
     make_pregel_parameters(parser)
+    make_import_parameters(parser)
+    make_numeric_encoding_parameters(parser)
+    make_edge_preprocessing_parameters(parser)
+    make_sampling_parameters(parser)
+    make_metadata_parameters(parser)
+    make_statistics_parameters(parser)
+    make_partitioning_parameters(parser)
+    make_cache_parameters(parser)
+    make_warm_up_parameters(parser)
 
     parser.add_argument('--remove_archive', action='store_true',  # default: False
                         help='Whether to remove the archive file.')
@@ -97,6 +105,8 @@ def download(url: str, filename: Optional[str] = None, append: bool = False, be_
     if os.path.isfile(filename) and not append:
         return
 
+    from tqdm import tqdm
+
     response = urlopen(url)
     # file_size = int(response.info.getheaders("Content-Length")[0])
     file_size = response.length
@@ -135,8 +145,8 @@ if __name__ == "__main__":
                            args.repl_factor, args.num_shards, args.overwrite, args.smart_attribute,
                            '', 'weight', args.user, args.pwd)
 
-    if not arangodIsRunning():
-        raise RuntimeError('The process "arangod" is not running, please, run it first.')
+    if not arangodIsReachable(args.endpoint):
+        raise RuntimeError(f'No server answers at {args.endpoint}, please, start arangod first.')
 
     #   parameters for Pregel
     params = dict()
@@ -167,6 +177,8 @@ if __name__ == "__main__":
         download(url, filename, be_verbose=be_verbose)
 
     # extract
+    import zstandard
+
     dctx = zstandard.ZstdDecompressor()
     with open(filename, 'rb') as ifh:
         with open('output.tar', 'wb') as ofh:
@@ -176,14 +188,29 @@ if __name__ == "__main__":
     tar_file.extractall(target_directory)
 
     # find graphalytics files
+    from graphalytics_importer import import_graphalytics, import_graphalytics_get_files
+
     vertices_filename, edges_filename, properties_filename = import_graphalytics_get_files(target_directory)
 
     # import
     start = time.monotonic()
+    import_info = get_import_info(args)
     import_graphalytics(db_info, vertices_filename, edges_filename, properties_filename, args.bulk_size,
-                        not args.silent)
+                        not args.silent, import_info)
+    write_statistics(import_info.statistics, args, db_info, not args.silent)
+    import_time = time.monotonic() - start
+    if not args.silent:
+        print('Import time: ' + get_time_difference_string(import_time))
+
+    # warm up, so that loading the indexes is not measured as part of the Pregel run
+    warm_up_time = None
+    if args.warm_up:
+        from warm_up import warm_up_graph
+
+        warm_up_time = warm_up_graph(db_info, args.warm_up_sample, args.warm_up_timeout, not args.silent)
 
     # execute
+    pregel_time = None  # only measured if the run is watched until it finishes
     #   pagerank
     if args.algorithm == 'pagerank':
         if args.pr_threshold:
@@ -191,12 +218,19 @@ if __name__ == "__main__":
         if args.pr_sourceField:
             params['sourceField'] = args.pr_sourceField
 
+        pregel_start = time.monotonic()
         algorithm_id = call_pregel_algorithm(db_info, 'pagerank', params).strip('"')
         if not args.silent:
             print(f'Pregel algorithm with id {algorithm_id} started.')
         if not args.no_watch:
             print_pregel_status(db_info, algorithm_id, args.sleep_time, args.extended_info, args.max_num_states)
+            pregel_time = time.monotonic() - pregel_start
 
     # print statistics
     if not args.silent:
+        print('Import time: ' + get_time_difference_string(import_time))
+        if warm_up_time is not None:
+            print('Warm-up time: ' + get_time_difference_string(warm_up_time))
+        if pregel_time is not None:
+            print('Pregel time: ' + get_time_difference_string(pregel_time))
         print('Total time: ' + get_time_difference_string(time.monotonic() - start))
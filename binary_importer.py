@@ -0,0 +1,297 @@
+from typing import Iterable, List, Optional, Dict, Tuple
+
+import numpy as np
+from tqdm import tqdm
+
+from attribute_encoding import NumericEncoder
+from general import insert_documents, create_graph, graph_exists
+from graph_statistics import GraphStatistics
+from helper_classes import DatabaseInfo, ImportInfo
+from sampling import Sampler, get_sampler
+from vertices_generator import insert_vertices_unique, ConverterToVertex
+
+BINARY_SOURCE_TYPES = ['binary', 'numpy', 'parquet', 'arrow']
+
+# (sources, targets, weights or None, {property name: values})
+EdgeColumns = Tuple[np.ndarray, np.ndarray, Optional[np.ndarray], Dict[str, np.ndarray]]
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError('Reading Parquet or Arrow files needs the package pyarrow, please, install it first.')
+    return pyarrow
+
+
+def _slice_columns(sources, targets, weights, properties, bulk_size: int) -> Iterable[EdgeColumns]:
+    """
+    Yield the given columns in slices of bulk_size rows. The slices are views, memory mapped columns are only read
+    when the slices are encoded.
+    """
+    for start in range(0, len(sources), bulk_size):
+        end = start + bulk_size
+        yield (sources[start:end], targets[start:end], None if weights is None else weights[start:end],
+               {name: values[start:end] for name, values in properties.items()})
+
+
+def read_raw_binary_edges(filename: str, bulk_size: int, id_type: str = 'int64') -> Iterable[EdgeColumns]:
+    """
+    Yield edges from a file of little-endian integer pairs <from id><to id> in bulks of size bulk_size. The file is
+    memory mapped.
+    :param filename: the file containing the edges
+    :param bulk_size: the number of edges in one bulk
+    :param id_type: 'int32' or 'int64', the width of one vertex id
+    :return: None
+    """
+    dtype = np.dtype('<i4') if id_type == 'int32' else np.dtype('<i8')
+    pairs = np.memmap(filename, dtype=dtype, mode='r')
+    if len(pairs) % 2 != 0:
+        raise RuntimeError(f'The file {filename} does not contain a whole number of {id_type} pairs.')
+    pairs = pairs.reshape(-1, 2)
+    yield from _slice_columns(pairs[:, 0], pairs[:, 1], None, dict(), bulk_size)
+
+
+def read_numpy_edges(filename: str, bulk_size: int, source_column: str, target_column: str,
+                     weight_column: Optional[str] = None,
+                     property_columns: Optional[List[str]] = None) -> Iterable[EdgeColumns]:
+    """
+    Yield edges from a .npy or .npz file in bulks of size bulk_size. A .npy file either contains a two-dimensional
+    array with the columns <from id> <to id> [<weight>] or a structured array with named columns. A .npz file contains
+    one array per column. Column names are only used for structured arrays and .npz files. A .npy file is memory
+    mapped, the arrays of a .npz file are read one by one.
+    :param filename: the file containing the edges
+    :param bulk_size: the number of edges in one bulk
+    :param source_column: the name of the column containing the from ids
+    :param target_column: the name of the column containing the to ids
+    :param weight_column: the name of the column containing the weights, if any
+    :param property_columns: the names of further columns that are written into the edges
+    :return: None
+    """
+    property_columns = property_columns or []
+    if filename.endswith('.npz'):
+        with np.load(filename) as arrays:
+            columns = {name: arrays[name] for name in [source_column, target_column] + property_columns}
+            weights = arrays[weight_column] if weight_column and weight_column in arrays else None
+        yield from _slice_columns(columns[source_column], columns[target_column], weights,
+                                  {name: columns[name] for name in property_columns}, bulk_size)
+        return
+
+    array = np.load(filename, mmap_mode='r')
+    if array.dtype.names:  # structured array
+        weights = array[weight_column] if weight_column and weight_column in array.dtype.names else None
+        yield from _slice_columns(array[source_column], array[target_column], weights,
+                                  {name: array[name] for name in property_columns}, bulk_size)
+    else:
+        if array.ndim != 2 or array.shape[1] not in [2, 3]:
+            raise RuntimeError(f'The array in {filename} must have the shape (m, 2) or (m, 3), '
+                               f'but it has the shape {array.shape}.')
+        weights = array[:, 2] if array.shape[1] == 3 else None
+        yield from _slice_columns(array[:, 0], array[:, 1], weights, dict(), bulk_size)
+
+
+def _record_batch_to_columns(batch, source_column: str, target_column: str, weight_column: Optional[str],
+                             property_columns: List[str]) -> EdgeColumns:
+    names = batch.schema.names
+    weights = None
+    if weight_column and weight_column in names:
+        weights = batch.column(names.index(weight_column)).to_numpy(zero_copy_only=False)
+    return (batch.column(names.index(source_column)).to_numpy(zero_copy_only=False),
+            batch.column(names.index(target_column)).to_numpy(zero_copy_only=False),
+            weights,
+            {name: batch.column(names.index(name)).to_numpy(zero_copy_only=False) for name in property_columns})
+
+
+def read_parquet_edges(filename: str, bulk_size: int, source_column: str, target_column: str,
+                       weight_column: Optional[str] = None,
+                       property_columns: Optional[List[str]] = None) -> Iterable[EdgeColumns]:
+    """
+    Yield edges from a Parquet file in record batches of (at most) bulk_size rows. Only the needed columns are read.
+    :param filename: the file containing the edges
+    :param bulk_size: the number of edges in one bulk
+    :param source_column: the name of the column containing the from ids
+    :param target_column: the name of the column containing the to ids
+    :param weight_column: the name of the column containing the weights, if any
+    :param property_columns: the names of further columns that are written into the edges
+    :return: None
+    """
+    pyarrow = _import_pyarrow()
+    property_columns = property_columns or []
+    parquet_file = pyarrow.parquet.ParquetFile(filename, memory_map=True)
+    columns = [source_column, target_column] + property_columns
+    if weight_column and weight_column in parquet_file.schema_arrow.names:
+        columns.append(weight_column)
+    for batch in parquet_file.iter_batches(batch_size=bulk_size, columns=columns):
+        yield _record_batch_to_columns(batch, source_column, target_column, weight_column, property_columns)
+
+
+def read_arrow_edges(filename: str, bulk_size: int, source_column: str, target_column: str,
+                     weight_column: Optional[str] = None,
+                     property_columns: Optional[List[str]] = None) -> Iterable[EdgeColumns]:
+    """
+    Yield edges from an Arrow IPC file (random access or stream format) in batches of (at most) bulk_size rows.
+    The file is memory mapped.
+    :param filename: the file containing the edges
+    :param bulk_size: the number of edges in one bulk
+    :param source_column: the name of the column containing the from ids
+    :param target_column: the name of the column containing the to ids
+    :param weight_column: the name of the column containing the weights, if any
+    :param property_columns: the names of further columns that are written into the edges
+    :return: None
+    """
+    pyarrow = _import_pyarrow()
+    property_columns = property_columns or []
+    with pyarrow.memory_map(filename, 'r') as source:
+        try:
+            reader = pyarrow.ipc.open_file(source)
+            batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+        except pyarrow.ArrowInvalid:
+            source.seek(0)
+            batches = pyarrow.ipc.open_stream(source)
+        for batch in batches:
+            for offset in range(0, batch.num_rows, bulk_size):
+                yield _record_batch_to_columns(batch.slice(offset, bulk_size), source_column, target_column,
+                                               weight_column, property_columns)
+
+
+def count_binary_edges(sourcetype: str, filename: str, id_type: str = 'int64', source_column: str = 'src'):
+    """
+    Return the number of edges in the given file without reading the edges, or None if it cannot be determined cheaply.
+    """
+    if sourcetype == 'binary':
+        return np.memmap(filename, dtype=np.dtype('<i4') if id_type == 'int32' else np.dtype('<i8'),
+                         mode='r').shape[0] // 2
+    if sourcetype == 'numpy':
+        if filename.endswith('.npz'):
+            with np.load(filename) as arrays:
+                return len(arrays[source_column])
+        return np.load(filename, mmap_mode='r').shape[0]
+    if sourcetype == 'parquet':
+        return _import_pyarrow().parquet.ParquetFile(filename).metadata.num_rows
+    return None
+
+
+def read_binary_edges(sourcetype: str, filename: str, bulk_size: int, id_type: str = 'int64',
+                      source_column: str = 'src', target_column: str = 'dst', weight_column: Optional[str] = None,
+                      property_columns: Optional[List[str]] = None) -> Iterable[EdgeColumns]:
+    if sourcetype == 'binary':
+        return read_raw_binary_edges(filename, bulk_size, id_type)
+    if sourcetype == 'numpy':
+        return read_numpy_edges(filename, bulk_size, source_column, target_column, weight_column, property_columns)
+    if sourcetype == 'parquet':
+        return read_parquet_edges(filename, bulk_size, source_column, target_column, weight_column, property_columns)
+    if sourcetype == 'arrow':
+        return read_arrow_edges(filename, bulk_size, source_column, target_column, weight_column, property_columns)
+    raise RuntimeError(f'Unknown binary source type {sourcetype}, expected one of {BINARY_SOURCE_TYPES}.')
+
+
+def make_edges_from_columns(to_v, sources: np.ndarray, targets: np.ndarray, weights: Optional[np.ndarray],
+                            properties: Dict[str, np.ndarray], numeric_encoder: NumericEncoder) -> List[Dict]:
+    """
+    Make edge documents from columns. tolist() converts a whole column to Python values at once, so there is no
+    per-value conversion from numpy types.
+    """
+    froms = [to_v(f) for f in sources.tolist()]
+    tos = [to_v(t) for t in targets.tolist()]
+    if weights is None:
+        edges = [{"_from": f, "_to": t} for f, t in zip(froms, tos)]  # Null will be inserted
+    else:
+        edges = [{"_from": f, "_to": t, "weight": w}
+                 for f, t, w in zip(froms, tos, numeric_encoder.float_column(weights))]
+    for name, values in properties.items():
+        for edge, value in zip(edges, values.tolist()):
+            edge[name] = value
+    return edges
+
+
+def read_and_create_vertices_and_edges_binary(db_info: DatabaseInfo, edge_batches: Iterable[EdgeColumns],
+                                              num_edges: Optional[int], be_verbose: bool,
+                                              numeric_encoder: Optional[NumericEncoder] = None,
+                                              sampler: Optional[Sampler] = None,
+                                              statistics: Optional[GraphStatistics] = None):
+    """
+    Insert the edges from edge_batches and the corresponding vertices into the collections db_info.edge_coll_name and
+    db_info.vertices_coll_name. As in read_and_create_vertices_and_edges from edge_list, the vertices are taken from
+    the edges.
+    :param db_info:
+    :param edge_batches: batches of edge columns
+    :param num_edges: the total number of edges for the progress bar or None if unknown
+    :param be_verbose:
+    :param numeric_encoder: how the weights are stored, as strings by default
+    :param sampler: if given, only the edges of the sampled subgraph (and their vertices) are inserted
+    :param statistics: if given, the inserted edges are counted in it
+    :return: None
+    """
+    numeric_encoder = numeric_encoder or NumericEncoder()
+    to_v = ConverterToVertex(db_info.vertices_coll_name).idx_to_vertex
+
+    def insert_batch(sources, targets, weights, properties) -> int:
+        num_read = len(sources)
+        if sources.dtype.kind == 'f':  # ids stored together with weights in an (m, 3) array
+            sources, targets = sources.astype(np.int64), targets.astype(np.int64)
+        if sampler is not None:
+            mask = sampler.edge_mask(sources, targets)
+            sources, targets = sources[mask], targets[mask]
+            weights = None if weights is None else weights[mask]
+            properties = {name: values[mask] for name, values in properties.items()}
+            if len(sources) == 0:
+                return num_read
+        vertex_indexes = np.unique(np.concatenate((sources, targets)))
+        insert_vertices_unique(db_info, [str(v) for v in vertex_indexes.tolist()])
+        edges = make_edges_from_columns(to_v, sources, targets, weights, properties, numeric_encoder)
+        insert_documents(db_info, edges, db_info.edge_coll_name)
+        if statistics:
+            statistics.add_edge_columns(sources, targets, weights)
+        return num_read
+
+    if be_verbose:
+        with tqdm(total=num_edges, desc='Importing edges',
+                  mininterval=1.0,
+                  unit='edges', ncols=100) as pbar:
+            for batch in edge_batches:
+                pbar.update(insert_batch(*batch))
+    else:
+        for batch in edge_batches:
+            insert_batch(*batch)
+
+
+def import_binary_edges(db_info: DatabaseInfo, sourcetype: str, filename: str, bulk_size: int, be_verbose: bool,
+                        id_type: str = 'int64', source_column: str = 'src', target_column: str = 'dst',
+                        weight_column: Optional[str] = None, property_columns: Optional[List[str]] = None,
+                        import_info: Optional[ImportInfo] = None):
+    """
+    Import a graph given by its edges in a binary or columnar file. sourcetype is one of
+    'binary' (raw little-endian pairs of ids of type id_type), 'numpy' (.npy or .npz), 'parquet' or 'arrow'.
+    :param db_info:
+    :param sourcetype:
+    :param filename:
+    :param bulk_size:
+    :param be_verbose:
+    :param id_type:
+    :param source_column:
+    :param target_column:
+    :param weight_column:
+    :param property_columns:
+    :param import_info: further import options
+    :return: None
+    """
+    import_info = import_info or ImportInfo()
+    if import_info.sampling is not None and import_info.sampling.method == 'snowball':
+        raise RuntimeError('Snowball sampling is only supported for edge lists and Graphalytics graphs.')
+    if db_info.overwrite or not graph_exists(db_info):
+        create_graph(db_info)
+        num_edges = count_binary_edges(sourcetype, filename, id_type, source_column)
+        edge_batches = read_binary_edges(sourcetype, filename, bulk_size, id_type, source_column, target_column,
+                                         weight_column, property_columns)
+        sampler = get_sampler(import_info.sampling)
+        read_and_create_vertices_and_edges_binary(db_info, edge_batches, num_edges, be_verbose,
+                                                  import_info.numeric_encoder, sampler, import_info.statistics)
+        if be_verbose and sampler:
+            print(sampler.summary_string())
+        if be_verbose and import_info.numeric_encoder.track_size:
+            print(import_info.numeric_encoder.size_reduction_string())
+    else:
+        if be_verbose:
+            print(f'The graph {db_info.graph_name} exists already, skipping. To overwrite, use \'--overwrite\'.')
@@ -1,15 +1,11 @@
-import math
-import multiprocessing
 import random
-import time
 from typing import List, Union, Tuple, Optional
 
-from tqdm import tqdm, trange
-
-from edges_generator import add_edge, add_smart_edge, make_edges_connect_parts
-from general import yes_with_prob, insert_documents, create_graph, graph_exists, get_time_difference_string
+from edges_generator import add_edge, add_smart_edge
+from general import yes_with_prob
+from generator_pool import PartsGenerator, generate_graph, prepare_graph
 from helper_classes import DatabaseInfo, GraphInfo, CliquesGraphInfo, CliquesHelper
-from vertices_generator import make_and_insert_vertices, ConverterToVertex
+from vertices_generator import ConverterToVertex
 
 
 def get_num_edges_between_cliques(size1: int, size2: int):
@@ -23,6 +19,10 @@ def make_edges_generalized_clique(db_info: DatabaseInfo,
                                   first_idx: int,
                                   end_idx: int,
                                   ):
+    """
+    Make the edges (i, j) with first_idx <= i < j < end_idx pair by pair, each of them missing with probability
+    prob_missing. This is the reference for make_edges_generalized_clique_piece(), see benchmark_generation.py.
+    """
     edges = []
 
     # last entry in c_helper.starts_of_cliques is for the next clique
@@ -38,9 +38,6 @@ def make_edges_generalized_clique(db_info: DatabaseInfo,
                 if len(edges) >= bulk_size:
                     yield edges
                     edges.clear()
-            if edges:
-                yield edges
-                edges.clear()
     else:
         to_v = ConverterToVertex(db_info.vertices_coll_name).idx_to_vertex
         for i in range(first_idx, end_idx):
@@ -49,50 +46,6 @@ def make_edges_generalized_clique(db_info: DatabaseInfo,
                 if len(edges) >= bulk_size:
                     yield edges
                     edges.clear()
-            if edges:
-                yield edges
-                edges.clear()
-    if edges:
-        yield edges
-
-
-def make_edges_generalized_clique_piece(db_info: DatabaseInfo,
-                                        graph_info: GraphInfo,
-                                        bulk_size: int,
-                                        prob_missing: float,
-                                        start_from_idx: int,
-                                        end_from_idx: int,
-                                        end_idx: int
-                                        ):
-    edges = []
-
-    # last entry in c_helper.starts_of_cliques is for the next clique
-    # if clique_idx >= len(c_helper.starts_of_cliques) - 1:
-    #     raise RuntimeError(f'make_edges_generalized_clique: clique {clique_idx} does not exist, nothing to connect.')
-
-    if db_info.isSmart:
-        to_v = ConverterToVertex(db_info.vertices_coll_name).idx_to_smart_vertex
-        for i in range(start_from_idx, end_from_idx):
-            smart_val_i = str(i)
-            for j in range(i + 1, end_idx):
-                add_smart_edge(i, j, edges, prob_missing, db_info, graph_info, to_v, smart_val_i, str(j))
-                if len(edges) >= bulk_size:
-                    yield edges
-                    edges.clear()
-            if edges:
-                yield edges
-                edges.clear()
-    else:
-        to_v = ConverterToVertex(db_info.vertices_coll_name).idx_to_vertex
-        for i in range(start_from_idx, end_from_idx):
-            for j in range(i + 1, end_idx):
-                add_edge(i, j, edges, prob_missing, db_info, graph_info, to_v)
-                if len(edges) >= bulk_size:
-                    yield edges
-                    edges.clear()
-            if edges:
-                yield edges
-                edges.clear()
     if edges:
         yield edges
 
@@ -136,205 +89,61 @@ def make_tournament_edges(edge_property: Union[str, None, Tuple[str, List[str]]]
         yield edges
 
 
-def make_and_insert_piece(db_info: DatabaseInfo, graph_info: GraphInfo, bulk_size: int, prob_missing: float,
-                          start_from_idx: int, end_from_idx: int, end_idx: int, num_edges: int, be_verbose: bool,
-                          i: int, num_cores=multiprocessing.cpu_count()):
-    def _do_make(do_pbar_update: bool) -> int:
-        num_edges_ = 0
-        for edges in make_edges_generalized_clique_piece(db_info, graph_info, bulk_size, prob_missing, start_from_idx,
-                                                         end_from_idx, end_idx):
-            insert_documents(db_info, edges, db_info.edge_coll_name)
-            if do_pbar_update:
-                pbar.update(len(edges))
-            num_edges_ += len(edges)
-        return num_edges_
-
-    start = time.monotonic()
-
-    if be_verbose and i == 0:
-        with tqdm(total=num_edges,
-                  desc=f'Creating clique edges (1/{num_cores})',
-                  mininterval=1.0,
-                  unit='edges', ncols=100) as pbar:
-            num_edges = _do_make(do_pbar_update=True)
-    else:
-        num_edges = _do_make(do_pbar_update=False)
-
-    if be_verbose:
-        print(f'Time process {i:2}: {get_time_difference_string(time.monotonic() - start):10}, {num_edges:6} edges, '
-              f'start: {start_from_idx}, end_from: {end_from_idx}')
-
-
-def make_and_insert_clique_edges(db_info: DatabaseInfo, graph_info: GraphInfo,
-                                 bulk_size: int,
-                                 prob_missing: float = 0.0,
-                                 c_helper: Optional[CliquesHelper] = None,
-                                 clique_idx: Optional[int] = None,
-                                 start_idx: Optional[int] = None,
-                                 end_idx: Optional[int] = None,
-                                 be_verbose: bool = True
-                                 ):
-    """
-    Makes all edges of a clique (an edge is missing with probability prob_missing) and insert them into the database
-    specified in db_db_info. Either c_helper and clique_idx are given or start_idx and end_idx. In the former case,
-    the vertices from clique number clique_idx are connected
-    i.e., vertices in [c_helper.starts_of_cliques[clique_idx], c_helper.starts_of_cliques[clique_idx + 1]),
-    in the latte case, in [start_idx, end_idx). Parameter graph_info carries the information about the additional
-    attribute of edges.
-    :param db_info:
-    :param graph_info:
-    :param bulk_size:
-    :param prob_missing:
-    :param c_helper:
-    :param clique_idx:
-    :param start_idx:
-    :param end_idx:
-    :param be_verbose:
-    :return:
-    """
-    assert (c_helper is not None and clique_idx is not None and start_idx is None and end_idx is None) or (
-            c_helper is None and clique_idx is None and start_idx is not None and end_idx is not None)
-    if clique_idx is not None:
-        start_idx = c_helper.starts_of_cliques[clique_idx]
-        end_idx = c_helper.starts_of_cliques[clique_idx + 1]
-
-    n = end_idx - start_idx  # number vertices
-    num_edges = int(n * (n - 1) / 2 * (1 - prob_missing))
-    num_cores = multiprocessing.cpu_count()
-
-    if num_cores * 100 < end_idx - start_idx:
-        # parallelise
-        jobs = []
-
-        # Each process i makes edges from each vertex v in [start_i_idx, end_i_idx)
-        # to each vertex w in [i+1, end_idx). This is done in make_and_insert_piece().
-        # Note that end_idx is the same for all processes and that start_i_idx of process i+1 is
-        # end_i_idx of the process i. We need to compute end_i_idx such that the number of produced edges,
-        # which is piece_size = num_edges // num_cores is approximately the same for all processes.
-        # It's tiresome and error-prone to compute all end_i_idx at once, so we compute the
-        # current one in the corresponding iteration where we need it.
-        piece_size = num_edges // num_cores
-        start_i_idx = start_idx
-        for i in range(num_cores):
-            # solving for end_i_idx the equality piece_size = sum_{i=0}^end_p_idx (n-i-1)
-            # where the right-hand side is the number of edges from vertices v in [0,end_p_idx]
-            # to vertices w with v < w <= end_i_idx. (For convenience, we shifted end_i_idx to the left by one).
-            # So the first process gets the from vertices in the interval [0, end_p_idx + 1) and,
-            # in general, the current process in [start_i_idx, end_p_idx + 1).
-            end_i_idx = start_i_idx + int(((2 * n - 1) -
-                                           math.sqrt((2 * n - 1) * (2 * n - 1) - 4 * (
-                                                   2 - 2 * n + 2 * piece_size))) // 2)  # school math
-            end_i_idx = min(end_idx, end_i_idx + 1)  # shift back
-            if i == num_cores - 1:
-                end_i_idx = end_idx
-
-            process = multiprocessing.Process(target=make_and_insert_piece, args=(
-                db_info.copy(), graph_info.copy(), bulk_size, prob_missing, start_i_idx, end_i_idx, end_idx, piece_size,
-                be_verbose, i, num_cores))
-            process.start()
-            jobs.append(process)
-            # now update the interval whose first part is away to the previous process
-            n -= end_i_idx - start_i_idx
-            start_i_idx = end_i_idx
-
-        # for j in jobs:
-        #     j.start()
-        for j in jobs:
-            j.join()
-    else:
-        make_and_insert_piece(db_info, graph_info, bulk_size, prob_missing, start_idx, end_idx, end_idx, num_edges,
-                              be_verbose, 0)
-
-
 def create_one_clique_graph(db_info: DatabaseInfo,
                             bulk_size,
                             num_vertices: int,
-                            graph_info: GraphInfo, be_verbose: bool = True):
+                            graph_info: GraphInfo,
+                            num_processes: Optional[int] = None,
+                            num_insert_threads: int = 0,
+                            shard: Optional[Tuple[int, int]] = None,
+                            be_verbose: bool = True):
     """
-    Create a clique with num_vertices vertices in the database.
+    Create a clique with num_vertices vertices in the database. The edges are split into pieces with about the same
+    number of edges that num_processes processes (by default, one per core) make, see generator_pool.py.
     :param db_info:
     :param bulk_size:
     :param num_vertices:
     :param graph_info:
+    :param num_processes:
+    :param num_insert_threads: the number of threads sending the documents made by the processes, 0 if the processes
+        send them themselves
+    :param shard: (i, n) to make only the slice i of n slices of the graph, see generator_pool.generate_graph()
     :param be_verbose:
     :return:
     """
-    if db_info.overwrite or not graph_exists(db_info):
-        create_graph(db_info)
-    else:
-        if be_verbose:
-            print(f'The graph {db_info.graph_name} exists already, skipping. To overwrite, use \'--overwrite\'.')
+    if not prepare_graph(db_info, shard, be_verbose):
         return
 
-    make_and_insert_vertices(db_info, graph_info, num_vertices, bulk_size, add_part=False)
-    make_and_insert_clique_edges(db_info, graph_info, bulk_size, start_idx=0, end_idx=num_vertices,
-                                 be_verbose=be_verbose)
-
-
-def connect_parts(c_helper: CliquesHelper, bulk_size: int, prob_missing_all: float,
-                  prob_missing_one_between: float, db_info: DatabaseInfo, graph_info: GraphInfo,
-                  start_i_idx: int, end_i_idx: int, be_verbose: bool, num_cores: int):
-    for edges in make_edges_connect_parts(c_helper, bulk_size, prob_missing_all,
-                                          prob_missing_one_between,
-                                          db_info, graph_info, start_i_idx, end_i_idx, be_verbose):
-        insert_documents(db_info, edges, db_info.edge_coll_name)
+    c_helper = CliquesHelper()
+    c_helper.update(num_vertices)
+    c_graph_info = CliquesGraphInfo(1, num_vertices, num_vertices, 0.0, 0.0, 0.0)
+    generate_graph(db_info, graph_info, PartsGenerator(c_helper, c_graph_info, add_part=False), bulk_size,
+                   num_processes, num_insert_threads, shard, be_verbose)
 
 
 def create_cliques_graph(db_info: DatabaseInfo,
                          graph_info: GraphInfo,
                          c_graph_info: CliquesGraphInfo,
                          bulk_size: int,
-                         be_verbose: bool
+                         num_processes: Optional[int] = None,
+                         num_insert_threads: int = 0,
+                         shard: Optional[Tuple[int, int]] = None,
+                         be_verbose: bool = True
                          ) -> None:
-    if db_info.overwrite or not graph_exists(db_info):
-        create_graph(db_info)
-    else:
-        if be_verbose:
-            print(f'The graph {db_info.graph_name} exists already, skipping. To overwrite, use \'--overwrite\'.')
+    """
+    Create a graph of c_graph_info.num_cliques cliques with random sizes and random edges between them. The sizes are
+    drawn first, then the vertices, the clique edges and the edges between the cliques are split into tasks that one
+    pool of num_processes processes (by default, one per core) works off, the most expensive tasks first, see
+    generator_pool.py. The documents are sent by num_insert_threads threads or, if it is 0, by the processes. With
+    shard = (i, n), only the slice i of n slices of the graph is made.
+    """
+    if not prepare_graph(db_info, shard, be_verbose):
         return
 
-    # create the cliques
-
+    sizes = random.Random(graph_info.seed)
     c_helper = CliquesHelper()
+    for _ in range(c_graph_info.num_cliques):
+        c_helper.update(sizes.randint(c_graph_info.min_size_clique, c_graph_info.max_size_clique))
 
-    if be_verbose:
-        generator = trange(c_graph_info.num_cliques, desc='Constructing cliques', mininterval=1.0, unit='clique')
-    else:
-        generator = range(c_graph_info.num_cliques)
-    for clique_i in generator:
-        num_vertices = random.randint(c_graph_info.min_size_clique, c_graph_info.max_size_clique)
-        make_and_insert_vertices(db_info, graph_info, num_vertices, bulk_size, add_part=True,
-                                 c_helper=c_helper, be_verbose=be_verbose)
-        make_and_insert_clique_edges(db_info, graph_info, bulk_size, c_graph_info.prob_missing_one,
-                                     c_helper=c_helper, clique_idx=clique_i, be_verbose=be_verbose)
-
-    # create edges_ between cliques
-    n = c_helper.num_cliques()
-    num_edges = int(n * (n - 1) / 2)
-    num_cores = multiprocessing.cpu_count()
-
-    if num_cores * 100 < num_edges:
-        # parallelise
-        jobs = []
-
-        piece_size = num_edges // num_cores
-        start_i_idx = 0
-        for i in range(num_cores):
-            end_i_idx = start_i_idx + int(((2 * n - 1) -
-                                           math.sqrt((2 * n - 1) * (2 * n - 1) - 4 * (
-                                                   2 - 2 * n + 2 * piece_size))) // 2)  # school math
-            end_i_idx = min(n, end_i_idx + 1)  # shift back
-            if i == num_cores - 1:
-                end_i_idx = n
-            process = multiprocessing.Process(target=connect_parts,
-                                              args=(c_helper, bulk_size, c_graph_info.prob_missing_all,
-                                                    c_graph_info.prob_missing_one_between,
-                                                    db_info, graph_info, start_i_idx, end_i_idx, be_verbose, i,
-                                                    num_cores))
-            process.start()
-            jobs.append(process)
-            # now update the interval whose first part is away to the previous process
-            n -= end_i_idx - start_i_idx
-            start_i_idx = end_i_idx
-
-    # the logic is as in make_edges_generalized_clique_piece
+    generate_graph(db_info, graph_info, PartsGenerator(c_helper, c_graph_info), bulk_size, num_processes,
+                   num_insert_threads, shard, be_verbose)
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+import argparse
+import time
+
+from arguments import make_global_parameters, database_parameters, make_clone_parameters
+from general import get_time_difference_string, database_address
+from graph_clone import clone_graph
+from helper_classes import DatabaseInfo
+
+
+def get_arguments():
+    parser = argparse.ArgumentParser(description='Copy a graph to another database or server.')
+
+    make_global_parameters(parser)
+    database_parameters(parser)
+    make_clone_parameters(parser)
+
+    arguments = parser.parse_args()
+
+    # check arguments
+    if arguments.num_read_threads < 1 or arguments.num_write_threads < 1:
+        raise Exception('--num_read_threads and --num_write_threads must be positive.')
+    # the collections of the clone have the names of the source collections, so they would replace them
+    if database_address(arguments.endpoint) == database_address(arguments.target_endpoint):
+        raise Exception('The graph cannot be cloned into the database it is read from, give a --target_endpoint with '
+                        'another server or database.')
+
+    return arguments
+
+
+if __name__ == "__main__":
+    args = get_arguments()
+
+    source_db_info = DatabaseInfo(args.endpoint, args.graphname, username=args.user, password=args.pwd)
+    target_db_info = DatabaseInfo(args.target_endpoint, args.target_graphname or args.graphname,
+                                  replication_factor=args.repl_factor, number_of_shards=args.num_shards,
+                                  overwrite=args.overwrite, username=args.target_user, password=args.target_pwd)
+
+    start = time.monotonic()
+    clone_graph(source_db_info, target_db_info, args.bulk_size, args.num_read_threads, args.num_write_threads,
+                not args.silent)
+    if not args.silent:
+        print('Total time: ' + get_time_difference_string(time.monotonic() - start))
@@ -0,0 +1,211 @@
+import gzip
+import hashlib
+import itertools
+import json
+import os
+import re
+import threading
+from datetime import datetime, timezone
+from typing import Optional, List, Dict, Set, Iterable
+
+from general import BoundedExecutor
+
+DOCUMENT_COLLECTION = 2
+EDGE_COLLECTION = 3
+
+
+def _database_name(endpoint: str) -> str:
+    match = re.search(r'/_db/([^/]+)', endpoint)
+    return match.group(1) if match else '_system'
+
+
+class DumpWriter:
+    """
+    Write a graph into a directory in the format of arangodump instead of sending it to a server, so that it can be
+    restored with arangorestore (with --include-system-collections for the graph definition in _graphs). For every
+    collection, there is a structure file <name>.structure.json with the sharding (and smart) options and data files
+    <name>_<md5 of name>.<n>.data.json[.gz] with (at most) docs_per_file documents, one per line.
+    The documents are collected per collection until there are docs_per_file of them. In the process that created the
+    writer, the data files are then compressed and written by num_threads threads, at most num_threads files are
+    waiting; write_documents() blocks until one of them is done. In other processes (e.g., the processes of the clique
+    generator), the files are written by the calling thread and flush() must be called before the process ends. The
+    first error of a write is raised by the next write or by finish(). Data files are first written with temporary
+    names; finish() must be called in the creating process after all others have finished to write the remaining
+    documents and give the files their final, consecutive numbers.
+    """
+
+    def __init__(self, directory: str, compress: bool = True, num_threads: int = 4, database: str = '_system',
+                 docs_per_file: int = 500000):
+        self.directory = directory
+        self.compress = compress
+        self.num_threads = num_threads
+        self.database = database
+        self.docs_per_file = docs_per_file
+        self.pid = os.getpid()
+        # the documents not written yet per collection, only for the process buffers_pid
+        self.buffers: Dict[str, list] = dict()
+        self.buffers_pid = self.pid
+        self.lock = threading.Lock()
+        self.writes: Optional[BoundedExecutor] = BoundedExecutor(num_threads)
+        self.counter = itertools.count()
+        self.seen: Dict[str, Set[str]] = dict()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['writes'], state['counter'], state['lock']
+        state['buffers'] = dict()
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.writes = None
+        self.counter = itertools.count()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def data_file_prefix(collection_name: str) -> str:
+        return f'{collection_name}_{hashlib.md5(collection_name.encode()).hexdigest()}'
+
+    def _data_suffix(self) -> str:
+        return '.data.json.gz' if self.compress else '.data.json'
+
+    def _write_json(self, filename: str, document: dict):
+        with open(os.path.join(self.directory, filename), 'w') as f:
+            json.dump(document, f, indent=2)
+
+    def exists(self) -> bool:
+        return os.path.exists(os.path.join(self.directory, 'dump.json'))
+
+    def write_structure(self, graph_name: str, vertex_collections: List[str], edge_definitions: List[dict],
+                        is_smart: bool = False, smart_attribute: Optional[str] = None,
+                        number_of_shards: Optional[int] = None, replication_factor: Optional[int] = None):
+        """
+        Empty the directory of an earlier dump and write the dump metadata, the structure files of the collections and
+        the definition of the graph into _graphs.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        self.buffers.clear()
+        for filename in os.listdir(self.directory):
+            if filename.endswith(('.structure.json', '.data.json', '.data.json.gz', '.part')) or \
+                    filename in ['dump.json', 'ENCRYPTION']:
+                os.remove(os.path.join(self.directory, filename))
+        self.seen.clear()
+
+        def parameters(name: str, collection_type: int) -> dict:
+            p = {'name': name, 'type': collection_type, 'isSystem': False, 'waitForSync': False,
+                 'keyOptions': {'type': 'traditional', 'allowUserKeys': True}, 'shardKeys': ['_key']}
+            if number_of_shards is not None:
+                p['numberOfShards'] = number_of_shards
+            if replication_factor is not None:
+                p['replicationFactor'] = replication_factor
+            if is_smart:
+                p['isSmart'] = True
+                p['shardKeys'] = ['_key:']
+                if collection_type == DOCUMENT_COLLECTION:
+                    p['smartGraphAttribute'] = smart_attribute
+                else:
+                    p['distributeShardsLike'] = vertex_collections[0]
+            return p
+
+        for name in vertex_collections:
+            self._write_json(f'{name}.structure.json',
+                             {'indexes': [], 'parameters': parameters(name, DOCUMENT_COLLECTION)})
+        for definition in edge_definitions:
+            name = definition['collection']
+            self._write_json(f'{name}.structure.json',
+                             {'indexes': [], 'parameters': parameters(name, EDGE_COLLECTION)})
+        graph = {'_key': graph_name, 'edgeDefinitions': edge_definitions, 'orphanCollections': vertex_collections,
+                 'numberOfShards': number_of_shards, 'replicationFactor': replication_factor}
+        if is_smart:
+            graph['isSmart'] = True
+            graph['smartGraphAttribute'] = smart_attribute
+        self._write_json('_graphs.structure.json', {'indexes': [], 'parameters': {
+            'name': '_graphs', 'type': DOCUMENT_COLLECTION, 'isSystem': True, 'waitForSync': False}})
+        self._write_data_file([graph], '_graphs', f'{self.data_file_prefix("_graphs")}.0{self._data_suffix()}')
+        with open(os.path.join(self.directory, 'ENCRYPTION'), 'w') as f:
+            f.write('none')
+        self._write_json('dump.json', {
+            'database': self.database, 'lastTickAtDumpStart': '0',
+            'createdAt': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'properties': {'name': self.database, 'isSystem': self.database == '_system'}})
+
+    def _write_data_file(self, documents: Iterable[dict], collection_name: str, filename: Optional[str] = None):
+        data = ''.join(json.dumps(d, separators=(',', ':')) + '\n' for d in documents).encode()
+        if self.compress:
+            data = gzip.compress(data, compresslevel=6)
+        if filename is None:
+            filename = f'{self.data_file_prefix(collection_name)}.{os.getpid()}-{next(self.counter)}.part'
+        with open(os.path.join(self.directory, filename), 'wb') as f:
+            f.write(data)
+
+    def _write_file(self, documents: list, collection_name: str):
+        if os.getpid() != self.pid or self.writes is None:
+            self._write_data_file(documents, collection_name)
+            return
+        self.writes.submit(self._write_data_file, documents, collection_name)
+
+    def write_documents(self, documents, collection_name: str):
+        full_buffers = []
+        with self.lock:
+            if self.buffers_pid != os.getpid():  # a forked process, the buffers are the ones of the parent
+                self.buffers = dict()
+                self.buffers_pid = os.getpid()
+            buffer = self.buffers.setdefault(collection_name, [])
+            buffer += documents
+            while len(buffer) >= self.docs_per_file:
+                full_buffers.append(buffer[:self.docs_per_file])
+                del buffer[:self.docs_per_file]
+        for full_buffer in full_buffers:
+            self._write_file(full_buffer, collection_name)
+
+    def flush(self):
+        """
+        Write the collected documents of this process.
+        """
+        with self.lock:
+            buffers = self.buffers if self.buffers_pid == os.getpid() else dict()
+            self.buffers = dict()
+            self.buffers_pid = os.getpid()
+        for collection_name, documents in buffers.items():
+            if documents:
+                self._write_file(documents, collection_name)
+
+    def unseen(self, collection_name: str, keys: Iterable[str]) -> List[str]:
+        """
+        Return the keys not given in an earlier call for the collection, e.g., to write every vertex of an edge list
+        only once.
+        """
+        seen = self.seen.setdefault(collection_name, set())
+        new_keys = [k for k in keys if k not in seen]
+        seen.update(new_keys)
+        return new_keys
+
+    def finish(self):
+        """
+        Write the remaining documents, wait for the pending writes and number the data files of every collection
+        consecutively, starting with 0.
+        """
+        self.flush()
+        self.writes.join()
+        parts: Dict[str, List[str]] = dict()
+        for filename in sorted(os.listdir(self.directory)):
+            if filename.endswith('.part'):
+                parts.setdefault(filename.split('.', 1)[0], []).append(filename)
+        for prefix, filenames in parts.items():
+            for i, filename in enumerate(filenames):
+                os.rename(os.path.join(self.directory, filename),
+                          os.path.join(self.directory, f'{prefix}.{i}{self._data_suffix()}'))
+
+
+def get_dump_writer(args) -> Optional[DumpWriter]:
+    """
+    Return a writer into args.dump_dir if it is given, otherwise None.
+    """
+    if not args.dump_dir:
+        return None
+    if args.dump_threads < 1:
+        raise RuntimeError('--dump_threads must be positive.')
+    if args.dump_docs_per_file < 1:
+        raise RuntimeError('--dump_docs_per_file must be positive.')
+    return DumpWriter(args.dump_dir, not args.dump_no_compression, args.dump_threads, _database_name(args.endpoint),
+                      args.dump_docs_per_file)
@@ -1,22 +1,31 @@
+from typing import Optional, Iterable, List
+
 from tqdm import tqdm
 
-from general import file_reader, insert_documents, create_graph, graph_exists
-from helper_classes import DatabaseInfo
+from attribute_encoding import NumericEncoder
+from edge_preprocessing import read_edge_lines
+from general import insert_documents, create_graph, graph_exists
+from graph_statistics import GraphStatistics
+from helper_classes import DatabaseInfo, ImportInfo, EdgePreprocessingInfo
+from sampling import Sampler, get_sampler, sample_edge_lines
 from vertices_generator import insert_vertices_unique, ConverterToVertex
+from watermark import AppendedLinesReader, get_watermark
 
 
-def read_and_create_vertices_and_edges(db_info: DatabaseInfo, edges_filename, bulk_size, be_verbose: bool):
+def insert_edge_batches(db_info: DatabaseInfo, edge_batches: Iterable[List[str]], be_verbose: bool,
+                        numeric_encoder: Optional[NumericEncoder] = None,
+                        statistics: Optional[GraphStatistics] = None):
     """
-    (Almost the same as read_and_create_edges_graphalytics from graphalytics_importer. Duplicate code to avoid if checks
-     for every edge.) Read edges from the given file and insert them and the corresponding vertices into the collections
-    edges_coll_name and v_coll in bulks of num_vertices bulk_size with smart attribute smart_attribute. The edges must
-    be given one edge per line in the form <node id> <node id> [<weight>]. If the weight is not given, Null is inserted.
-    Lines starting with '#' or '/' are skipped.
-    :param be_verbose:
+    Insert the edges given as lists of lines <node id> <node id> [<weight>] and the corresponding vertices into the
+    collections db_info.edge_coll_name and db_info.vertices_coll_name. If the weight is not given, Null is inserted.
+    Lines starting with '#', '/' or '%' are skipped.
     :param db_info:
-    :param edges_filename:
-    :param bulk_size:
-    :return:
+    :param edge_batches: the lists of lines, every list is inserted in one go
+    :param be_verbose:
+    :param numeric_encoder: how numeric attributes are stored, as strings by default. Weights that are not numbers
+           are always stored as strings.
+    :param statistics: if given, the inserted edges are counted in it
+    :return: None
     """
 
     def make_edges_and_vertex_indexes():
@@ -31,7 +40,7 @@ def read_and_create_vertices_and_edges(db_info: DatabaseInfo, edges_filename, bu
                 edges_.append({"_from": to_v(f), "_to": to_v(t)})  # Null will be inserted
             else:  # len == 3
                 f, t, w = e
-                edges_.append({"_from": to_v(f), "_to": to_v(t), "weight": f'{w}'})
+                edges_.append({"_from": to_v(f), "_to": to_v(t), "weight": numeric_encoder.token_value(w, 'auto')})
             # add vertices
             # this tests existence just in this bulk, globally checked in insert_vertices_unique
             vertex_indexes_.add(f)
@@ -39,28 +48,102 @@ def read_and_create_vertices_and_edges(db_info: DatabaseInfo, edges_filename, bu
 
         return edges_, vertex_indexes_
 
+    numeric_encoder = numeric_encoder or NumericEncoder()
     to_v = ConverterToVertex(db_info.vertices_coll_name).idx_to_vertex
 
     if be_verbose:
         with tqdm(desc='Importing edges',
                   mininterval=1.0,
                   unit='edges', ncols=100) as pbar:
-            for eids in file_reader(edges_filename, bulk_size):
+            for eids in edge_batches:
                 edges, vertex_indexes = make_edges_and_vertex_indexes()
                 insert_vertices_unique(db_info, vertex_indexes)
                 insert_documents(db_info, edges, db_info.edge_coll_name)
+                if statistics:
+                    statistics.add_edge_documents(edges)
                 pbar.update(len(edges))
     else:
-        for eids in file_reader(edges_filename, bulk_size):
+        for eids in edge_batches:
             edges, vertex_indexes = make_edges_and_vertex_indexes()
             insert_vertices_unique(db_info, vertex_indexes)
             insert_documents(db_info, edges, db_info.edge_coll_name)
+            if statistics:
+                statistics.add_edge_documents(edges)
+
+
+def read_and_create_vertices_and_edges(db_info: DatabaseInfo, edges_filename, bulk_size, be_verbose: bool,
+                                       numeric_encoder: Optional[NumericEncoder] = None,
+                                       edge_preprocessing: Optional[EdgePreprocessingInfo] = None,
+                                       sampler: Optional[Sampler] = None,
+                                       statistics: Optional[GraphStatistics] = None):
+    """
+    (Almost the same as read_and_create_edges_graphalytics from graphalytics_importer. Duplicate code to avoid if checks
+     for every edge.) Read edges from the given file and insert them and the corresponding vertices into the collections
+    edges_coll_name and v_coll in bulks of num_vertices bulk_size with smart attribute smart_attribute. The edges must
+    be given one edge per line in the form <node id> <node id> [<weight>]. If the weight is not given, Null is inserted.
+    Lines starting with '#' or '/' are skipped.
+    :param be_verbose:
+    :param db_info:
+    :param edges_filename:
+    :param bulk_size:
+    :param numeric_encoder: how numeric attributes are stored, as strings by default. Weights that are not numbers
+           are always stored as strings.
+    :param edge_preprocessing: how the edges are sorted, deduplicated etc. before they are inserted, if at all
+    :param sampler: if given, only the edges of the sampled subgraph are inserted
+    :param statistics: if given, the inserted edges are counted in it
+    :return:
+    """
+    edge_batches = sample_edge_lines(read_edge_lines(edges_filename, bulk_size, edge_preprocessing, be_verbose),
+                                     sampler)
+    insert_edge_batches(db_info, edge_batches, be_verbose, numeric_encoder, statistics)
+
+
+def import_edge_list_incremental(db_info: DatabaseInfo, filename, bulk_size, be_verbose: bool,
+                                 import_info: ImportInfo):
+    """
+    Import the lines of the append-only edge file that were appended since the last import of the graph. If the graph
+    does not exist yet (or db_info.overwrite is True), the whole file is imported. How far the file has been imported
+    is stored as a watermark in import_info.metadata_collection. Vertices of new edges are inserted if they are new.
+    :param db_info:
+    :param filename:
+    :param bulk_size:
+    :param be_verbose:
+    :param import_info:
+    :return: None
+    """
+    new_graph = db_info.overwrite or not graph_exists(db_info)
+    if new_graph:
+        create_graph(db_info)
+    watermark = get_watermark(db_info, import_info.metadata_collection, new_graph)
+    if be_verbose and not new_graph:
+        print(f'Continuing the import of {filename} after line {watermark.num_lines} (byte {watermark.offset}).')
+    reader = AppendedLinesReader(db_info, import_info.metadata_collection, filename, watermark)
+    sampler = get_sampler(import_info.sampling)
+    insert_edge_batches(db_info, sample_edge_lines(reader.batches(bulk_size), sampler), be_verbose,
+                        import_info.numeric_encoder, import_info.statistics)
+    if be_verbose:
+        print(f'Imported {reader.num_new_lines} new lines, the file has been imported up to line '
+              f'{reader.watermark.num_lines} (byte {reader.watermark.offset}).')
+        if sampler:
+            print(sampler.summary_string())
+        if import_info.numeric_encoder.track_size:
+            print(import_info.numeric_encoder.size_reduction_string())
 
 
-def import_edge_list(db_info: DatabaseInfo, filename, bulk_size, be_verbose: bool):
-    if db_info.overwrite or not graph_exists(db_info):
+def import_edge_list(db_info: DatabaseInfo, filename, bulk_size, be_verbose: bool,
+                     import_info: Optional[ImportInfo] = None):
+    import_info = import_info or ImportInfo()
+    if import_info.incremental:
+        import_edge_list_incremental(db_info, filename, bulk_size, be_verbose, import_info)
+    elif db_info.overwrite or not graph_exists(db_info):
         create_graph(db_info)
-        read_and_create_vertices_and_edges(db_info, filename, bulk_size, be_verbose)
+        sampler = get_sampler(import_info.sampling, filename, bulk_size, be_verbose)
+        read_and_create_vertices_and_edges(db_info, filename, bulk_size, be_verbose, import_info.numeric_encoder,
+                                           import_info.edge_preprocessing, sampler, import_info.statistics)
+        if be_verbose and sampler:
+            print(sampler.summary_string())
+        if be_verbose and import_info.numeric_encoder.track_size:
+            print(import_info.numeric_encoder.size_reduction_string())
     else:
         if be_verbose:
             print(f'The graph {db_info.graph_name} exists already, skipping. To overwrite, use \'--overwrite\'.')
@@ -0,0 +1,150 @@
+import heapq
+import os
+import tempfile
+from typing import Optional, Tuple, List, Iterable
+
+from general import file_reader
+from helper_classes import EdgePreprocessingInfo
+
+COMMENT_CHARACTERS = ('#', '/', '%')
+MAX_MERGE_FAN_IN = 128  # the maximum number of runs (open files) merged at the same time
+
+
+def _id_key(vertex_id: str) -> Tuple[int, int, str]:
+    """
+    Sort natural numbers numerically and before all other ids, which are sorted as strings.
+    """
+    return (0, int(vertex_id), '') if vertex_id.isdigit() else (1, 0, vertex_id)
+
+
+def _line_key(line: str):
+    f, t = line.split(' ', 2)[:2]
+    return _id_key(f), _id_key(t)
+
+
+class EdgePreprocessor:
+    """
+    Sort the edges of an edge file in memory-bounded runs that are spilled to disk and merged. While the edges
+    are streamed, self loops can be dropped, undirected edges can be canonicalized (the smaller id first) and
+    duplicate edges can be removed (the first occurrence in the file is kept). Comment lines and empty lines are
+    skipped.
+    """
+
+    def __init__(self, info: EdgePreprocessingInfo):
+        self.info = info
+        self.num_read = 0
+        self.num_self_loops = 0
+        self.num_duplicates = 0
+        self.num_runs = 0
+
+    def _normalized_lines(self, filename: str) -> Iterable[str]:
+        with open(filename, 'r') as file:
+            for line in file:
+                line = line.strip()
+                if not line or line[0] in COMMENT_CHARACTERS:
+                    continue
+                self.num_read += 1
+                e = line.split(' ', 2)
+                f, t = e[0], e[1]
+                if f == t and self.info.drop_self_loops:
+                    self.num_self_loops += 1
+                    continue
+                if self.info.canonicalize_undirected and _id_key(t) < _id_key(f):
+                    e[0], e[1] = t, f
+                    line = ' '.join(e)
+                yield line
+
+    def _write_run(self, run: List[str], directory: str) -> str:
+        run.sort(key=_line_key)
+        filename = os.path.join(directory, f'run_{self.num_runs}.txt')
+        with open(filename, 'w') as f:
+            f.write('\n'.join(run))
+            f.write('\n')
+        self.num_runs += 1
+        return filename
+
+    @staticmethod
+    def _read_run(filename: str) -> Iterable[str]:
+        with open(filename, 'r') as f:
+            for line in f:
+                yield line.rstrip('\n')
+
+    def _sorted_lines(self, filename: str, directory: str) -> Iterable[str]:
+        run = []
+        run_filenames = []
+        for line in self._normalized_lines(filename):
+            run.append(line)
+            if len(run) >= self.info.run_size:
+                run_filenames.append(self._write_run(run, directory))
+                run = []
+        if not run_filenames:  # everything fits into memory
+            run.sort(key=_line_key)
+            yield from run
+            return
+        if run:
+            run_filenames.append(self._write_run(run, directory))
+            run = []
+        while len(run_filenames) > MAX_MERGE_FAN_IN:  # merge groups of runs into longer runs
+            merged_filenames = []
+            for i in range(0, len(run_filenames), MAX_MERGE_FAN_IN):
+                group = run_filenames[i:i + MAX_MERGE_FAN_IN]
+                merged_filename = os.path.join(directory, f'run_{self.num_runs}.txt')
+                self.num_runs += 1
+                with open(merged_filename, 'w') as f:
+                    for line in heapq.merge(*[self._read_run(name) for name in group], key=_line_key):
+                        f.write(line)
+                        f.write('\n')
+                for name in group:
+                    os.remove(name)
+                merged_filenames.append(merged_filename)
+            run_filenames = merged_filenames
+        yield from heapq.merge(*[self._read_run(name) for name in run_filenames], key=_line_key)
+
+    def _unique_lines(self, lines: Iterable[str]) -> Iterable[str]:
+        previous = None
+        for line in lines:
+            key = line.split(' ', 2)[:2]
+            if key == previous:
+                self.num_duplicates += 1
+                continue
+            previous = key
+            yield line
+
+    def reader(self, filename: str, bulk_size: int) -> Iterable[List[str]]:
+        """
+        Yield the preprocessed edges of the file in lists of (at most) bulk_size lines, as file_reader does.
+        :param filename: the edge file, one edge per line in the form <node id> <node id> [<weight>]
+        :param bulk_size: the number of lines to return at most
+        :return: None
+        """
+        with tempfile.TemporaryDirectory(prefix='edge_runs_', dir=self.info.tmp_dir) as directory:
+            lines = self._sorted_lines(filename, directory)
+            if self.info.deduplicate:
+                lines = self._unique_lines(lines)
+            res = list()
+            for line in lines:
+                res.append(line)
+                if len(res) == bulk_size:
+                    yield res
+                    res = list()
+            if len(res) != 0:
+                yield res
+
+    def summary_string(self) -> str:
+        return (f'Preprocessed {self.num_read} edges ({self.num_runs} sorted runs on disk): '
+                f'dropped {self.num_self_loops} self loops and {self.num_duplicates} duplicates.')
+
+
+def read_edge_lines(filename: str, bulk_size: int, info: Optional[EdgePreprocessingInfo] = None,
+                    be_verbose: bool = False) -> Iterable[List[str]]:
+    """
+    Yield the lines of the edge file in lists of (at most) bulk_size lines. If info is given and enabled, the edges are
+    preprocessed (sorted, and possibly deduplicated, canonicalized and without self loops) first.
+    """
+    if info is None or not info.enabled():
+        yield from file_reader(filename, bulk_size)
+        return
+    preprocessor = EdgePreprocessor(info)
+    yield from preprocessor.reader(filename, bulk_size)
+    if be_verbose:
+        print(preprocessor.summary_string())
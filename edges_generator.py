@@ -1,16 +1,18 @@
 import random
-from typing import List, Dict, Callable, Union, Optional, Iterable
+from typing import List, Dict, Callable, Union, Optional, Iterable, Tuple
 
+import numpy as np
 from tqdm import trange
 
 from general import yes_with_prob
 from helper_classes import DatabaseInfo, GraphInfo, VertexOrEdgeProperty, CliquesHelper
-from vertices_generator import ConverterToVertex
+
+MIN_BLOCK_SIZE = 1 << 16  # the minimum number of vertex pairs handled at once by the vectorized generators
 
 
 def append_smart_edges(edges: List[Dict], f: int, t: int, to_v: Callable[[Union[int, str], str], str],
                        smart_val_f: str, smart_val_t: str, attr_name: Optional[str] = None,
-                       attr_value: Optional[str] = None):
+                       attr_value: Union[str, float, None] = None):
     """
 
     :param smart_val_t:
@@ -30,7 +32,7 @@ def append_smart_edges(edges: List[Dict], f: int, t: int, to_v: Callable[[Union[
 
 
 def append_edges(edges: List[Dict], f: int, t: int, to_v: Callable[[Union[int, str]], str],
-                 attr_name: Optional[str] = None, attr_value: Optional[str] = None):
+                 attr_name: Optional[str] = None, attr_value: Union[str, float, None] = None):
     """
 
     :param edges:
@@ -53,11 +55,12 @@ def add_smart_edge(i: int, j: int, edges: List, prob_missing: float, db_info: Da
     assert db_info.isSmart
     if yes_with_prob(prob_missing):
         return False
-    if graph_info.edge_property.type == 'none':
+    if graph_info.edge_property is None or graph_info.edge_property.type == 'none':
         append_smart_edges(edges, i, j, to_v, smart_val_i, smart_val_j)
     else:  # graph_info.edge_property.type == 'random':
-        append_smart_edges(edges, i, j, to_v, smart_val_i, smart_val_j, db_info.edge_coll_name,
-                           str(random.uniform(graph_info.edge_property.min, graph_info.edge_property.max)))
+        append_smart_edges(edges, i, j, to_v, smart_val_i, smart_val_j, db_info.edge_attribute,
+                           graph_info.numeric_encoder.float_value(
+                               random.uniform(graph_info.edge_property.min, graph_info.edge_property.max)))
 
 
 def add_edge(i: int, j: int, edges: List, prob_missing: float, db_info: DatabaseInfo, graph_info: GraphInfo,
@@ -65,11 +68,139 @@ def add_edge(i: int, j: int, edges: List, prob_missing: float, db_info: Database
     assert not db_info.isSmart
     if yes_with_prob(prob_missing):
         return False
-    if graph_info.edge_property.type == 'none':
+    if graph_info.edge_property is None or graph_info.edge_property.type == 'none':
         append_edges(edges, i, j, to_v)
     else:  # graph_info.edge_property.type == 'random':
         append_edges(edges, i, j, to_v, db_info.edge_attribute,
-                     str(random.uniform(graph_info.edge_property.min, graph_info.edge_property.max)))
+                     graph_info.numeric_encoder.float_value(
+                         random.uniform(graph_info.edge_property.min, graph_info.edge_property.max)))
+
+
+def vertex_id_list(db_info: DatabaseInfo, idxs: np.ndarray, smart_values: Optional[np.ndarray] = None) -> List[str]:
+    """
+    Return the _id values of the vertices with the given indexes as made by the generators. In SmartGraphs, the smart
+    value of a vertex is its index unless smart_values are given.
+    """
+    prefix = f'{db_info.vertices_coll_name}/'
+    if not db_info.isSmart:
+        return [f'{prefix}{i}' for i in idxs.tolist()]
+    if smart_values is None:
+        return [f'{prefix}{i}:{i}' for i in idxs.tolist()]
+    return [f'{prefix}{s}:{i}' for s, i in zip(smart_values.tolist(), idxs.tolist())]
+
+
+def sample_positions(num_positions: int, prob: float, rng: np.random.Generator,
+                     chunk_size: int) -> Iterable[np.ndarray]:
+    """
+    Choose every position in [0, num_positions) with probability prob and yield the chosen ones in increasing order in
+    arrays of at most chunk_size positions. Instead of drawing for every position, the gaps between the chosen
+    positions are drawn from the geometric distribution, so the work is proportional to the number of chosen positions.
+    """
+    if prob <= 0.0 or num_positions <= 0:
+        return
+    last = -1
+    while True:
+        positions = last + np.cumsum(rng.geometric(min(prob, 1.0), chunk_size))
+        if positions[-1] >= num_positions:
+            positions = positions[:np.searchsorted(positions, num_positions)]
+            if len(positions):
+                yield positions
+            return
+        yield positions
+        last = positions[-1]
+
+
+def clique_pair_blocks(start_from_idx: int, end_from_idx: int, end_idx: int,
+                       block_size: int) -> Iterable[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Yield the pairs (i, j) with start_from_idx <= i < end_from_idx and i < j < end_idx, ordered by i and then by j,
+    as two index arrays. Every block contains whole rows i and about block_size pairs, a single row may have more.
+    """
+    rows = np.arange(start_from_idx, min(end_from_idx, end_idx), dtype=np.int64)
+    counts = end_idx - 1 - rows
+    ends = np.cumsum(counts)
+    r = 0
+    while r < len(rows):
+        r_end = max(r + 1, int(np.searchsorted(ends, ends[r] - counts[r] + block_size, side='right')))
+        block_counts = counts[r:r_end]
+        froms = np.repeat(rows[r:r_end], block_counts)
+        if len(froms):
+            row_starts = np.repeat(np.cumsum(block_counts) - block_counts, block_counts)
+            yield froms, np.arange(len(froms), dtype=np.int64) - row_starts + froms + 1
+        r = r_end
+
+
+def sampled_clique_pairs(start_from_idx: int, end_from_idx: int, end_idx: int, prob: float, rng: np.random.Generator,
+                         chunk_size: int) -> Iterable[Tuple[np.ndarray, np.ndarray]]:
+    """
+    As clique_pair_blocks(), but every pair is present only with probability prob. The present pairs are chosen by
+    sample_positions() among the positions of all pairs ordered by i and j and then mapped back to (i, j).
+    """
+    rows = np.arange(start_from_idx, min(end_from_idx, end_idx), dtype=np.int64)
+    counts = end_idx - 1 - rows
+    ends = np.cumsum(counts)
+    if not len(rows):
+        return
+    for positions in sample_positions(int(ends[-1]), prob, rng, chunk_size):
+        r = np.searchsorted(ends, positions, side='right')
+        froms = rows[r]
+        yield froms, froms + 1 + positions - (ends[r] - counts[r])
+
+
+def make_edge_documents(from_ids: List[str], to_ids: List[str], db_info: DatabaseInfo, graph_info: GraphInfo,
+                        rng: np.random.Generator) -> List[Dict]:
+    """
+    Make the edges from from_ids[k] to to_ids[k]. If the edges have a random property, its values are drawn for all
+    edges at once.
+    """
+    edge_property = graph_info.edge_property
+    if edge_property is None or edge_property.type == 'none':
+        return [{"_from": f, "_to": t} for f, t in zip(from_ids, to_ids)]
+    attr_name = db_info.edge_attribute
+    values = graph_info.numeric_encoder.float_column(rng.uniform(edge_property.min, edge_property.max, len(from_ids)))
+    return [{"_from": f, "_to": t, attr_name: v} for f, t, v in zip(from_ids, to_ids, values)]
+
+
+def in_bulks(edge_lists: Iterable[List[Dict]], bulk_size: int) -> Iterable[List[Dict]]:
+    """
+    Yield the edges (or other documents) of edge_lists in lists of bulk_size edges, the last one may be shorter.
+    """
+    edges = []
+    for new_edges in edge_lists:
+        edges += new_edges
+        num_full = len(edges) - len(edges) % bulk_size
+        for k in range(0, num_full, bulk_size):
+            yield edges[k:k + bulk_size]
+        edges = edges[num_full:]
+    if edges:
+        yield edges
+
+
+def make_edges_generalized_clique_piece(db_info: DatabaseInfo,
+                                        graph_info: GraphInfo,
+                                        bulk_size: int,
+                                        prob_missing: float,
+                                        start_from_idx: int,
+                                        end_from_idx: int,
+                                        end_idx: int,
+                                        rng: Optional[np.random.Generator] = None
+                                        ):
+    """
+    Make the edges (i, j) with start_from_idx <= i < end_from_idx and i < j < end_idx, each of them missing with
+    probability prob_missing, and yield them in lists of bulk_size edges (the last one may be shorter). The pairs are
+    made as index arrays in blocks and the edge property values are drawn for a whole block at once. If edges may be
+    missing, only the present ones are made by skipping the missing ones, see sampled_clique_pairs().
+    make_edges_generalized_clique() makes the same edges pair by pair. The random values are drawn from rng, by
+    default, from a new generator with a random seed.
+    """
+    rng = rng or np.random.default_rng()
+    block_size = max(bulk_size, MIN_BLOCK_SIZE)
+    if prob_missing > 0:
+        pairs = sampled_clique_pairs(start_from_idx, end_from_idx, end_idx, 1.0 - prob_missing, rng, block_size)
+    else:
+        pairs = clique_pair_blocks(start_from_idx, end_from_idx, end_idx, block_size)
+    yield from in_bulks((make_edge_documents(vertex_id_list(db_info, froms), vertex_id_list(db_info, tos), db_info,
+                                             graph_info, rng) for froms, tos in pairs), bulk_size)
 
 
 def get_edge_property(a) -> Union[None, VertexOrEdgeProperty]:
@@ -98,24 +229,36 @@ def get_edge_property(a) -> Union[None, VertexOrEdgeProperty]:
 
 def make_edges_connect_parts(clique_helper: CliquesHelper, bulk_size_: int, prob_missing_all: float,
                              prob_missing_one: float, db_info: DatabaseInfo, graph_info: GraphInfo, start_from_idx: int,
-                             end_from_idx: int, be_verbose: bool = True) -> Iterable:
+                             end_from_idx: int, be_verbose: bool = True,
+                             rng: Optional[np.random.Generator] = None) -> Iterable:
     """
     Given a list parts of disjoint vertex sets (disjointness is not verified), connect every vertex of every part
-    with every vertex of every other part.
-    :param end_from_idx:
-    :param start_from_idx:
+    with every vertex of every other part. All edges between two parts are missing with probability
+    prob_missing_all, every single edge between two parts that are connected with probability prob_missing_one.
+    Only the edges from the parts with indexes in [start_from_idx, end_from_idx) to the parts with higher indexes are
+    made. For every such part c1, the connected parts c2 are chosen by skipping the missing ones and then the edges
+    from c1 to all of them by skipping the missing edges, see sample_positions(). So the work is proportional to the
+    number of connected parts and made edges, also if almost all of them are missing. The random values are drawn
+    from rng, by default, from a new generator with a random seed.
+    :param clique_helper:
+    :param bulk_size_:
     :param prob_missing_all:
     :param prob_missing_one:
-    :param graph_info:
     :param db_info:
+    :param graph_info:
+    :param start_from_idx:
+    :param end_from_idx:
     :param be_verbose:
-    :rtype: None
-    :param clique_helper:
-    :param bulk_size_:
+    :param rng:
+    :return: the edges in lists of bulk_size_ edges
     """
-    edges_ = []
-    to_vrtx = ConverterToVertex(db_info.vertices_coll_name).idx_to_smart_vertex if db_info.isSmart else \
-        ConverterToVertex(db_info.vertices_coll_name).idx_to_vertex
+    rng = rng or np.random.default_rng()
+    chunk_size = max(bulk_size_, MIN_BLOCK_SIZE)
+    num_parts = clique_helper.num_cliques()
+    starts = np.array(clique_helper.starts_of_cliques[:num_parts + 1], dtype=np.int64)
+    sizes = np.diff(starts)
+    # the smart value of a vertex is the first vertex of its part if the smart attribute is 'part', else the vertex
+    by_part = db_info.isSmart and db_info.smart_attribute == 'part'
 
     if be_verbose:
         generator_ = trange(start_from_idx, end_from_idx, desc='Connecting parts to each other', mininterval=1.0,
@@ -123,58 +266,23 @@ def make_edges_connect_parts(clique_helper: CliquesHelper, bulk_size_: int, prob
     else:
         generator_ = range(start_from_idx, end_from_idx)
 
-    # This code may be executed quite often. Code parts is repeated so as not to check the conditions
-    # in every iteration.
-    if db_info.isSmart:
-        if db_info.smart_attribute == 'part':
-            for c1 in generator_:
-                start_1 = clique_helper.starts_of_cliques[c1]
-                end_1 = clique_helper.starts_of_cliques[c1 + 1]
-                smart_value_1 = str(start_1)
-                for c2 in range(c1 + 1, clique_helper.num_cliques()):
-                    if yes_with_prob(prob_missing_all):
-                        continue
-                    start_2 = clique_helper.starts_of_cliques[c2]
-                    end_2 = clique_helper.starts_of_cliques[c2 + 1]
-                    smart_value_2 = str(start_2)
-                    for f in range(start_1, end_1):
-                        for t in range(start_2, end_2):
-                            add_smart_edge(f, t, edges_, prob_missing_one, db_info, graph_info, to_vrtx, smart_value_1,
-                                           smart_value_2)
-                            if len(edges_) >= bulk_size_:
-                                yield edges_
-                                edges_.clear()
-        else:
-            for c1 in generator_:
-                start_1 = clique_helper.starts_of_cliques[c1]
-                end_1 = clique_helper.starts_of_cliques[c1 + 1]
-                for c2 in range(c1 + 1, clique_helper.num_cliques()):
-                    if yes_with_prob(prob_missing_all):
-                        continue
-                    start_2 = clique_helper.starts_of_cliques[c2]
-                    end_2 = clique_helper.starts_of_cliques[c2 + 1]
-                    for f in range(start_1, end_1):
-                        smart_value_f = str(f)
-                        for t in range(start_2, end_2):
-                            add_smart_edge(f, t, edges_, prob_missing_one, db_info, graph_info, to_vrtx,
-                                           smart_val_i=smart_value_f, smart_val_j=str(t))
-                            if len(edges_) >= bulk_size_:
-                                yield edges_
-                                edges_.clear()
-    else:
-        for c1 in generator_:
-            start_1 = clique_helper.starts_of_cliques[c1]
-            end_1 = clique_helper.starts_of_cliques[c1 + 1]
-            for c2 in range(c1 + 1, clique_helper.num_cliques()):
-                if yes_with_prob(prob_missing_all):
-                    continue
-                start_2 = clique_helper.starts_of_cliques[c2]
-                end_2 = clique_helper.starts_of_cliques[c2 + 1]
-                for f in range(start_1, end_1):
-                    for t in range(start_2, end_2):
-                        add_edge(f, t, edges_, prob_missing_one, db_info, graph_info, to_vrtx)
-                        if len(edges_) >= bulk_size_:
-                            yield edges_
-                            edges_.clear()
-    if edges_:
-        yield edges_
+    def edges_from_part(c1: int) -> Iterable[List[Dict]]:
+        parts = c1 + 1 + np.concatenate([np.zeros(0, dtype=np.int64)] + list(
+            sample_positions(num_parts - c1 - 1, 1.0 - prob_missing_all, rng, chunk_size)))
+        if not len(parts):
+            return
+        part_ends = np.cumsum(sizes[parts])
+        width = int(part_ends[-1])  # the number of vertices in the connected parts
+        for positions in sample_positions(int(sizes[c1]) * width, 1.0 - prob_missing_one, rng, chunk_size):
+            froms = starts[c1] + positions // width
+            columns = positions % width
+            k = np.searchsorted(part_ends, columns, side='right')
+            tos = starts[parts[k]] + columns - (part_ends[k] - sizes[parts[k]])
+            if by_part:
+                from_ids = vertex_id_list(db_info, froms, np.full(len(froms), starts[c1]))
+                to_ids = vertex_id_list(db_info, tos, starts[parts[k]])
+            else:
+                from_ids, to_ids = vertex_id_list(db_info, froms), vertex_id_list(db_info, tos)
+            yield make_edge_documents(from_ids, to_ids, db_info, graph_info, rng)
+
+    yield from in_bulks((edges for c1 in generator_ for edges in edges_from_part(c1)), bulk_size_)
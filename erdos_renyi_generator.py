@@ -0,0 +1,182 @@
+import math
+from typing import List, Optional, Tuple, Iterable, Callable
+
+import numpy as np
+
+from edges_generator import MIN_BLOCK_SIZE, in_bulks, make_edge_documents, vertex_id_list, sample_positions
+from generator_pool import Task, create_generated_graph, make_range_tasks, make_range_vertices, ER_VERTICES_TASK, \
+    ER_EDGES_TASK
+from helper_classes import DatabaseInfo, GraphInfo, ErdosRenyiGraphInfo
+
+# numpy draws hypergeometric numbers only if both kinds of items are fewer than this
+MAX_HYPERGEOMETRIC_POPULATION = 10 ** 9
+
+
+def split_count(count: int, sizes: List[int], rng: np.random.Generator) -> List[int]:
+    """
+    Split count items chosen uniformly without repetition among sum(sizes) items into the numbers of items chosen in
+    each of the consecutive ranges of the given sizes, i.e., draw from the multivariate hypergeometric distribution,
+    one range after the other. For populations too large for numpy, the binomial distribution is used instead, which
+    is indistinguishable unless count is close to the population, and bounded so that the numbers stay feasible.
+    """
+    rest = sum(sizes)
+    counts = []
+    for size in sizes:
+        rest -= size
+        if count == 0 or rest == 0:
+            k = min(count, size)
+        elif size < MAX_HYPERGEOMETRIC_POPULATION and rest < MAX_HYPERGEOMETRIC_POPULATION:
+            k = int(rng.hypergeometric(size, rest, count))
+        else:
+            k = min(size, max(count - rest, int(rng.binomial(count, size / (size + rest)))))
+        counts.append(k)
+        count -= k
+    return counts
+
+
+class ErdosRenyiGenerator:
+    """
+    Make the documents of an Erdős–Rényi graph described in er_info with generator_pool.run_generator_tasks(): the
+    vertices 0, ..., n - 1 and the edges, split into tasks by ranges of their from vertices. The possible edges (i, j)
+    without self-loops, with i < j if the graph is undirected, are numbered by i and then by j. For G(n, p), the edges
+    are chosen among them by skipping geometrically distributed gaps as in the algorithm of Batagelj and Brandes,
+    for G(n, m), the numbers of edges of the tasks are drawn from seed (if not None) when the tasks are made and every
+    task draws the numbers of its edges without repetition in blocks. So the time is proportional to the
+    number of vertices and edges.
+    """
+
+    def __init__(self, er_info: ErdosRenyiGraphInfo, seed: Optional[int] = None):
+        self.er_info = er_info
+        self.seed = seed
+
+    def num_vertices(self) -> int:
+        return self.er_info.num_vertices
+
+    def pairs_before(self, row: int) -> int:
+        """
+        Return the number of possible edges from the vertices 0, ..., row - 1.
+        """
+        n = self.er_info.num_vertices
+        if self.er_info.directed:
+            return row * (n - 1)
+        return row * (2 * n - 1 - row) // 2
+
+    def first_row_with(self, num_pairs: int) -> int:
+        """
+        Return the smallest row with pairs_before(row) >= num_pairs.
+        """
+        n = self.er_info.num_vertices
+        if self.er_info.directed:
+            return n if n <= 1 else min(n, -(-num_pairs // (n - 1)))
+        b = 2 * n - 1
+        row = max(0, min(n, int((b - math.sqrt(max(0.0, b * b - 8.0 * num_pairs))) / 2)))
+        while row > 0 and self.pairs_before(row - 1) >= num_pairs:
+            row -= 1
+        while row < n and self.pairs_before(row) < num_pairs:
+            row += 1
+        return row
+
+    def make_tasks(self, num_tasks: int) -> List[Tuple[float, Task]]:
+        """
+        Split the vertices and the edges into tasks of at most about 1 / num_tasks of all documents and return them
+        with their costs, the expected numbers of documents, the most expensive ones first. The edges are split into
+        ranges of rows with about the same number of possible edges.
+        """
+        er_info = self.er_info
+        n = er_info.num_vertices
+        num_pairs = self.pairs_before(n)
+        num_edges = er_info.num_edges if er_info.num_edges is not None else er_info.prob_edge * num_pairs
+        tasks = make_range_tasks([(ER_VERTICES_TASK, n)], num_tasks, n + num_edges)
+        if num_edges <= 0:
+            return tasks
+
+        target_cost = max(1.0, (n + num_edges) / num_tasks)
+        num_pieces = max(1, math.ceil(num_edges / target_cost))
+        rows = sorted({self.first_row_with(num_pairs * k // num_pieces) for k in range(num_pieces + 1)})
+        ranges = [(lo, hi) for lo, hi in zip(rows, rows[1:]) if self.pairs_before(hi) > self.pairs_before(lo)]
+        sizes = [self.pairs_before(hi) - self.pairs_before(lo) for lo, hi in ranges]
+        if er_info.num_edges is not None:
+            counts = split_count(er_info.num_edges, sizes, np.random.default_rng(self.seed))
+            tasks += [(count, (ER_EDGES_TASK, lo, hi, count)) for (lo, hi), count in zip(ranges, counts) if count]
+        else:
+            tasks += [(er_info.prob_edge * size, (ER_EDGES_TASK, lo, hi, 0)) for (lo, hi), size in zip(ranges, sizes)]
+        tasks.sort(key=lambda t: t[0], reverse=True)
+        return tasks
+
+    def pairs_of_positions(self, first: int, end: int) -> Callable[[np.ndarray], Tuple[np.ndarray, np.ndarray]]:
+        """
+        Return a function mapping the numbers of possible edges from the vertices [first, end), counted from the
+        first one, to their from and to vertices.
+        """
+        n = self.er_info.num_vertices
+        if self.er_info.directed:
+            def directed_pairs(positions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+                froms = first + positions // (n - 1)
+                columns = positions % (n - 1)
+                return froms, columns + (columns >= froms)
+
+            return directed_pairs
+
+        rows = np.arange(first, end, dtype=np.int64)
+        counts = n - 1 - rows
+        ends = np.cumsum(counts)
+
+        def undirected_pairs(positions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+            r = np.searchsorted(ends, positions, side='right')
+            froms = rows[r]
+            return froms, froms + 1 + positions - (ends[r] - counts[r])
+
+        return undirected_pairs
+
+    def make_documents(self, task: Task, db_info: DatabaseInfo, graph_info: GraphInfo, bulk_size: int,
+                       rng: np.random.Generator) -> Iterable[Tuple[bool, List[dict]]]:
+        """
+        Yield the documents of the task in lists of (at most) bulk_size documents, each with True for edges and False
+        for vertices.
+        """
+        kind, first, end, num_edges = task
+        if kind == ER_VERTICES_TASK:
+            yield from make_range_vertices(db_info, graph_info, first, end, bulk_size)
+            return
+
+        block_size = max(bulk_size, MIN_BLOCK_SIZE)
+        num_positions = self.pairs_before(end) - self.pairs_before(first)
+        to_pairs = self.pairs_of_positions(first, end)
+
+        def position_blocks() -> Iterable[np.ndarray]:
+            if self.er_info.num_edges is None:
+                yield from sample_positions(num_positions, self.er_info.prob_edge, rng, block_size)
+                return
+            num_blocks = math.ceil(num_edges / block_size)
+            bounds = [num_positions * k // num_blocks for k in range(num_blocks + 1)]
+            counts = split_count(num_edges, [hi - lo for lo, hi in zip(bounds, bounds[1:])], rng)
+            for lo, hi, count in zip(bounds, bounds[1:], counts):
+                if count:
+                    yield lo + np.sort(rng.choice(hi - lo, count, replace=False, shuffle=False))
+
+        def edge_blocks():
+            for positions in position_blocks():
+                froms, tos = to_pairs(positions)
+                yield make_edge_documents(vertex_id_list(db_info, froms), vertex_id_list(db_info, tos), db_info,
+                                          graph_info, rng)
+
+        for edges in in_bulks(edge_blocks(), bulk_size):
+            yield True, edges
+
+
+def create_erdos_renyi_graph(db_info: DatabaseInfo,
+                             graph_info: GraphInfo,
+                             er_info: ErdosRenyiGraphInfo,
+                             bulk_size: int,
+                             num_processes: Optional[int] = None,
+                             num_insert_threads: int = 0,
+                             shard: Optional[Tuple[int, int]] = None,
+                             be_verbose: bool = True
+                             ) -> None:
+    """
+    Create a G(n, p) or G(n, m) graph as described in er_info. The vertices and the edges are made by num_processes
+    processes (by default, one per core) and sent by num_insert_threads threads, see generator_pool.py. With
+    shard = (i, n), only the slice i of n slices of the graph is made.
+    """
+    create_generated_graph(db_info, graph_info, ErdosRenyiGenerator(er_info, graph_info.seed), bulk_size,
+                           num_processes, num_insert_threads, shard, be_verbose)
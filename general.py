@@ -1,16 +1,63 @@
 import json
 import os
 import random
+import re
+import socket
 import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Optional, List, Tuple, TYPE_CHECKING
+from urllib.parse import urlsplit, unquote
 
 import requests
-from psutil import process_iter, NoSuchProcess, AccessDenied, ZombieProcess
-from requests import Response
 
-from helper_classes import DatabaseInfo
+from helper_classes import DatabaseInfo, ImportInfo, EdgePreprocessingInfo, SamplingInfo, PartitioningInfo
+
+if TYPE_CHECKING:  # numpy is only imported when statistics are collected
+    from graph_statistics import GraphStatistics
+
+
+def get_import_info(args) -> ImportInfo:
+    from attribute_encoding import get_numeric_encoder
+    from graph_statistics import get_statistics
+
+    if args.concurrent_phases and args.num_insert_threads < 2:
+        raise RuntimeError('With --concurrent_phases, --num_insert_threads must be at least 2.')
+    if not 0.0 < args.edge_share < 1.0:
+        raise RuntimeError('--edge_share must be strictly between 0 and 1.')
+    if args.sort_run_size < 1:
+        raise RuntimeError('--sort_run_size must be positive.')
+    if args.sample and not 0.0 < args.sample_fraction <= 1.0:
+        raise RuntimeError('--sample_fraction must be in (0, 1].')
+    if args.sample == 'snowball' and not args.sample_seeds:
+        raise RuntimeError('--sample snowball needs --sample_seeds.')
+    edge_preprocessing = EdgePreprocessingInfo(args.sort_edges, args.deduplicate_edges, args.undirected,
+                                               args.drop_self_loops, args.sort_run_size, args.sort_tmp_dir)
+    sampling = SamplingInfo(args.sample, args.sample_fraction, args.sample_seeds, args.sample_hops,
+                            args.sample_max_vertices, args.sample_random_seed)
+    if args.smart_partitioner and (args.num_partitions or args.num_shards) < 1:
+        raise RuntimeError('--num_partitions must be positive.')
+    if args.smart_partitioner and args.partition_passes < 1:
+        raise RuntimeError('--partition_passes must be positive.')
+    if args.partition_imbalance < 0:
+        raise RuntimeError('--partition_imbalance must not be negative.')
+    partitioning = PartitioningInfo(args.smart_partitioner, args.num_partitions or args.num_shards,
+                                    args.partition_imbalance, args.partition_passes)
+    if args.cache and edge_preprocessing.enabled():
+        raise RuntimeError('--cache cannot be combined with sorting or deduplicating the edges.')
+    incremental = getattr(args, 'incremental', False)  # only the importer has these options
+    if incremental and edge_preprocessing.enabled():
+        raise RuntimeError('--incremental cannot be combined with sorting or deduplicating the edges.')
+    if incremental and args.sample == 'snowball':
+        raise RuntimeError('--incremental cannot be combined with --sample snowball.')
+    return ImportInfo(args.concurrent_phases, args.num_insert_threads, args.edge_share, args.edges_ahead,
+                      get_numeric_encoder(args), edge_preprocessing, sampling, incremental, args.metadata_collection,
+                      get_statistics(args), partitioning, args.cache, args.cache_dir)
 
 
 def graph_exists(db_info: DatabaseInfo) -> bool:
+    if db_info.dump_writer:
+        return db_info.dump_writer.exists()
     url = os.path.join(db_info.endpoint, f'_api/gharial/{db_info.graph_name}')
     try:
         response = requests.get(url, auth=(db_info.username, db_info.password))
@@ -25,6 +72,56 @@ def collection_exists(db_info: DatabaseInfo, collection_name: str) -> bool:
     return response.status_code != 404
 
 
+def create_collection(db_info: DatabaseInfo, collection_name: str):
+    url = os.path.join(db_info.endpoint, '_api/collection')
+    response = requests.post(url, json={'name': collection_name}, auth=(db_info.username, db_info.password))
+    if response.status_code not in [200, 409]:  # 409: created by someone else in the meantime
+        raise RuntimeError(f'create_collection error: Error Code: {response.status_code}. Message: {response.text}')
+
+
+def truncate_collection(db_info: DatabaseInfo, collection_name: str):
+    url = os.path.join(db_info.endpoint, f'_api/collection/{collection_name}/truncate')
+    response = requests.put(url, auth=(db_info.username, db_info.password))
+    if response.status_code != 200:
+        raise RuntimeError(f'truncate_collection error: Error Code: {response.status_code}. Message: {response.text}')
+
+
+def replace_document(db_info: DatabaseInfo, collection_name: str, document: dict):
+    """
+    Insert the document into the collection, replacing a document with the same _key.
+    """
+    url = os.path.join(db_info.endpoint, '_api/document', collection_name) + '?overwriteMode=replace'
+    response = requests.post(url, json=document, auth=(db_info.username, db_info.password))
+    if response.status_code not in [201, 202]:
+        raise RuntimeError(f'replace_document error: Error Code: {response.status_code}. Message: {response.text}')
+
+
+def write_statistics(statistics: Optional['GraphStatistics'], args, db_info: DatabaseInfo, be_verbose: bool):
+    """
+    Write the statistics (if they were collected) as JSON into the file args.statistics_file (if given) and, if
+    args.statistics_to_db is True, as the document with key <graph name>_statistics into args.metadata_collection.
+    :param statistics:
+    :param args: the parsed arguments
+    :param db_info:
+    :param be_verbose: if True, print a summary of the statistics
+    :return: None
+    """
+    if statistics is None:
+        return
+    document = statistics.to_dict()
+    document['graph'] = db_info.graph_name
+    if args.statistics_file:
+        with open(args.statistics_file, 'w') as f:
+            json.dump(document, f, indent=2)
+    if args.statistics_to_db:
+        if not collection_exists(db_info, args.metadata_collection):
+            create_collection(db_info, args.metadata_collection)
+        document['_key'] = f'{db_info.graph_name}_statistics'
+        replace_document(db_info, args.metadata_collection, document)
+    if be_verbose:
+        print(statistics.summary_string())
+
+
 def get_all_graphs(db_info: DatabaseInfo):
     url = os.path.join(db_info.endpoint, '_api/gharial')
     response = requests.get(url, auth=(db_info.username, db_info.password))
@@ -55,30 +152,49 @@ def create_graph(db_info: DatabaseInfo):
     :param db_info:
     :return: None
     """
+    create_graph_with_collections(db_info, [db_info.vertices_coll_name], [{
+        "collection": db_info.edge_coll_name,
+        "from": [db_info.vertices_coll_name],
+        "to": [db_info.vertices_coll_name]
+    }])
+
+
+def create_graph_with_collections(db_info: DatabaseInfo, vertex_collections: List[str], edge_definitions: List[dict]):
+    """
+    Create a new (smart, if db_info.isSmart) graph db_info.graph_name with the given vertex collections and edge
+    definitions. If the graph and/or the collections exist, they are dropped first.
+    :param db_info:
+    :param vertex_collections: the names of the vertex collections, all of them become orphan collections of the graph
+           so that also collections without edges are created
+    :param edge_definitions: the edge definitions as expected by the graph API, i.e., dictionaries with the keys
+           'collection', 'from' and 'to'
+    :return: None
+    """
+    if db_info.dump_writer:
+        db_info.dump_writer.write_structure(db_info.graph_name, vertex_collections, edge_definitions, db_info.isSmart,
+                                            db_info.smart_attribute, db_info.number_of_shards,
+                                            db_info.replication_factor)
+        return
     # drop the graph (if it exists)
     url = os.path.join(db_info.endpoint, '_api/gharial', db_info.graph_name)
     url = url + '?dropCollections=true'
     requests.delete(url, auth=(db_info.username, db_info.password))
     # drop edges
-    url = os.path.join(db_info.endpoint, '_api/collection', db_info.edge_coll_name)
-    requests.delete(url, auth=(db_info.username, db_info.password))
+    for edge_definition in edge_definitions:
+        url = os.path.join(db_info.endpoint, '_api/collection', edge_definition['collection'])
+        requests.delete(url, auth=(db_info.username, db_info.password))
     # drop vertices
-    url = os.path.join(db_info.endpoint, '_api/collection', db_info.vertices_coll_name)
-    requests.delete(url, auth=(db_info.username, db_info.password))
+    for collection_name in vertex_collections:
+        url = os.path.join(db_info.endpoint, '_api/collection', collection_name)
+        requests.delete(url, auth=(db_info.username, db_info.password))
 
     # create graph
     url = os.path.join(db_info.endpoint, '_api/gharial')
     if db_info.isSmart:
         response = requests.post(url, auth=(db_info.username, db_info.password), json={
             "name": db_info.graph_name,
-            "edgeDefinitions": [
-                {
-                    "collection": db_info.edge_coll_name,
-                    "from": [db_info.vertices_coll_name],
-                    "to": [db_info.vertices_coll_name]
-                }
-            ],
-            "orphanCollections": [db_info.vertices_coll_name],
+            "edgeDefinitions": edge_definitions,
+            "orphanCollections": vertex_collections,
             "isSmart": "true",
             "options": {
                 "replicationFactor": db_info.replication_factor,
@@ -89,14 +205,8 @@ def create_graph(db_info: DatabaseInfo):
     else:
         response = requests.post(url, auth=(db_info.username, db_info.password), json={
             "name": db_info.graph_name,
-            "edgeDefinitions": [
-                {
-                    "collection": db_info.edge_coll_name,
-                    "from": [db_info.vertices_coll_name],
-                    "to": [db_info.vertices_coll_name]
-                }
-            ],
-            "orphanCollections": [db_info.vertices_coll_name],
+            "edgeDefinitions": edge_definitions,
+            "orphanCollections": vertex_collections,
             "options": {
                 "replicationFactor": db_info.replication_factor,
                 "numberOfShards": db_info.number_of_shards
@@ -110,7 +220,7 @@ def create_graph(db_info: DatabaseInfo):
 
 class ResponseWrapper:
     def __init__(self):
-        self.response = Response()
+        self.response = requests.Response()
 
 
 def _call_request_post(response_wrapper: ResponseWrapper, url: str, documents: dict, username: str, password: str):
@@ -127,6 +237,9 @@ def insert_documents(db_info: DatabaseInfo, documents, collection_name: str):
     :param collection_name:
     :return: None
     """
+    if db_info.dump_writer:
+        db_info.dump_writer.write_documents(documents, collection_name)
+        return
     url = os.path.join(db_info.endpoint, "_api/document/", collection_name)
     response_wrapper = ResponseWrapper()
     thr = threading.Thread(target=_call_request_post,
@@ -136,6 +249,88 @@ def insert_documents(db_info: DatabaseInfo, documents, collection_name: str):
     # response = requests.post(url, json=documents, auth=(db_info.username, db_info.password))
 
 
+def insert_encoded_documents(db_info: DatabaseInfo, data: bytes, collection_name: str):
+    """
+    As insert_documents(), but the documents are given as a JSON array encoded in UTF-8, e.g., by another process.
+    """
+    url = os.path.join(db_info.endpoint, "_api/document/", collection_name)
+    response = requests.post(url, data=data, headers={'Content-Type': 'application/json'},
+                             auth=(db_info.username, db_info.password))
+    if response.status_code != 202:
+        raise RuntimeError(f"Invalid response from bulk insert: {response.text}")
+
+
+class BoundedExecutor:
+    """
+    Run calls in a pool of threads, at most num_slots of them are waiting or running at the same time and submit()
+    blocks until one of them is done. The limit can be raised up to max_threads with add_slots(). The first error of
+    a call is raised by the next call of submit() or join().
+    """
+
+    def __init__(self, num_slots: int, max_threads: Optional[int] = None):
+        self.executor = ThreadPoolExecutor(max_workers=max(num_slots, max_threads or 0))
+        self.slots = threading.Semaphore(num_slots)
+        self.error: Optional[Exception] = None
+
+    def _run(self, function, args):
+        try:
+            function(*args)
+        except Exception as e:
+            self.error = self.error or e
+        finally:
+            self.slots.release()
+
+    def raise_if_failed(self):
+        if self.error:
+            raise self.error
+
+    def submit(self, function, *args):
+        self.slots.acquire()
+        if self.error:  # give the slot back, otherwise every failed call loses one
+            self.slots.release()
+            self.raise_if_failed()
+        self.executor.submit(self._run, function, args)
+
+    def add_slots(self, num_slots: int):
+        for _ in range(num_slots):
+            self.slots.release()
+
+    def join(self):
+        self.executor.shutdown(wait=True)
+        self.raise_if_failed()
+
+
+class InsertPool:
+    """
+    Insert bulks of documents from several threads. At most num_threads insert requests are in flight at the same
+    time, submit() blocks until one of them is free. The limit can be raised up to max_threads with add_threads(),
+    e.g., to give the capacity of a finished import phase to another one. The first error of an insert is raised by
+    the next call of submit() or join().
+    """
+
+    def __init__(self, db_info: DatabaseInfo, num_threads: int, max_threads: Optional[int] = None):
+        self.db_info = db_info
+        self.inserts = BoundedExecutor(num_threads, max_threads)
+
+    def _insert(self, documents, collection_name: str):
+        if self.db_info.dump_writer:
+            self.db_info.dump_writer.write_documents(documents, collection_name)
+            return
+        url = os.path.join(self.db_info.endpoint, "_api/document/", collection_name)
+        _call_request_post(ResponseWrapper(), url, documents, self.db_info.username, self.db_info.password)
+
+    def submit(self, documents, collection_name: str):
+        if not documents:
+            return
+        self.inserts.submit(self._insert, documents, collection_name)
+
+    def add_threads(self, num_threads: int):
+        self.inserts.add_slots(num_threads)
+
+    def join(self):
+        self.inserts.join()
+
+
 def file_reader(filename, bulk_size):
     """
     Yield bulk_size characters from the file with filename filename or the whole content of the file if it has less
@@ -159,18 +354,62 @@ def yes_with_prob(prob: float):
     return random.randint(1, 1000) < prob * 1000
 
 
-def arangodIsRunning():
+@lru_cache(maxsize=None)
+def arangodIsReachable(endpoint: str, timeout: float = 2.0) -> bool:
     """
-    Check if arangod is running.
+    Check if a server answers at the endpoint by requesting its version. Any answer counts, also an authentication
+    error. The result is cached, so the endpoint is probed at most once per process.
+    :param endpoint:
+    :param timeout: the time in seconds to wait for the connection and for the answer
     """
-    for proc in process_iter():
-        try:
-            # Check if process name contains the given name string.
-            if 'arangod' in proc.name():
-                return True
-        except (NoSuchProcess, AccessDenied, ZombieProcess):
-            pass
-    return False
+    try:
+        requests.get(os.path.join(endpoint, '_api/version'), timeout=timeout)
+    except requests.exceptions.RequestException:
+        return False
+    return True
+
+
+def database_address(endpoint: str) -> Tuple[str, int, str]:
+    """
+    Return (host address, port, database name) of the database an endpoint refers to, e.g., ('127.0.0.1', 8529,
+    '_system') for http://localhost:8529/, so that endpoints written differently can be compared. The host name is
+    resolved if possible. The path must be empty (the database _system) or /_db/<database name>.
+    """
+    parts = urlsplit(endpoint if '://' in endpoint else 'http://' + endpoint)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or 'localhost').lower()
+    try:
+        host = socket.gethostbyname(host)
+    except OSError:
+        pass
+    port = parts.port or (443 if scheme in ['https', 'ssl'] else 80)
+    path = parts.path.rstrip('/')
+    match = re.fullmatch(r'/_db/([^/]+)', path)
+    if match:
+        return host, port, unquote(match.group(1))
+    if path:
+        raise RuntimeError(f'The endpoint {endpoint} does not name a database, its path must be /_db/<database name> '
+                           f'or empty.')
+    return host, port, '_system'
+
+
+def split_balanced(weights: List[float], num_pieces: int) -> List[Tuple[int, int]]:
+    """
+    Split range(len(weights)) into at most num_pieces consecutive, non-empty ranges [lo, hi) with about the same sum
+    of weights.
+    """
+    total = sum(weights)
+    ranges = []
+    lo = 0
+    accumulated = 0
+    for i, w in enumerate(weights):
+        accumulated += w
+        if accumulated * num_pieces >= total * (len(ranges) + 1) and len(ranges) < num_pieces - 1:
+            ranges.append((lo, i + 1))
+            lo = i + 1
+    if lo < len(weights):
+        ranges.append((lo, len(weights)))
+    return ranges
 
 
 def get_time_difference_string(t_diff: float) -> str:
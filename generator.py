@@ -1,16 +1,16 @@
 #!/usr/bin/env python3
 
 import argparse
+import re
 import time
 
 from arguments import make_database_parameters, make_general_graph_parameters_generator, make_cliques_graph_parameters
-from arguments import make_k_partite_parameters, make_global_parameters, make_attribute_parameters
-from clique_generator import create_one_clique_graph, create_cliques_graph
-from edges_generator import get_edge_property
-from general import arangodIsRunning, get_time_difference_string
-from helper_classes import DatabaseInfo, GraphInfo, CliquesGraphInfo
-from k_partite_generator import create_k_partite_graph
-from vertices_generator import get_vertex_property
+from arguments import make_k_partite_parameters, make_global_parameters, make_attribute_parameters, \
+    make_numeric_encoding_parameters, make_metadata_parameters, make_statistics_parameters, make_dump_parameters, \
+    make_server_side_parameters, make_generator_process_parameters, make_rmat_parameters, make_erdos_renyi_parameters, \
+    make_barabasi_albert_parameters
+from helper_classes import DatabaseInfo, GraphInfo, CliquesGraphInfo, RmatGraphInfo, ErdosRenyiGraphInfo, \
+    BarabasiAlbertGraphInfo
 
 
 def get_arguments():
@@ -20,8 +20,17 @@ def get_arguments():
     make_general_graph_parameters_generator(parser)
     make_cliques_graph_parameters(parser)
     make_k_partite_parameters(parser)
+    make_rmat_parameters(parser)
+    make_erdos_renyi_parameters(parser)
+    make_barabasi_albert_parameters(parser)
     make_database_parameters(parser)
     make_attribute_parameters(parser)
+    make_numeric_encoding_parameters(parser)
+    make_metadata_parameters(parser)
+    make_statistics_parameters(parser)
+    make_dump_parameters(parser)
+    make_server_side_parameters(parser)
+    make_generator_process_parameters(parser)
 
     arguments = parser.parse_args()
 
@@ -35,16 +44,81 @@ def get_arguments():
                            'cannot be \'none\'.')
     if arguments.make_smart and not arguments.smart_attribute:
         raise RuntimeError('If --make_smart is given, then also --smart_attribute must be given.')
+    if arguments.dump_dir and arguments.statistics_to_db:
+        raise RuntimeError('--dump_dir cannot be combined with --statistics_to_db.')
+    if arguments.server_side and (arguments.dump_dir or arguments.statistics_file or arguments.statistics_to_db):
+        raise RuntimeError('--server_side cannot be combined with --dump_dir and statistics.')
+    if arguments.server_side and arguments.server_jobs < 1:
+        raise RuntimeError('--server_jobs must be positive.')
+    if arguments.num_processes is not None and arguments.num_processes < 1:
+        raise RuntimeError('--num_processes must be positive.')
+    if arguments.num_insert_threads < 0:
+        raise RuntimeError('--num_insert_threads cannot be negative.')
+    if arguments.graphtype == 'rmat':
+        if arguments.server_side:
+            raise RuntimeError('R-MAT graphs cannot be generated with --server_side.')
+        if not 0 <= arguments.scale <= 62:
+            raise RuntimeError('--scale must be between 0 and 62.')
+        if arguments.edge_factor < 0:
+            raise RuntimeError('--edge_factor cannot be negative.')
+        if min(arguments.rmat_probabilities) < 0 or abs(sum(arguments.rmat_probabilities) - 1.0) > 1e-6:
+            raise RuntimeError('--rmat_probabilities must be four non-negative numbers with sum 1.')
+        if arguments.make_smart and arguments.smart_attribute == 'part':
+            raise RuntimeError('R-MAT graphs have no parts, --smart_attribute cannot be \'part\'.')
+    if arguments.graphtype in ('gnp', 'gnm'):
+        if arguments.server_side:
+            raise RuntimeError('G(n, p) and G(n, m) graphs cannot be generated with --server_side.')
+        if arguments.num_vertices is None or arguments.num_vertices < 0:
+            raise RuntimeError('--num_vertices cannot be negative.')
+        if arguments.make_smart and arguments.smart_attribute == 'part':
+            raise RuntimeError('G(n, p) and G(n, m) graphs have no parts, --smart_attribute cannot be \'part\'.')
+        num_pairs = arguments.num_vertices * (arguments.num_vertices - 1) // (1 if arguments.directed else 2)
+        if num_pairs >= 1 << 62:
+            raise RuntimeError('--num_vertices is too large for G(n, p) and G(n, m) graphs.')
+    if arguments.graphtype == 'gnp' and (arguments.prob_edge is None or not 0.0 <= arguments.prob_edge <= 1.0):
+        raise RuntimeError('A G(n, p) graph needs --prob_edge between 0 and 1.')
+    if arguments.graphtype == 'gnm' and (arguments.num_edges is None or not 0 <= arguments.num_edges <= num_pairs):
+        raise RuntimeError('A G(n, m) graph needs --num_edges between 0 and the number of possible edges.')
+    if arguments.graphtype == 'barabasi-albert':
+        if arguments.server_side:
+            raise RuntimeError('Barabási–Albert graphs cannot be generated with --server_side.')
+        if arguments.num_vertices is None or arguments.num_vertices < 0:
+            raise RuntimeError('--num_vertices cannot be negative.')
+        if arguments.edges_per_vertex < 0:
+            raise RuntimeError('--edges_per_vertex cannot be negative.')
+        if arguments.num_vertices * arguments.edges_per_vertex >= 1 << 62:
+            raise RuntimeError('--num_vertices * --edges_per_vertex is too large for a Barabási–Albert graph.')
+        if arguments.make_smart and arguments.smart_attribute == 'part':
+            raise RuntimeError('Barabási–Albert graphs have no parts, --smart_attribute cannot be \'part\'.')
+    if arguments.seed is not None and arguments.seed < 0:
+        raise RuntimeError('--seed cannot be negative.')
+    if arguments.server_side and (arguments.seed is not None or arguments.shard):
+        raise RuntimeError('--server_side cannot be combined with --seed and --shard.')
+    if arguments.shard:
+        match = re.fullmatch(r'(\d+)/(\d+)', arguments.shard)
+        if not match or int(match.group(1)) >= int(match.group(2)):
+            raise RuntimeError('--shard must be i/n with 0 <= i < n.')
+        if arguments.seed is None:
+            raise RuntimeError('--shard needs --seed, so that all shards make the same graph.')
+        arguments.shard = (int(match.group(1)), int(match.group(2)))
 
     return arguments
 
 
 if __name__ == "__main__":
-    if not arangodIsRunning():
-        raise RuntimeError('The process \'arangod\' is not running, please, run it first.')
-
     args = get_arguments()
 
+    # imported only now and the generators only for their graph type, since they load numpy, tqdm and requests
+    from attribute_encoding import get_numeric_encoder
+    from dump_writer import get_dump_writer
+    from edges_generator import get_edge_property
+    from general import arangodIsReachable, get_time_difference_string, write_statistics
+    from graph_statistics import get_statistics
+    from vertices_generator import get_vertex_property
+
+    if not args.dump_dir and not arangodIsReachable(args.endpoint):
+        raise RuntimeError(f'No server answers at {args.endpoint}, please, start arangod first.')
+
     v_property = get_vertex_property(args)
     edge_property = get_edge_property(args)
 
@@ -55,28 +129,79 @@ if __name__ == "__main__":
                                  args.num_shards, args.overwrite, args.smart_attribute,
                                  args.additional_vertex_attribute,
                                  args.edge_attribute,
-                                 args.user, args.pwd)
+                                 args.user, args.pwd, get_dump_writer(args))
 
-    g_info = GraphInfo(v_property, edge_property)
+    g_info = GraphInfo(v_property, edge_property, get_numeric_encoder(args),
+                       get_statistics(args, args.edge_attribute), args.seed)
 
     start = time.monotonic()
     if args.graphtype == 'cliques-graph':
+        from clique_generator import create_cliques_graph
+        from server_side_generator import create_cliques_graph_server_side
+
         clique_graph_info = CliquesGraphInfo(args.num_cliques, args.min_size_clique, args.max_size_clique,
                                              args.prob_missing_one, args.prob_missing_all,
-                                             args.prob_missing_one_between
+                                             0.5 if args.prob_missing_one_between is None
+                                             else args.prob_missing_one_between
                                              )
-        create_cliques_graph(database_info, g_info, clique_graph_info, args.bulk_size,
-                             be_verbose=not args.silent)
+        if args.server_side:
+            create_cliques_graph_server_side(database_info, g_info, clique_graph_info, args.bulk_size,
+                                             args.server_jobs, be_verbose=not args.silent)
+        else:
+            create_cliques_graph(database_info, g_info, clique_graph_info, args.bulk_size, args.num_processes,
+                                 args.num_insert_threads, args.shard, be_verbose=not args.silent)
     elif args.graphtype == 'clique':
-        create_one_clique_graph(database_info, args.bulk_size, args.num_vertices, g_info,
-                                be_verbose=not args.silent)
+        from clique_generator import create_one_clique_graph
+        from server_side_generator import create_one_clique_graph_server_side
+
+        if args.server_side:
+            create_one_clique_graph_server_side(database_info, args.bulk_size, args.num_vertices, g_info,
+                                                args.server_jobs, be_verbose=not args.silent)
+        else:
+            create_one_clique_graph(database_info, args.bulk_size, args.num_vertices, g_info, args.num_processes,
+                                    args.num_insert_threads, args.shard, be_verbose=not args.silent)
     elif args.graphtype == 'k-partite':
-        parts_graph_info = CliquesGraphInfo(args.num_parts, args.min_size_clique, args.max_size_clique, 0.0, 0.0,
-                                            0.0)
-        create_k_partite_graph(database_info, g_info, parts_graph_info, args.bulk_size,
-                               be_verbose=not args.silent)
+        from k_partite_generator import create_k_partite_graph
+        from server_side_generator import create_k_partite_graph_server_side
+
+        parts_graph_info = CliquesGraphInfo(args.num_parts, args.min_size_part, args.max_size_part, 0.0, 0.0,
+                                            args.prob_missing_one_between or 0.0)
+        if args.server_side:
+            create_k_partite_graph_server_side(database_info, g_info, parts_graph_info, args.bulk_size,
+                                               args.server_jobs, be_verbose=not args.silent)
+        else:
+            create_k_partite_graph(database_info, g_info, parts_graph_info, args.bulk_size, args.num_processes,
+                                   args.num_insert_threads, args.shard, be_verbose=not args.silent)
+    elif args.graphtype == 'rmat':
+        from rmat_generator import create_rmat_graph
+
+        rmat_graph_info = RmatGraphInfo(args.scale, args.edge_factor, args.rmat_probabilities, args.permute_vertices)
+        create_rmat_graph(database_info, g_info, rmat_graph_info, args.bulk_size, args.num_processes,
+                          args.num_insert_threads, args.shard, be_verbose=not args.silent)
+    elif args.graphtype in ('gnp', 'gnm'):
+        from erdos_renyi_generator import create_erdos_renyi_graph
+
+        er_graph_info = ErdosRenyiGraphInfo(args.num_vertices, args.directed, args.prob_edge,
+                                            args.num_edges if args.graphtype == 'gnm' else None)
+        create_erdos_renyi_graph(database_info, g_info, er_graph_info, args.bulk_size, args.num_processes,
+                                 args.num_insert_threads, args.shard, be_verbose=not args.silent)
+    elif args.graphtype == 'barabasi-albert':
+        from barabasi_albert_generator import create_barabasi_albert_graph
+        from graph_statistics import GraphStatistics
+
+        if g_info.statistics is None and not args.silent:
+            # the degree distribution is printed at the end
+            g_info.statistics = GraphStatistics(args.edge_attribute)
+        ba_graph_info = BarabasiAlbertGraphInfo(args.num_vertices, args.edges_per_vertex)
+        create_barabasi_albert_graph(database_info, g_info, ba_graph_info, args.bulk_size, args.num_processes,
+                                     args.num_insert_threads, args.shard, be_verbose=not args.silent)
     else:
         pass
+    if database_info.dump_writer:
+        database_info.dump_writer.finish()
 
+    write_statistics(g_info.statistics, args, database_info, not args.silent)
     if not args.silent:
+        if g_info.numeric_encoder.track_size and not args.server_side:
+            print(g_info.numeric_encoder.size_reduction_string())
         print('Global time: ' + get_time_difference_string(time.monotonic() - start))
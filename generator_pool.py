@@ -0,0 +1,415 @@
+import itertools
+import json
+import math
+import multiprocessing
+import queue
+import random
+import threading
+import time
+from typing import List, Tuple, Optional, Iterable
+
+import numpy as np
+from tqdm import tqdm
+
+from edges_generator import in_bulks, make_edges_connect_parts, make_edges_generalized_clique_piece
+from general import insert_documents, insert_encoded_documents, split_balanced, get_time_difference_string, \
+    create_graph, graph_exists
+from helper_classes import DatabaseInfo, GraphInfo, CliquesGraphInfo, CliquesHelper
+from shared_ring import SharedRing
+from vertices_generator import make_vertices
+
+VERTICES_TASK = 'vertices'  # the vertices of the parts [first, end)
+CLIQUE_TASK = 'clique'  # the clique edges (i, j) with first <= i < end and i < j < end_idx
+CLIQUES_TASK = 'cliques'  # all edges of the cliques [first, end)
+CONNECT_TASK = 'connect'  # the edges from the parts [first, end) to all later parts
+RMAT_VERTICES_TASK = 'rmat vertices'  # the vertices [first, end) of an R-MAT graph
+RMAT_EDGES_TASK = 'rmat edges'  # the edges of an R-MAT graph with the indexes [first, end)
+ER_VERTICES_TASK = 'er vertices'  # the vertices [first, end) of an Erdős–Rényi graph
+# the edges of an Erdős–Rényi graph from the vertices [first, end), for G(n, m) with their number as the last field
+ER_EDGES_TASK = 'er edges'
+BA_VERTICES_TASK = 'ba vertices'  # the vertices [first, end) of a Barabási–Albert graph
+BA_EDGES_TASK = 'ba edges'  # the edges of a Barabási–Albert graph with the indexes [first, end)
+# the index of its kind seeds the random stream of a task, so new kinds are appended to keep seeded graphs the same
+TASK_KINDS = [VERTICES_TASK, CLIQUE_TASK, CLIQUES_TASK, CONNECT_TASK, RMAT_VERTICES_TASK, RMAT_EDGES_TASK,
+              ER_VERTICES_TASK, ER_EDGES_TASK, BA_VERTICES_TASK, BA_EDGES_TASK]
+
+# the work is split into about this many tasks per worker, so that the workers finish at about the same time
+TASKS_PER_WORKER = 8
+# with a seed, the work is split into about this many tasks whatever the number of workers, so that the same tasks
+# (with the same random streams) are made on every machine
+SEEDED_NUM_TASKS = 1024
+
+# the size of a slot of the ring between the generating processes and the insert threads, larger bulks are split
+SLOT_SIZE = 1 << 21
+
+Task = Tuple[str, int, int, int]  # the kind, first, end and a further number depending on the kind
+
+
+class PartsGenerator:
+    """
+    Make the documents of a graph whose vertices are divided into consecutive parts as in c_helper: the vertices of
+    the parts, with the attribute with their part if add_part, the edges in the parts (if with_cliques) and the edges
+    between the parts as described in c_graph_info. A generator for run_generator_tasks() has the methods
+    num_vertices(), make_tasks() and make_documents().
+    """
+
+    def __init__(self, c_helper: CliquesHelper, c_graph_info: CliquesGraphInfo, with_cliques: bool = True,
+                 add_part: bool = True):
+        self.c_helper = c_helper
+        self.c_graph_info = c_graph_info
+        self.with_cliques = with_cliques
+        self.add_part = add_part
+
+    def num_vertices(self) -> int:
+        return self.c_helper.starts_of_cliques[-1]
+
+    def make_tasks(self, num_tasks: int) -> List[Tuple[float, Task]]:
+        """
+        Split making the documents into tasks and return them with their costs, the expected number of documents, the
+        most expensive ones first. Tasks with more than 1 / num_tasks of the total cost are split into pieces of about
+        this size, so that the workers taking the tasks from a queue in this order finish at about the same time.
+        Consecutive smaller cliques are put together into tasks of about this size, so that their edges are sent in
+        full bulks instead of one request per clique.
+        """
+        c_helper, c_graph_info = self.c_helper, self.c_graph_info
+        starts = c_helper.starts_of_cliques
+        num_parts = c_helper.num_cliques()
+        num_vertices = starts[num_parts]
+        sizes = [c_helper.size_of_clique(c) for c in range(num_parts)]
+        keep_one = 1.0 - (c_graph_info.prob_missing_one or 0.0)
+        keep_all = 1.0 - (c_graph_info.prob_missing_all or 0.0)
+        keep_between = 1.0 - (c_graph_info.prob_missing_one_between or 0.0)
+
+        clique_costs = [s * (s - 1) / 2 * keep_one for s in sizes] if self.with_cliques else []
+        # with skip sampling, the cost of connecting a part is the number of edges and of connected parts
+        connect_costs = [1 + keep_all * (s * (num_vertices - starts[c + 1]) * keep_between + num_parts - c - 1)
+                         for c, s in enumerate(sizes)]
+        total_cost = num_vertices + sum(clique_costs) + sum(connect_costs)
+        target_cost = max(1.0, total_cost / num_tasks)
+
+        def num_pieces(cost: float) -> int:
+            return max(1, math.ceil(cost / target_cost))
+
+        tasks = []
+        for lo, hi in split_balanced(sizes, num_pieces(num_vertices)):
+            tasks.append((sum(sizes[lo:hi]), (VERTICES_TASK, lo, hi, 0)))
+        first_small, small_cost = 0, 0.0  # the current run of small cliques [first_small, c)
+        for c, cost in enumerate(clique_costs):
+            if num_pieces(cost) == 1:
+                small_cost += cost
+                if small_cost >= target_cost:
+                    tasks.append((small_cost, (CLIQUES_TASK, first_small, c + 1, 0)))
+                    first_small, small_cost = c + 1, 0.0
+                continue
+            if small_cost > 0:
+                tasks.append((small_cost, (CLIQUES_TASK, first_small, c, 0)))
+            first_small, small_cost = c + 1, 0.0
+            start, end = starts[c], starts[c + 1]
+            row_costs = [end - 1 - i for i in range(start, end)]
+            for lo, hi in split_balanced(row_costs, num_pieces(cost)):
+                tasks.append((cost * sum(row_costs[lo:hi]) / sum(row_costs),
+                              (CLIQUE_TASK, start + lo, start + hi, end)))
+        if small_cost > 0:
+            tasks.append((small_cost, (CLIQUES_TASK, first_small, len(clique_costs), 0)))
+        for lo, hi in split_balanced(connect_costs, num_pieces(sum(connect_costs))):
+            tasks.append((sum(connect_costs[lo:hi]), (CONNECT_TASK, lo, hi, 0)))
+        tasks.sort(key=lambda t: t[0], reverse=True)
+        return tasks
+
+    def make_documents(self, task: Task, db_info: DatabaseInfo, graph_info: GraphInfo, bulk_size: int,
+                       rng: np.random.Generator) -> Iterable[Tuple[bool, List[dict]]]:
+        """
+        Yield the documents of the task in lists of (at most) bulk_size documents, each with True for edges and False
+        for vertices.
+        """
+        kind, first, end, end_idx = task
+        c_helper, c_graph_info = self.c_helper, self.c_graph_info
+        starts = c_helper.starts_of_cliques
+        prob_missing_one = c_graph_info.prob_missing_one or 0.0
+        if kind == VERTICES_TASK:
+            def parts_vertices():
+                for c in range(first, end):
+                    graph_info.next_id = starts[c]
+                    yield from make_vertices(graph_info, db_info, c_helper.size_of_clique(c), bulk_size,
+                                             self.add_part)
+
+            # the vertices of small parts are sent together
+            for vertices in in_bulks(parts_vertices(), bulk_size):
+                yield False, vertices
+        elif kind == CLIQUE_TASK:
+            for edges in make_edges_generalized_clique_piece(db_info, graph_info, bulk_size, prob_missing_one, first,
+                                                             end, end_idx, rng):
+                yield True, edges
+        elif kind == CLIQUES_TASK:
+            cliques_edges = itertools.chain.from_iterable(
+                make_edges_generalized_clique_piece(db_info, graph_info, bulk_size, prob_missing_one, starts[c],
+                                                    starts[c + 1], starts[c + 1], rng) for c in range(first, end))
+            for edges in in_bulks(cliques_edges, bulk_size):
+                yield True, edges
+        else:
+            for edges in make_edges_connect_parts(c_helper, bulk_size, c_graph_info.prob_missing_all or 0.0,
+                                                  c_graph_info.prob_missing_one_between or 0.0, db_info, graph_info,
+                                                  first, end, be_verbose=False, rng=rng):
+                yield True, edges
+
+
+def make_range_tasks(kinds_and_counts: List[Tuple[str, int]], num_tasks: int,
+                     total_cost: Optional[float] = None) -> List[Tuple[float, Task]]:
+    """
+    Split the documents [0, count) of every kind into tasks (kind, first, end, 0) of at most about 1 / num_tasks of
+    total_cost (by default, the sum of the counts) and return them with their costs, the numbers of documents, the
+    most expensive ones first.
+    """
+    if total_cost is None:
+        total_cost = sum(count for _, count in kinds_and_counts)
+    target_cost = max(1.0, total_cost / num_tasks)
+    tasks = []
+    for kind, count in kinds_and_counts:
+        num_pieces = max(1, math.ceil(count / target_cost))
+        bounds = [count * k // num_pieces for k in range(num_pieces + 1)]
+        tasks += [(hi - lo, (kind, lo, hi, 0)) for lo, hi in zip(bounds, bounds[1:]) if hi > lo]
+    tasks.sort(key=lambda t: t[0], reverse=True)
+    return tasks
+
+
+def make_range_vertices(db_info: DatabaseInfo, graph_info: GraphInfo, first: int, end: int,
+                        bulk_size: int) -> Iterable[Tuple[bool, List[dict]]]:
+    """
+    Yield the vertices first, ..., end - 1 (without a part) as make_documents() of a generator does, in lists of (at
+    most) bulk_size vertices, each with False.
+    """
+    graph_info.next_id = first
+    for vertices in make_vertices(graph_info, db_info, end - first, bulk_size, add_part=False):
+        if vertices:
+            yield False, vertices
+
+
+def shard_tasks(tasks: List[Tuple[float, Task]], shard_index: int, num_shards: int) -> List[Tuple[float, Task]]:
+    """
+    Return the tasks of the slice shard_index of num_shards slices with about the same cost: every task, in the given
+    order (the most expensive first), goes to the slice with the lowest cost so far. The slices of the same tasks are
+    the same on every machine, so shards 0, ..., num_shards - 1 together make every task once.
+    """
+    costs = [0.0] * num_shards
+    selected = []
+    for cost, task in tasks:
+        shard = costs.index(min(costs))
+        costs[shard] += cost
+        if shard == shard_index:
+            selected.append((cost, task))
+    return selected
+
+
+def task_rng(seed: Optional[int], task: Task) -> np.random.Generator:
+    """
+    Return a random generator for the task: without a seed, one with a random seed, otherwise a counter-based one
+    whose stream only depends on the seed and the task, so that the task makes the same documents in every process.
+    """
+    if seed is None:
+        return np.random.default_rng()
+    kind, first, end, end_idx = task
+    return np.random.Generator(np.random.Philox(np.random.SeedSequence([seed, TASK_KINDS.index(kind), first, end,
+                                                                        end_idx])))
+
+
+def _send(ring: SharedRing, documents: List[dict], collection_name: str):
+    data = json.dumps(documents, separators=(',', ':')).encode()
+    if len(data) > ring.slot_size and len(documents) > 1:
+        half = len(documents) // 2
+        _send(ring, documents[:half], collection_name)
+        _send(ring, documents[half:], collection_name)
+    else:
+        ring.put(data, collection_name)
+
+
+def _insert(db_info: DatabaseInfo, graph_info: GraphInfo, documents: List[dict], is_edges: bool,
+            ring: Optional[SharedRing], results: multiprocessing.Queue):
+    collection_name = db_info.edge_coll_name if is_edges else db_info.vertices_coll_name
+    if ring is not None:
+        _send(ring, documents, collection_name)
+    else:
+        insert_documents(db_info, documents, collection_name)
+    if graph_info.statistics:
+        if is_edges:
+            graph_info.statistics.add_edge_documents(documents, db_info.isSmart)
+        else:
+            graph_info.statistics.add_vertex_documents(documents, db_info.isSmart)
+    results.put(('progress', len(documents)))
+
+
+def _run_task(task: Task, generator, db_info: DatabaseInfo, graph_info: GraphInfo, bulk_size: int,
+              ring: Optional[SharedRing], results: multiprocessing.Queue):
+    rng = task_rng(graph_info.seed, task)
+    if graph_info.seed is not None:  # the vertex attribute values are drawn with random
+        kind, first, end, end_idx = task
+        random.seed(f'{graph_info.seed}/{kind}/{first}/{end}/{end_idx}')
+    for is_edges, documents in generator.make_documents(task, db_info, graph_info, bulk_size, rng):
+        _insert(db_info, graph_info, documents, is_edges, ring, results)
+
+
+def _worker(db_info: DatabaseInfo, graph_info: GraphInfo, generator, bulk_size: int, ring: Optional[SharedRing],
+            tasks: multiprocessing.Queue, results: multiprocessing.Queue):
+    """
+    Run the tasks from the queue until it yields None, then send the statistics of this process and the time it was
+    busy and finish. If ring is given, the documents are encoded and put into it instead of being inserted.
+    """
+    random.seed()  # the forked processes would otherwise draw the same vertex attribute values
+    try:
+        start = time.monotonic()
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            _run_task(task, generator, db_info, graph_info, bulk_size, ring, results)
+        graph_info.numeric_encoder.flush()
+        if db_info.dump_writer:
+            db_info.dump_writer.flush()
+        results.put(('finished', (graph_info.statistics, time.monotonic() - start)))
+    except Exception as e:
+        results.put(('failed', f'{type(e).__name__}: {e}'))
+        raise
+
+
+def _insert_from_ring(db_info: DatabaseInfo, ring: SharedRing, errors: List[str]):
+    """
+    Insert the encoded bulks from the ring until it is stopped. After the first error (of any thread), the bulks are
+    still taken from the ring, so that the generating processes do not wait for a free slot forever, but dropped.
+    """
+    while True:
+        item = ring.get()
+        if item is None:
+            return
+        if errors:
+            continue
+        data, collection_name = item
+        try:
+            insert_encoded_documents(db_info, data, collection_name)
+        except Exception as e:
+            errors.append(f'{type(e).__name__}: {e}')
+
+
+def run_generator_tasks(db_info: DatabaseInfo, graph_info: GraphInfo, generator, bulk_size: int,
+                        tasks: List[Tuple[float, Task]], num_workers: Optional[int] = None, num_insert_threads: int = 0,
+                        be_verbose: bool = True):
+    """
+    Start num_workers processes (by default, one per core) once and let them take the tasks of generator (e.g., a
+    PartsGenerator) from a queue in the given order and insert their documents until all are done. The processes send
+    the number of inserted documents for the progress bar and, at the end, their statistics, which are merged into
+    graph_info.statistics, and their times, which are printed if be_verbose. If a process fails, the others finish the
+    remaining tasks and a RuntimeError is raised at the end.
+    If num_insert_threads > 0 (and the graph is not dumped), the processes only generate: they encode the bulks and
+    pass them through a SharedRing to num_insert_threads threads of this process that send them. Otherwise, every
+    process inserts its documents itself.
+    """
+    num_workers = max(1, min(num_workers or multiprocessing.cpu_count(), len(tasks)))
+    if db_info.dump_writer:
+        num_insert_threads = 0
+    ring = SharedRing(num_workers + 2 * num_insert_threads, SLOT_SIZE) if num_insert_threads > 0 else None
+    task_queue = multiprocessing.Queue()
+    results = multiprocessing.Queue()
+    for _, task in tasks:
+        task_queue.put(task)
+    for _ in range(num_workers):
+        task_queue.put(None)
+    workers = [multiprocessing.Process(target=_worker, args=(db_info.copy(), graph_info.copy(), generator, bulk_size,
+                                                             ring, task_queue, results))
+               for _ in range(num_workers)]
+    for w in workers:
+        w.start()
+    errors = []
+    insert_errors = []
+    # the threads are started after the processes, which must not be forked from a process with running threads
+    inserters = [threading.Thread(target=_insert_from_ring, args=(db_info, ring, insert_errors))
+                 for _ in range(num_insert_threads)]
+    for t in inserters:
+        t.start()
+
+    times = []
+    num_running = num_workers
+    description = f'Generating ({num_workers} processes' + \
+                  (f', {num_insert_threads} insert threads)' if num_insert_threads else ')')
+    with tqdm(total=int(sum(cost for cost, _ in tasks)), desc=description,
+              mininterval=1.0, unit='documents', ncols=100, disable=not be_verbose) as pbar:
+        while num_running:
+            try:
+                kind, value = results.get(timeout=1.0)
+            except queue.Empty:
+                if not any(w.is_alive() for w in workers) and results.empty():
+                    errors.append(f'{num_running} process(es) ended without finishing')
+                    break
+                continue
+            if kind == 'progress':
+                pbar.update(value)
+            elif kind == 'finished':
+                statistics, busy_time = value
+                if graph_info.statistics is not None:
+                    graph_info.statistics.merge(statistics)
+                times.append(busy_time)
+                num_running -= 1
+            else:
+                errors.append(value)
+                num_running -= 1
+    for w in workers:
+        w.join()
+    if ring is not None:
+        ring.stop_readers(len(inserters))
+        for t in inserters:
+            t.join()
+        ring.close()
+        errors += insert_errors[:1]
+    graph_info.next_id = generator.num_vertices()
+    if be_verbose and times:
+        print(f'Time of the {len(times)} processes: min {get_time_difference_string(min(times))}, '
+              f'max {get_time_difference_string(max(times))}')
+    if errors:
+        raise RuntimeError(f'Generating the graph failed: {"; ".join(errors)}')
+
+
+def prepare_graph(db_info: DatabaseInfo, shard: Optional[Tuple[int, int]], be_verbose: bool) -> bool:
+    """
+    Create the graph and return True if it is to be generated. If shard = (i, n) is given with i > 0, the graph must
+    have been created by shard 0 on the server and is not overwritten, the shards of a dump are separate directories
+    and each gets the graph definition.
+    """
+    if shard is not None and shard[0] > 0 and not db_info.dump_writer:
+        if not graph_exists(db_info):
+            raise RuntimeError(f'The graph {db_info.graph_name} does not exist. Start shard 0 first, it creates the '
+                               f'graph.')
+        return True
+    if db_info.overwrite or not graph_exists(db_info):
+        create_graph(db_info)
+        return True
+    if be_verbose:
+        print(f'The graph {db_info.graph_name} exists already, skipping. To overwrite, use \'--overwrite\'.')
+    return False
+
+
+def generate_graph(db_info: DatabaseInfo, graph_info: GraphInfo, generator, bulk_size: int,
+                   num_processes: Optional[int] = None, num_insert_threads: int = 0,
+                   shard: Optional[Tuple[int, int]] = None, be_verbose: bool = True):
+    """
+    Make the documents of generator (e.g., a PartsGenerator) with its make_tasks() and run_generator_tasks(). If
+    shard = (i, n) is given, only the tasks of the slice i of n are run. With graph_info.seed, the tasks and their
+    random streams do not depend on num_processes, so every shard and every run with the same parameters makes the
+    same documents.
+    """
+    num_processes = num_processes or multiprocessing.cpu_count()
+    num_tasks = SEEDED_NUM_TASKS if graph_info.seed is not None else TASKS_PER_WORKER * num_processes
+    tasks = generator.make_tasks(num_tasks)
+    if shard is not None:
+        tasks = shard_tasks(tasks, *shard)
+    run_generator_tasks(db_info, graph_info, generator, bulk_size, tasks, num_processes, num_insert_threads,
+                        be_verbose)
+
+
+def create_generated_graph(db_info: DatabaseInfo, graph_info: GraphInfo, generator, bulk_size: int,
+                           num_processes: Optional[int] = None, num_insert_threads: int = 0,
+                           shard: Optional[Tuple[int, int]] = None, be_verbose: bool = True) -> bool:
+    """
+    Create the graph with prepare_graph() and make the documents of generator with generate_graph(). Return False if
+    the graph exists and is not overwritten, so nothing is made.
+    """
+    if not prepare_graph(db_info, shard, be_verbose):
+        return False
+    generate_graph(db_info, graph_info, generator, bulk_size, num_processes, num_insert_threads, shard, be_verbose)
+    return True
@@ -0,0 +1,273 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+from typing import Iterable, Optional, Tuple, List
+
+import numpy as np
+from tqdm import tqdm
+
+from edge_preprocessing import COMMENT_CHARACTERS
+from general import file_reader, get_time_difference_string
+
+CACHE_FORMAT_VERSION = 1
+HASH_CHUNK_SIZE = 1 << 24
+CACHE_SUFFIX = '.csr'
+
+# (from ids, to ids, weights or None)
+CachedEdges = Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]
+
+
+def file_signature(filename: str) -> dict:
+    stat = os.stat(filename)
+    return {'name': os.path.basename(filename), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def file_hash(filename: str) -> str:
+    hasher = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        while True:
+            chunk = f.read(HASH_CHUNK_SIZE)
+            if not chunk:
+                break
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def get_cache_directory(edges_filename: str, cache_dir: Optional[str] = None) -> str:
+    """
+    The directory of the cache of a graph: next to the edge file or in cache_dir, named after the edge file.
+    """
+    directory = cache_dir if cache_dir else os.path.dirname(os.path.abspath(edges_filename))
+    return os.path.join(directory, os.path.basename(edges_filename) + CACHE_SUFFIX)
+
+
+class GraphCache:
+    """
+    A Graphalytics graph in compressed sparse row form, as stored in a cache directory:
+    - ids.npy: the sorted vertex ids (int64), vertices are referred to by their index in this array,
+    - offsets.npy: the out-edges of the vertex with index i are the positions offsets[i]..offsets[i + 1] - 1 (int64),
+    - targets.npy: the indexes of the to vertices of the edges (int32 or int64),
+    - weights.npy: the weights of the edges (float64, NaN if an edge has no weight), only if the graph has weights,
+    - meta.json: the format version, the sizes, modification times and SHA-256 hashes of the files the cache was made
+      from, the numbers of vertices and edges and the number of decimals of the weights in the file (if it is the
+      same for all weights).
+    The arrays are memory mapped, so a cached graph is read without parsing and only the parts in use are in memory.
+    The edges are ordered by their from vertex (and, for the same from vertex, as in the edge file).
+    """
+
+    def __init__(self, directory: str, meta: dict, ids: np.ndarray, offsets: np.ndarray, targets: np.ndarray,
+                 weights: Optional[np.ndarray]):
+        self.directory = directory
+        self.meta = meta
+        self.ids = ids
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+
+    @property
+    def num_vertices(self) -> int:
+        return len(self.ids)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.targets)
+
+    @staticmethod
+    def load(directory: str):
+        with open(os.path.join(directory, 'meta.json'), 'r') as f:
+            meta = json.load(f)
+        arrays = {name: np.load(os.path.join(directory, name + '.npy'), mmap_mode='r')
+                  for name in ['ids', 'offsets', 'targets'] + (['weights'] if meta['has_weights'] else [])}
+        return GraphCache(directory, meta, arrays['ids'], arrays['offsets'], arrays['targets'], arrays.get('weights'))
+
+    def weight_texts(self, weights: np.ndarray) -> List[Optional[str]]:
+        """
+        The weights as they were written in the edge file (None for no weight). If the weights in the file did not all
+        have the same number of decimals, the shortest text giving the same float is returned.
+        """
+        decimals = self.meta.get('weight_decimals')
+        if decimals is None:
+            return [None if w != w else repr(w) for w in weights.tolist()]
+        return [None if w != w else f'{w:.{decimals}f}' for w in weights.tolist()]
+
+    def source_indexes(self, start: int = 0, end: Optional[int] = None) -> np.ndarray:
+        """
+        The indexes of the from vertices of the edges at the positions start..end - 1.
+        """
+        end = self.num_edges if end is None else end
+        return (np.searchsorted(self.offsets, np.arange(start, end), side='right') - 1).astype(self.targets.dtype)
+
+    def vertex_batches(self, bulk_size: int) -> Iterable[np.ndarray]:
+        for start in range(0, self.num_vertices, bulk_size):
+            yield self.ids[start:start + bulk_size]
+
+    def edge_batches(self, bulk_size: int) -> Iterable[CachedEdges]:
+        """
+        Yield the edges in batches of bulk_size as columns of vertex ids and weights.
+        """
+        for start in range(0, self.num_edges, bulk_size):
+            end = min(start + bulk_size, self.num_edges)
+            yield (self.ids[self.source_indexes(start, end)], self.ids[self.targets[start:end]],
+                   None if self.weights is None else self.weights[start:end])
+
+
+def _is_valid(directory: str, vertices_filename: str, edges_filename: str, be_verbose: bool) -> bool:
+    """
+    Check whether the cache in directory was made from the given files. If the sizes and modification times are
+    unchanged, the cache is valid. If only the modification times have changed (e.g., because an archive was extracted
+    again), the files are hashed and, if the hashes are the same, the new times are stored.
+    """
+    meta_filename = os.path.join(directory, 'meta.json')
+    if not os.path.isfile(meta_filename):
+        return False
+    with open(meta_filename, 'r') as f:
+        meta = json.load(f)
+    if meta.get('version') != CACHE_FORMAT_VERSION:
+        return False
+    files = {'vertices': vertices_filename, 'edges': edges_filename}
+    changed = []
+    for kind, filename in files.items():
+        signature = file_signature(filename)
+        if signature['size'] != meta['files'][kind]['size']:
+            return False
+        if signature['mtime_ns'] != meta['files'][kind]['mtime_ns']:
+            changed.append(kind)
+    if not changed:
+        return True
+    if be_verbose:
+        print(f'The modification times of the graph files differ from those in the cache {directory}, comparing '
+              f'the hashes.')
+    for kind in changed:
+        if file_hash(files[kind]) != meta['files'][kind]['sha256']:
+            return False
+        meta['files'][kind]['mtime_ns'] = file_signature(files[kind])['mtime_ns']
+    with open(meta_filename, 'w') as f:
+        json.dump(meta, f, indent=2)
+    return True
+
+
+def _decimals(token: str) -> Optional[int]:
+    """
+    The number of digits after the decimal point of a number written as text, if it is written as by
+    f'{value:.<decimals>f}', and None otherwise.
+    """
+    decimals = len(token) - token.index('.') - 1 if '.' in token else 0
+    try:
+        return decimals if f'{float(token):.{decimals}f}' == token else None
+    except ValueError:
+        return None
+
+
+def _parse_edge_lines(lines: List[str], decimals: set) -> Tuple[List[int], List[int], List[float]]:
+    """
+    Parse edge lines <from id> <to id> [<weight>], a missing weight is NaN. The numbers of decimals of the weights (see
+    _decimals()) are collected in decimals.
+    """
+    sources, targets, weights = [], [], []
+    for line in lines:
+        if not line or line[0] in COMMENT_CHARACTERS:
+            continue
+        e = line.split(' ', 2)
+        sources.append(int(e[0]))
+        targets.append(int(e[1]))
+        if len(e) == 3:
+            weights.append(float(e[2]))
+            if len(decimals) < 2:
+                decimals.add(_decimals(e[2]))
+        else:
+            weights.append(np.nan)
+    return sources, targets, weights
+
+
+def build_graphalytics_cache(vertices_filename: str, edges_filename: str, directory: str, bulk_size: int,
+                             be_verbose: bool) -> GraphCache:
+    """
+    Parse the Graphalytics vertex and edge files and store the graph in compressed sparse row form in directory,
+    see GraphCache. An older cache in directory is replaced. The edges are held in memory (as two integer and one
+    float array) while they are sorted by their from vertex.
+    :param vertices_filename:
+    :param edges_filename:
+    :param directory: the cache directory
+    :param bulk_size: the number of lines parsed at once
+    :param be_verbose:
+    :return: the cache
+    """
+    start = time.monotonic()
+    vertex_ids = [np.array(vids, dtype=np.int64) for vids in file_reader(vertices_filename, bulk_size)]
+    ids = np.sort(np.concatenate(vertex_ids)) if vertex_ids else np.zeros(0, dtype=np.int64)
+    index_type = np.int32 if len(ids) < np.iinfo(np.int32).max else np.int64
+
+    def to_indexes(values: List[int]) -> np.ndarray:
+        values = np.array(values, dtype=np.int64)
+        indexes = np.minimum(np.searchsorted(ids, values), max(len(ids) - 1, 0))
+        if len(values) and (len(ids) == 0 or not np.array_equal(ids[indexes], values)):
+            unknown = values[ids[indexes] != values][0] if len(ids) else values[0]
+            raise RuntimeError(f'The vertex {unknown} of an edge is not in the vertex file {vertices_filename}.')
+        return indexes.astype(index_type)
+
+    source_chunks, target_chunks, weight_chunks = [], [], []
+    decimals = set()
+    with tqdm(desc='Caching edges', mininterval=1.0, unit='edges', ncols=100, disable=not be_verbose) as pbar:
+        for lines in file_reader(edges_filename, bulk_size):
+            sources, targets, weights = _parse_edge_lines(lines, decimals)
+            source_chunks.append(to_indexes(sources))
+            target_chunks.append(to_indexes(targets))
+            weight_chunks.append(np.array(weights, dtype=np.float64))
+            pbar.update(len(sources))
+    sources = np.concatenate(source_chunks) if source_chunks else np.zeros(0, dtype=index_type)
+    targets = np.concatenate(target_chunks) if target_chunks else np.zeros(0, dtype=index_type)
+    weights = np.concatenate(weight_chunks) if weight_chunks else np.zeros(0, dtype=np.float64)
+    has_weights = bool(len(weights)) and not np.isnan(weights).all()
+
+    order = np.argsort(sources, kind='stable')
+    offsets = np.zeros(len(ids) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=len(ids)), out=offsets[1:])
+    meta = {'version': CACHE_FORMAT_VERSION,
+            'files': {'vertices': dict(file_signature(vertices_filename), sha256=file_hash(vertices_filename)),
+                      'edges': dict(file_signature(edges_filename), sha256=file_hash(edges_filename))},
+            'num_vertices': len(ids), 'num_edges': len(targets), 'has_weights': has_weights,
+            # if all weights were written with the same number of decimals, they can be written exactly so again
+            'weight_decimals': decimals.pop() if len(decimals) == 1 else None}
+
+    # write into a temporary directory and rename it, so that an interrupted run leaves no half-written cache
+    tmp_directory = directory + '.tmp'
+    shutil.rmtree(tmp_directory, ignore_errors=True)
+    os.makedirs(tmp_directory)
+    np.save(os.path.join(tmp_directory, 'ids.npy'), ids)
+    np.save(os.path.join(tmp_directory, 'offsets.npy'), offsets)
+    np.save(os.path.join(tmp_directory, 'targets.npy'), targets[order])
+    if has_weights:
+        np.save(os.path.join(tmp_directory, 'weights.npy'), weights[order])
+    with open(os.path.join(tmp_directory, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+    shutil.rmtree(directory, ignore_errors=True)
+    os.rename(tmp_directory, directory)
+    if be_verbose:
+        print(f'Cached {len(ids)} vertices and {len(targets)} edges in {directory} in '
+              f'{get_time_difference_string(time.monotonic() - start)}.')
+    return GraphCache.load(directory)
+
+
+def get_graphalytics_cache(vertices_filename: str, edges_filename: str, bulk_size: int, be_verbose: bool,
+                           cache_dir: Optional[str] = None) -> GraphCache:
+    """
+    Return the cache of the given Graphalytics graph. If there is no valid cache, the files are parsed and the cache
+    is written first.
+    :param vertices_filename:
+    :param edges_filename:
+    :param bulk_size: the number of lines parsed at once when the cache is built
+    :param be_verbose:
+    :param cache_dir: the directory containing the caches, by default the directory of the edge file
+    :return: the cache
+    """
+    directory = get_cache_directory(edges_filename, cache_dir)
+    if _is_valid(directory, vertices_filename, edges_filename, be_verbose):
+        cache = GraphCache.load(directory)
+        if be_verbose:
+            print(f'Using the cache {directory} ({cache.num_vertices} vertices, {cache.num_edges} edges).')
+        return cache
+    if be_verbose:
+        print(f'No valid cache of {edges_filename}, parsing the files and writing the cache {directory}.')
+    return build_graphalytics_cache(vertices_filename, edges_filename, directory, bulk_size, be_verbose)
@@ -0,0 +1,164 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Iterable, List, Tuple
+
+import requests
+from tqdm import tqdm
+
+from general import create_graph_with_collections, get_time_difference_string, graph_exists, InsertPool
+from helper_classes import DatabaseInfo
+
+KeyRange = Tuple[Optional[str], Optional[str]]  # [low, high), None means unbounded
+
+
+def get_graph_definition(db_info: DatabaseInfo) -> dict:
+    """
+    Return the definition of the graph db_info.graph_name as returned by the graph API (edge definitions, orphan
+    collections, number of shards, replication factor and, for SmartGraphs, the smart attribute).
+    """
+    url = os.path.join(db_info.endpoint, '_api/gharial', db_info.graph_name)
+    response = requests.get(url, auth=(db_info.username, db_info.password))
+    if response.status_code != 200:
+        raise RuntimeError(f'get_graph_definition error: Error Code: {response.status_code}. '
+                           f'Message: {response.text}')
+    return response.json()['graph']
+
+
+def get_collection_count(db_info: DatabaseInfo, collection_name: str) -> int:
+    url = os.path.join(db_info.endpoint, '_api/collection', collection_name, 'count')
+    response = requests.get(url, auth=(db_info.username, db_info.password))
+    if response.status_code != 200:
+        raise RuntimeError(f'get_collection_count error: Error Code: {response.status_code}. '
+                           f'Message: {response.text}')
+    return response.json()['count']
+
+
+def cursor_batches(db_info: DatabaseInfo, query: str, bind_vars: dict, batch_size: int) -> Iterable[list]:
+    """
+    Run the query as a streaming cursor and yield the results in batches of (at most) batch_size documents. The next
+    batch is requested only when the previous one has been consumed.
+    """
+    url = os.path.join(db_info.endpoint, '_api/cursor')
+    response = requests.post(url, auth=(db_info.username, db_info.password),
+                             json={'query': query, 'bindVars': bind_vars, 'batchSize': batch_size,
+                                   'options': {'stream': True}})
+    if response.status_code != 201:
+        raise RuntimeError(f'Invalid response from server when creating a cursor: {response.text}')
+    body = response.json()
+    yield body['result']
+    while body['hasMore']:
+        response = requests.put(os.path.join(url, body['id']), auth=(db_info.username, db_info.password))
+        if response.status_code != 200:
+            raise RuntimeError(f'Invalid response from server when reading a cursor: {response.text}')
+        body = response.json()
+        yield body['result']
+
+
+def get_key_ranges(db_info: DatabaseInfo, collection_name: str, count: int, num_ranges: int) -> List[KeyRange]:
+    """
+    Split the keys of the collection into (at most) num_ranges ranges with about the same number of documents. The
+    boundaries are read from the primary index, which is sorted by _key, at the offsets i * count / num_ranges.
+    """
+    num_ranges = max(1, min(num_ranges, count))
+    query = 'FOR d IN @@collection SORT d._key LIMIT @offset, 1 RETURN d._key'
+    boundaries = []
+    for i in range(1, num_ranges):
+        for batch in cursor_batches(db_info, query, {'@collection': collection_name,
+                                                     'offset': i * count // num_ranges}, 1):
+            boundaries += batch
+    boundaries = sorted(set(boundaries))
+    return list(zip([None] + boundaries, boundaries + [None]))
+
+
+def read_key_range(db_info: DatabaseInfo, collection_name: str, key_range: KeyRange,
+                   batch_size: int) -> Iterable[list]:
+    """
+    Yield the documents of the collection with keys in key_range without _id and _rev in batches of batch_size.
+    """
+    low, high = key_range
+    filters = []
+    bind_vars = {'@collection': collection_name}
+    if low is not None:
+        filters.append('d._key >= @low')
+        bind_vars['low'] = low
+    if high is not None:
+        filters.append('d._key < @high')
+        bind_vars['high'] = high
+    query = 'FOR d IN @@collection '
+    if filters:
+        query += 'FILTER ' + ' AND '.join(filters) + ' '
+    query += 'RETURN UNSET(d, "_id", "_rev")'
+    yield from cursor_batches(db_info, query, bind_vars, batch_size)
+
+
+def clone_graph(source_db_info: DatabaseInfo, target_db_info: DatabaseInfo, bulk_size: int, num_read_threads: int,
+                num_write_threads: int, be_verbose: bool):
+    """
+    Copy the graph source_db_info.graph_name with all its collections into the graph target_db_info.graph_name at
+    target_db_info.endpoint, which may be another database or server. The target graph is created with the edge
+    definitions and orphan collections of the source graph; it is smart if the source graph is, with the same smart
+    attribute. The number of shards and the replication factor are those of target_db_info or, if they are None,
+    those of the source graph.
+    Every collection is split into num_read_threads ranges of keys with about the same number of documents. The ranges
+    of all collections are read with streaming cursors by num_read_threads threads and the batches are inserted into
+    the target with at most num_write_threads insert requests in flight. Reading the next batch and inserting the
+    previous ones overlap.
+    :param source_db_info: the endpoint, graph name and credentials of the source
+    :param target_db_info: the endpoint, graph name, credentials, overwrite flag and (optionally) number of shards and
+           replication factor of the target
+    :param bulk_size: the number of documents read and inserted in one go
+    :param num_read_threads:
+    :param num_write_threads:
+    :param be_verbose:
+    :return: None
+    """
+    definition = get_graph_definition(source_db_info)
+    edge_definitions = [{'collection': d['collection'], 'from': d['from'], 'to': d['to']}
+                        for d in definition['edgeDefinitions']]
+    vertex_collections = list(definition.get('orphanCollections', []))
+    for d in edge_definitions:
+        for c in d['from'] + d['to']:
+            if c not in vertex_collections:
+                vertex_collections.append(c)
+    target_db_info = target_db_info.copy()
+    target_db_info.isSmart = definition.get('isSmart', False)
+    target_db_info.smart_attribute = definition.get('smartGraphAttribute')
+    if target_db_info.number_of_shards is None:
+        target_db_info.number_of_shards = definition.get('numberOfShards')
+    if target_db_info.replication_factor is None:
+        target_db_info.replication_factor = definition.get('replicationFactor')
+
+    if graph_exists(target_db_info) and not target_db_info.overwrite:
+        if be_verbose:
+            print(f'The graph {target_db_info.graph_name} exists already in the target, not cloning. '
+                  f'To overwrite, use \'--overwrite\'.')
+        return
+    create_graph_with_collections(target_db_info, vertex_collections, edge_definitions)
+
+    # the key ranges of the vertex collections are read first
+    collections = vertex_collections + [d['collection'] for d in edge_definitions]
+    counts = [get_collection_count(source_db_info, c) for c in collections]
+    tasks = [(c, key_range) for c, count in zip(collections, counts)
+             for key_range in get_key_ranges(source_db_info, c, count, num_read_threads)]
+    if be_verbose:
+        print(f'Cloning {len(collections)} collections with {sum(counts)} documents in {len(tasks)} key ranges '
+              f'from {source_db_info.endpoint} to {target_db_info.endpoint}.')
+
+    pool = InsertPool(target_db_info, num_write_threads)
+
+    def clone_key_range(collection_name: str, key_range: KeyRange, pbar: tqdm):
+        for documents in read_key_range(source_db_info, collection_name, key_range, bulk_size):
+            pool.submit(documents, collection_name)
+            pbar.update(len(documents))
+
+    start = time.monotonic()
+    with tqdm(total=sum(counts), desc='Cloning documents', mininterval=1.0, unit='documents', ncols=100,
+              disable=not be_verbose) as pbar:
+        with ThreadPoolExecutor(max_workers=max(1, num_read_threads)) as executor:
+            futures = [executor.submit(clone_key_range, c, key_range, pbar) for c, key_range in tasks]
+            for future in futures:
+                future.result()
+        pool.join()
+    if be_verbose:
+        print('Time for cloning: ' + get_time_difference_string(time.monotonic() - start))
@@ -0,0 +1,345 @@
+import hashlib
+import math
+import threading
+from typing import Optional, List, Dict, Union
+
+import numpy as np
+
+
+MAX_DENSE_ID = 1 << 27  # integer ids up to this value are counted in degree arrays, larger ones in the HyperLogLog
+HLL_PRECISION = 14  # 2^14 registers, a standard error of about 0.8%
+NUM_WEIGHT_BINS = 64
+
+
+class HyperLogLog:
+    """
+    Estimate the number of distinct strings with 2^precision one-byte registers.
+    """
+
+    def __init__(self, precision: int = HLL_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add(self, value: str):
+        x = int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), 'little')
+        index = x >> (64 - self.precision)
+        rest = x & ((1 << (64 - self.precision)) - 1)
+        rank = 64 - self.precision - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int32)))
+        num_zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and num_zeros > 0:  # small range correction
+            estimate = m * math.log(m / num_zeros)
+        return int(round(estimate))
+
+
+class WeightHistogram:
+    """
+    The minimum, maximum, sum and a histogram with NUM_WEIGHT_BINS bins of equal width of a stream of numbers. The
+    range of the histogram starts with the range of the first values and is doubled (merging neighbouring bins)
+    whenever a value falls outside of it, so no second pass is needed.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self.sum = 0.0
+        self.low = None
+        self.width = None
+        self.counts = np.zeros(NUM_WEIGHT_BINS, dtype=np.int64)
+
+    def _extend(self, low: float, high: float):
+        if self.low is None:
+            self.low = low
+            self.width = (high - low) / NUM_WEIGHT_BINS if high > low else 1.0
+        half = NUM_WEIGHT_BINS // 2
+        while low < self.low:
+            self.counts = np.concatenate((np.zeros(half, dtype=np.int64), self.counts.reshape(half, 2).sum(axis=1)))
+            self.low -= NUM_WEIGHT_BINS * self.width
+            self.width *= 2
+        while high >= self.low + NUM_WEIGHT_BINS * self.width:
+            self.counts = np.concatenate((self.counts.reshape(half, 2).sum(axis=1), np.zeros(half, dtype=np.int64)))
+            self.width *= 2
+
+    def add(self, values: np.ndarray):
+        values = values[np.isfinite(values)]
+        if len(values) == 0:
+            return
+        low, high = float(values.min()), float(values.max())
+        self._extend(low, high)
+        bins = np.minimum(((values - self.low) / self.width).astype(np.int64), NUM_WEIGHT_BINS - 1)
+        self.counts += np.bincount(bins, minlength=NUM_WEIGHT_BINS)
+        self.count += len(values)
+        self.min = min(self.min, low)
+        self.max = max(self.max, high)
+        self.sum += float(values.sum())
+
+    def merge(self, other):
+        if other.count == 0:
+            return
+        # re-add the other histogram's bin centers with their counts, precise up to the width of the other's bins
+        centers = other.low + (np.arange(NUM_WEIGHT_BINS) + 0.5) * other.width
+        self._extend(other.min, other.max)
+        bins = np.minimum(((centers - self.low) / self.width).astype(np.int64), NUM_WEIGHT_BINS - 1)
+        self.counts += np.bincount(np.clip(bins, 0, NUM_WEIGHT_BINS - 1), weights=other.counts,
+                                   minlength=NUM_WEIGHT_BINS).astype(np.int64)
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.sum += other.sum
+
+    def to_dict(self) -> Optional[dict]:
+        if self.count == 0:
+            return None
+        return {'count': self.count, 'min': self.min, 'max': self.max, 'mean': self.sum / self.count,
+                'histogram': {'low': self.low, 'binWidth': self.width, 'counts': self.counts.tolist()}}
+
+
+def _degree_distribution(degrees: np.ndarray) -> Dict[str, int]:
+    """
+    The numbers of vertices with degree 0, 1, 2-3, 4-7, 8-15 etc.
+    """
+    distribution = {'0': int(np.count_nonzero(degrees == 0))}
+    positive = degrees[degrees > 0]
+    if len(positive):
+        buckets = np.bincount(np.floor(np.log2(positive)).astype(np.int64))
+        for k, count in enumerate(buckets.tolist()):
+            if count:
+                low, high = 1 << k, (1 << (k + 1)) - 1
+                distribution[str(low) if low == high else f'{low}-{high}'] = count
+    return distribution
+
+
+class GraphStatistics:
+    """
+    Statistics of a graph collected while its vertices and edges are streamed into the database: the numbers of
+    vertices and edges, the degree distributions and the range and histogram of the weights. For integer ids below
+    MAX_DENSE_ID (2^27), the in- and out-degrees are counted in arrays indexed by the id, the number of vertices is
+    exact. Other ids are only counted in a HyperLogLog and the number of vertices is estimated. As soon as there is
+    one such id, there are no degree statistics at all, not even for the integer ids.
+    The statistics can be observed from several threads. For other processes, use empty_copy() and merge(); when
+    pickled, the degree arrays are reduced to the ids that occurred.
+    """
+
+    def __init__(self, weight_attribute: Optional[str] = 'weight'):
+        """
+        :param weight_attribute: the edge attribute whose values are summarized, None for no weights
+        """
+        self.weight_attribute = weight_attribute
+        self.num_edges = 0
+        self.num_self_loops = 0
+        self.present = np.zeros(0, dtype=np.bool_)
+        self.out_degrees = np.zeros(0, dtype=np.int32)
+        self.in_degrees = np.zeros(0, dtype=np.int32)
+        self.other_ids: Optional[HyperLogLog] = None
+        self.weights = WeightHistogram()
+        self.lock = threading.Lock()
+
+    def empty_copy(self):
+        return GraphStatistics(self.weight_attribute)
+
+    def __getstate__(self):
+        # the arrays grow to the largest id (up to 1.2 GB), send only the ids that occurred and their degrees
+        state = self.__dict__.copy()
+        del state['lock']
+        ids = np.flatnonzero(self.present).astype(np.int32)
+        state['present'] = ids
+        state['out_degrees'] = self.out_degrees[ids]
+        state['in_degrees'] = self.in_degrees[ids]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        ids = self.present
+        size = int(ids.max()) + 1 if len(ids) else 0
+        self.present = np.zeros(size, dtype=np.bool_)
+        self.present[ids] = True
+        self.out_degrees, self.in_degrees = np.zeros(size, dtype=np.int32), np.zeros(size, dtype=np.int32)
+        self.out_degrees[ids] = state['out_degrees']
+        self.in_degrees[ids] = state['in_degrees']
+        self.lock = threading.Lock()
+
+    def _grow(self, size: int):
+        if size > len(self.present):
+            size = max(size, min(2 * len(self.present), MAX_DENSE_ID))
+            extra = size - len(self.present)
+            self.present = np.concatenate((self.present, np.zeros(extra, dtype=np.bool_)))
+            self.out_degrees = np.concatenate((self.out_degrees, np.zeros(extra, dtype=np.int32)))
+            self.in_degrees = np.concatenate((self.in_degrees, np.zeros(extra, dtype=np.int32)))
+
+    def _add_other_id(self, vertex_id: str):
+        if self.other_ids is None:
+            self.other_ids = HyperLogLog()
+        self.other_ids.add(vertex_id)
+
+    def _dense_ids(self, ids: List[str]) -> np.ndarray:
+        """
+        Return the integer ids (and -1 for the others) and count the others in the HyperLogLog.
+        """
+        dense = np.full(len(ids), -1, dtype=np.int64)
+        for i, vertex_id in enumerate(ids):
+            if vertex_id.isdigit() and int(vertex_id) < MAX_DENSE_ID:
+                dense[i] = int(vertex_id)
+            else:
+                self._add_other_id(vertex_id)
+        return dense
+
+    def _add_dense_edges(self, froms: np.ndarray, tos: np.ndarray):
+        if len(froms) or len(tos):
+            self._grow(int(max(froms.max(initial=0), tos.max(initial=0))) + 1)
+            self.present[froms] = True
+            self.present[tos] = True
+            self.out_degrees += np.bincount(froms, minlength=len(self.out_degrees))
+            self.in_degrees += np.bincount(tos, minlength=len(self.in_degrees))
+
+    @staticmethod
+    def _vertex_id(document_id: str, keys_with_prefix: bool) -> str:
+        key = document_id.rpartition('/')[2]
+        return key.rpartition(':')[2] if keys_with_prefix else key
+
+    def add_vertex_ids(self, ids: List[str]):
+        with self.lock:
+            dense = self._dense_ids(ids)
+            dense = dense[dense >= 0]
+            if len(dense):
+                self._grow(int(dense.max()) + 1)
+                self.present[dense] = True
+
+    def add_edge_columns(self, sources: np.ndarray, targets: np.ndarray, weights: Optional[np.ndarray] = None):
+        """
+        Count edges given by integer ids, those that are negative or at least MAX_DENSE_ID as other ids.
+        """
+        with self.lock:
+            self.num_edges += len(sources)
+            if len(sources) == 0:
+                return
+            self.num_self_loops += int(np.count_nonzero(sources == targets))
+            dense_sources = (sources >= 0) & (sources < MAX_DENSE_ID)
+            dense_targets = (targets >= 0) & (targets < MAX_DENSE_ID)
+            for vertex_id in np.concatenate((sources[~dense_sources], targets[~dense_targets])).tolist():
+                self._add_other_id(str(vertex_id))
+            self._add_dense_edges(sources[dense_sources], targets[dense_targets])
+            if weights is not None:
+                self.weights.add(np.asarray(weights, dtype=np.float64))
+
+    def add_edge_ids(self, froms: List[str], tos: List[str], weights: Optional[List] = None):
+        """
+        Count edges given by their ids as strings and (optionally) their weights. Weights that are not numbers are
+        ignored.
+        """
+        with self.lock:
+            self.num_edges += len(froms)
+            self.num_self_loops += sum(1 for f, t in zip(froms, tos) if f == t)
+            dense_froms, dense_tos = self._dense_ids(froms), self._dense_ids(tos)
+            self._add_dense_edges(dense_froms[dense_froms >= 0], dense_tos[dense_tos >= 0])
+            if weights:
+                values = []
+                for w in weights:
+                    try:
+                        values.append(float(w))
+                    except (TypeError, ValueError):
+                        pass
+                self.weights.add(np.array(values, dtype=np.float64))
+
+    def add_vertex_documents(self, vertices: List[dict], keys_with_prefix: bool = False):
+        """
+        Count the vertex documents. If keys_with_prefix is True, the keys have the form <prefix>:<id> (as in
+        SmartGraphs) and only the id is counted.
+        """
+        self.add_vertex_ids([self._vertex_id(v['_key'], keys_with_prefix) for v in vertices])
+
+    def add_edge_documents(self, edges: List[dict], keys_with_prefix: bool = False):
+        """
+        Count the edge documents, see add_vertex_documents() for keys_with_prefix.
+        """
+        froms = [self._vertex_id(e['_from'], keys_with_prefix) for e in edges]
+        tos = [self._vertex_id(e['_to'], keys_with_prefix) for e in edges]
+        weights = None
+        if self.weight_attribute:
+            weights = [e[self.weight_attribute] for e in edges if e.get(self.weight_attribute) is not None]
+        self.add_edge_ids(froms, tos, weights)
+
+    def merge(self, other):
+        """
+        Add the statistics of other, e.g., collected in another process, to these ones.
+        """
+        with self.lock:
+            self.num_edges += other.num_edges
+            self.num_self_loops += other.num_self_loops
+            self._grow(len(other.present))
+            n = len(other.present)
+            self.present[:n] |= other.present
+            self.out_degrees[:n] += other.out_degrees
+            self.in_degrees[:n] += other.in_degrees
+            if other.other_ids is not None:
+                if self.other_ids is None:
+                    self.other_ids = HyperLogLog()
+                self.other_ids.merge(other.other_ids)
+            self.weights.merge(other.weights)
+
+    def total_degrees(self) -> Optional[np.ndarray]:
+        """
+        Return the in- plus out-degrees of the vertices with integer ids or None if there are other ids.
+        """
+        with self.lock:
+            if self.other_ids is not None:
+                return None
+            present = np.flatnonzero(self.present)
+            return self.out_degrees[present].astype(np.int64) + self.in_degrees[present]
+
+    def to_dict(self) -> dict:
+        with self.lock:
+            present = np.flatnonzero(self.present)
+            num_dense = len(present)
+            num_other = self.other_ids.estimate() if self.other_ids is not None else 0
+            result: Dict[str, Union[int, bool, dict, None]] = {
+                'numVertices': num_dense + num_other,
+                'numVerticesExact': self.other_ids is None,
+                'numEdges': self.num_edges,
+                'numSelfLoops': self.num_self_loops,
+                'degrees': None,
+                'weights': self.weights.to_dict(),
+            }
+            if self.other_ids is None and num_dense:
+                out_degrees, in_degrees = self.out_degrees[present], self.in_degrees[present]
+                result['degrees'] = {
+                    'maxOutDegree': int(out_degrees.max()),
+                    'maxInDegree': int(in_degrees.max()),
+                    'maxDegree': int((out_degrees + in_degrees).max()),
+                    'averageOutDegree': self.num_edges / num_dense,
+                    'outDegreeDistribution': _degree_distribution(out_degrees),
+                    'inDegreeDistribution': _degree_distribution(in_degrees),
+                    'degreeDistribution': _degree_distribution(out_degrees + in_degrees),
+                }
+            if self.weight_attribute and result['weights'] is not None:
+                result['weights']['attribute'] = self.weight_attribute
+            return result
+
+    def summary_string(self) -> str:
+        d = self.to_dict()
+        approx = '' if d['numVerticesExact'] else '~'
+        s = f'Statistics: {approx}{d["numVertices"]} vertices, {d["numEdges"]} edges'
+        if d['degrees']:
+            s += f', max out-degree {d["degrees"]["maxOutDegree"]}, max in-degree {d["degrees"]["maxInDegree"]}'
+        if d['weights']:
+            s += f', weights in [{d["weights"]["min"]}, {d["weights"]["max"]}]'
+        return s + '.'
+
+
+def get_statistics(args, weight_attribute: Optional[str] = 'weight') -> Optional[GraphStatistics]:
+    """
+    Return new statistics if they should be collected according to the arguments, otherwise None.
+    """
+    if not args.statistics_file and not args.statistics_to_db:
+        return None
+    return GraphStatistics(weight_attribute)
+
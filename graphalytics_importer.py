@@ -1,11 +1,21 @@
 import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import PurePath
+from typing import Optional, Iterable, Tuple, List
 
+import numpy as np
 from tqdm import tqdm
 
-from general import file_reader, insert_documents, create_graph, get_time_difference_string, graph_exists
-from helper_classes import DatabaseInfo
+from attribute_encoding import NumericEncoder, get_edge_property_types_graphalytics
+from edge_preprocessing import read_edge_lines
+from general import file_reader, insert_documents, create_graph, get_time_difference_string, graph_exists, InsertPool
+from graph_cache import GraphCache, get_graphalytics_cache
+from graph_statistics import GraphStatistics
+from helper_classes import DatabaseInfo, ImportInfo, EdgePreprocessingInfo
+from partitioning import VertexPartition, partition_graphalytics
+from sampling import Sampler, get_sampler
 from vertices_generator import ConverterToVertex
 
 
@@ -63,8 +73,123 @@ def get_property_graphalytics(properties_filename: str, property_: str):
 #         return int(num_vertices)
 
 
+def make_vertices_graphalytics(vids, db_info: DatabaseInfo, numeric_encoder: NumericEncoder,
+                               partition: Optional[VertexPartition] = None):
+    if db_info.isSmart and partition:
+        return [{f'{db_info.smart_attribute}': part, '_key': part + ':' + str(vid)}
+                for vid, part in zip(vids, partition.smart_values(vids))]
+    if db_info.isSmart:  # the values of the smart attribute must be strings
+        return [{f'{db_info.smart_attribute}': str(vid), '_key': str(vid) + ':' + str(vid)} for vid in vids]
+    return [{f'{db_info.smart_attribute}': numeric_encoder.token_value(vid, 'int'),
+             '_key': str(vid) + ':' + str(vid)} for vid in vids]
+
+
+def get_weight_kind_graphalytics(properties_filename) -> str:
+    """
+    Return 'int' if the properties file declares the edge property 'weight' as an integer and 'float' otherwise.
+    """
+    return get_edge_property_types_graphalytics(properties_filename).get('weight', 'float')
+
+
+def make_edges_graphalytics(eids, to_v, numeric_encoder: NumericEncoder, weight_kind: str = 'float'):
+    edges = list()
+    for i in eids:
+        if i[0] == '#' or i[0] == '/' or i[0] == '%':
+            continue
+        e = i.split(' ', 2)
+        if len(e) == 2:  # no weight given
+            f, t = e
+            edges.append({"_from": to_v(f), "_to": to_v(t)})  # Null will be inserted
+        else:
+            f, t, w = e
+            edges.append({"_from": to_v(f), "_to": to_v(t),
+                          "weight": numeric_encoder.token_value(w, weight_kind)})
+    return edges
+
+
+def get_to_vertex_graphalytics(db_info: DatabaseInfo, partition: Optional[VertexPartition] = None):
+    """
+    Return the function mapping a vertex id to the _id of the vertex, which contains the smart value of the vertex.
+    """
+    converter = ConverterToVertex(db_info.vertices_coll_name)
+    if partition:
+        return lambda vid: converter.idx_to_smart_vertex(vid, partition.part_of(vid))
+    return converter.idx_to_smart_vertex
+
+
+def make_edges_graphalytics_from_columns(sources: np.ndarray, targets: np.ndarray, weight_texts: Optional[List[str]],
+                                         to_v, numeric_encoder: NumericEncoder, weight_kind: str = 'float'):
+    """
+    Make edge documents from the columns of a cached graph. The weights are given as in the file, None means that the
+    edge has no weight.
+    """
+    froms = [to_v(f) for f in sources.tolist()]
+    tos = [to_v(t) for t in targets.tolist()]
+    if weight_texts is None:
+        return [{"_from": f, "_to": t} for f, t in zip(froms, tos)]  # Null will be inserted
+    return [{"_from": f, "_to": t} if w is None else
+            {"_from": f, "_to": t, "weight": numeric_encoder.token_value(w, weight_kind)}
+            for f, t, w in zip(froms, tos, weight_texts)]
+
+
+def graphalytics_vertex_batches(vertices_filename, bulk_size, sampler: Optional[Sampler] = None,
+                                statistics: Optional[GraphStatistics] = None,
+                                cache: Optional[GraphCache] = None) -> Iterable[Tuple[int, List[str]]]:
+    """
+    Yield the vertex ids in batches as pairs (the number of vertices read, the ids of the sampled vertices among
+    them). The vertices are taken from the cache if it is given and read from the file otherwise.
+    """
+    if cache is not None:
+        for ids in cache.vertex_batches(bulk_size):
+            kept = ids if sampler is None else ids[sampler.vertex_mask(ids)]
+            vids = [str(vid) for vid in kept.tolist()]
+            if statistics:
+                statistics.add_vertex_ids(vids)
+            yield len(ids), vids
+    else:
+        for vids in file_reader(vertices_filename, bulk_size):
+            sampled_vids = vids if sampler is None else sampler.vertex_lines(vids)
+            if statistics:
+                statistics.add_vertex_ids(sampled_vids)
+            yield len(vids), sampled_vids
+
+
+def graphalytics_edge_batches(edges_filename, bulk_size, be_verbose: bool, to_v, numeric_encoder: NumericEncoder,
+                              weight_kind: str = 'float', edge_preprocessing: Optional[EdgePreprocessingInfo] = None,
+                              sampler: Optional[Sampler] = None, statistics: Optional[GraphStatistics] = None,
+                              cache: Optional[GraphCache] = None) -> Iterable[Tuple[int, List[dict]]]:
+    """
+    Yield the edge documents in batches as pairs (the number of edges read, the documents of the sampled edges among
+    them). The edges are taken from the cache if it is given and read (and preprocessed) from the file otherwise.
+    """
+    if cache is not None:
+        for sources, targets, weights in cache.edge_batches(bulk_size):
+            num_read = len(sources)
+            if sampler is not None:
+                mask = sampler.edge_mask(sources, targets)
+                sources, targets = sources[mask], targets[mask]
+                weights = None if weights is None else weights[mask]
+            if statistics:
+                statistics.add_edge_columns(sources, targets,
+                                            None if weights is None else weights[~np.isnan(weights)])
+            weight_texts = None if weights is None else cache.weight_texts(weights)
+            yield num_read, make_edges_graphalytics_from_columns(sources, targets, weight_texts, to_v,
+                                                                 numeric_encoder, weight_kind)
+    else:
+        for eids in read_edge_lines(edges_filename, bulk_size, edge_preprocessing, be_verbose):
+            sampled_eids = eids if sampler is None else sampler.edge_lines(eids)
+            edges = make_edges_graphalytics(sampled_eids, to_v, numeric_encoder, weight_kind)
+            if statistics:
+                statistics.add_edge_documents(edges, keys_with_prefix=True)
+            yield len(eids), edges
+
+
 def read_and_create_vertices_graphalytics(vertices_filename, properties_filename, db_info: DatabaseInfo, bulk_size,
-                                          be_verbose: bool):
+                                          be_verbose: bool, numeric_encoder: Optional[NumericEncoder] = None,
+                                          sampler: Optional[Sampler] = None,
+                                          statistics: Optional[GraphStatistics] = None,
+                                          partition: Optional[VertexPartition] = None,
+                                          cache: Optional[GraphCache] = None):
     """
     Read vertices from the given file and insert them into the collection v_coll in bulks of num_vertices
     bulk_size with smart attribute smart_attribute. The vertices must be given one vertex per line as <vertex id>.
@@ -73,8 +198,15 @@ def read_and_create_vertices_graphalytics(vertices_filename, properties_filename
     :param properties_filename: the filename of the file containing properties of the graph
     :param db_info database info (endpoint, vertices_coll_name, smart_attribute, username, password)
     :param bulk_size: the bulk num_vertices
+    :param numeric_encoder: how numeric attributes are stored, as strings by default
+    :param sampler: if given, only the vertices of the sampled subgraph are inserted
+    :param statistics: if given, the inserted vertices are counted in it
+    :param partition: if given, the smart values of the vertices are their parts
+    :param cache: if given, the vertices are taken from it instead of the file
     :return: None
     """
+    numeric_encoder = numeric_encoder or NumericEncoder()
+    vertex_batches = graphalytics_vertex_batches(vertices_filename, bulk_size, sampler, statistics, cache)
     start_v = time.monotonic()
 
     if be_verbose:
@@ -83,19 +215,26 @@ def read_and_create_vertices_graphalytics(vertices_filename, properties_filename
         with tqdm(total=num_vertices, desc='Importing vertices',
                   mininterval=1.0,
                   unit='vertices', ncols=100) as pbar:
-            for vids in file_reader(vertices_filename, bulk_size):
-                vertices = [{f'{db_info.smart_attribute}': str(vid), '_key': str(vid) + ':' + str(vid)} for vid in vids]
-                insert_documents(db_info, vertices, db_info.vertices_coll_name)
-                pbar.update(len(vids))
+            for num_read, vids in vertex_batches:
+                if vids:
+                    vertices = make_vertices_graphalytics(vids, db_info, numeric_encoder, partition)
+                    insert_documents(db_info, vertices, db_info.vertices_coll_name)
+                pbar.update(num_read)
         print('Time for vertices: ' + get_time_difference_string(time.monotonic() - start_v))
     else:
-        for vids in file_reader(vertices_filename, bulk_size):
-            vertices = [{f'{db_info.smart_attribute}': str(vid), '_key': str(vid) + ':' + str(vid)} for vid in vids]
-            insert_documents(db_info, vertices, db_info.vertices_coll_name)
+        for _, vids in vertex_batches:
+            if vids:
+                vertices = make_vertices_graphalytics(vids, db_info, numeric_encoder, partition)
+                insert_documents(db_info, vertices, db_info.vertices_coll_name)
 
 
 def read_and_create_edges_graphalytics(edges_filename, properties_filename, db_info: DatabaseInfo, bulk_size,
-                                       be_verbose: bool):
+                                       be_verbose: bool, numeric_encoder: Optional[NumericEncoder] = None,
+                                       edge_preprocessing: Optional[EdgePreprocessingInfo] = None,
+                                       sampler: Optional[Sampler] = None,
+                                       statistics: Optional[GraphStatistics] = None,
+                                       partition: Optional[VertexPartition] = None,
+                                       cache: Optional[GraphCache] = None):
     """
     Read edges from the given file and insert them into the collection edges_coll_name in bulks of num_vertices
      bulk_size with smart attribute smart_attribute. The edges must be given one edge per line in the form
@@ -106,46 +245,168 @@ def read_and_create_edges_graphalytics(edges_filename, properties_filename, db_i
     :param edges_filename:
     :param db_info:
     :param bulk_size:
+    :param numeric_encoder: how numeric attributes are stored, as strings by default. The type of the weights is taken
+           from the properties file.
+    :param edge_preprocessing: how the edges are sorted, deduplicated etc. before they are inserted, if at all
+    :param sampler: if given, only the edges of the sampled subgraph are inserted
+    :param statistics: if given, the inserted edges are counted in it
+    :param partition: if given, the smart values of the vertices are their parts
+    :param cache: if given, the edges are taken from it instead of the file
     :return:
     """
-
-    def make_edges(eids_):
-        edges_ = list()
-        for i in eids_:
-            if i[0] == '#' or i[0] == '/' or i[0] == '%':
-                continue
-            e = i.split(' ', 2)
-            if len(e) == 2:  # no weight given
-                f, t = e
-                edges_.append({"_from": to_v(f), "_to": to_v(t)})  # Null will be inserted
-            else:
-                f, t, w = e
-                edges_.append({"_from": to_v(f), "_to": to_v(t), "weight": f'{w}'})
-        return edges_
+    numeric_encoder = numeric_encoder or NumericEncoder()
+    weight_kind = get_weight_kind_graphalytics(properties_filename)
+    to_v = get_to_vertex_graphalytics(db_info, partition)
+    edge_batches = graphalytics_edge_batches(edges_filename, bulk_size, be_verbose, to_v, numeric_encoder,
+                                             weight_kind, edge_preprocessing, sampler, statistics, cache)
 
     num_edges = get_property_graphalytics(properties_filename, 'num_edges')
     print(f'Number of edges: {num_edges}')
-    to_v = ConverterToVertex(db_info.vertices_coll_name).idx_to_smart_vertex
 
     start_e = time.monotonic()
     if be_verbose:
         with tqdm(total=num_edges, desc='Importing edges',
                   mininterval=1.0,
                   unit='edges', ncols=100) as pbar:
-            for eids in file_reader(edges_filename, bulk_size):
-                edges = make_edges(eids)
-                insert_documents(db_info, edges, db_info.edge_coll_name)
-                pbar.update(len(edges))
+            for num_read, edges in edge_batches:
+                if edges:
+                    insert_documents(db_info, edges, db_info.edge_coll_name)
+                pbar.update(num_read)
 
         print('Time for edges: ' + get_time_difference_string(time.monotonic() - start_e))
     else:
-        for eids in file_reader(edges_filename, bulk_size):
-            edges = make_edges(eids)
-            insert_documents(db_info, edges, db_info.edge_coll_name)
+        for _, edges in edge_batches:
+            if edges:
+                insert_documents(db_info, edges, db_info.edge_coll_name)
+
+
+class _PhaseProgress:
+    """
+    The relative progress of the vertex phase in a concurrent import. The edge phase waits in wait_for() until the
+    vertex phase is relatively at least as far as the edge phase and stops if the vertex phase failed.
+    """
+
+    def __init__(self, total: int):
+        self.total = max(total, 1)
+        self.done = 0
+        self.finished = False
+        self.failed = False
+        self.condition = threading.Condition()
+
+    def update(self, num_done: int):
+        with self.condition:
+            self.done += num_done
+            self.condition.notify_all()
+
+    def finish(self, failed: bool = False):
+        with self.condition:
+            self.finished = True
+            self.failed = failed
+            self.condition.notify_all()
+
+    def wait_for(self, fraction: float):
+        with self.condition:
+            self.condition.wait_for(lambda: self.finished or self.done / self.total >= fraction)
+
+
+def read_and_create_vertices_and_edges_concurrently_graphalytics(vertices_filename, edges_filename,
+                                                                 properties_filename, db_info: DatabaseInfo,
+                                                                 bulk_size, import_info: ImportInfo,
+                                                                 be_verbose: bool, sampler: Optional[Sampler] = None,
+                                                                 partition: Optional[VertexPartition] = None,
+                                                                 cache: Optional[GraphCache] = None):
+    """
+    Import vertices and edges at the same time. ArangoDB does not require that _from and _to exist when an edge is
+    inserted, so both phases can share the write capacity of the server. While vertices are imported,
+    import_info.num_threads insert requests are split between the phases according to import_info.edge_share,
+    afterwards, all of them are used for edges. Unless import_info.edges_ahead is True, the edge phase does not get
+    relatively (with respect to the numbers of vertices and edges in the properties file) further than the vertex
+    phase.
+    :param vertices_filename:
+    :param edges_filename:
+    :param properties_filename:
+    :param db_info:
+    :param bulk_size:
+    :param import_info:
+    :param be_verbose:
+    :param sampler: if given, only the vertices and edges of the sampled subgraph are inserted
+    :param partition: if given, the smart values of the vertices are their parts
+    :param cache: if given, the vertices and edges are taken from it instead of the files
+    :return: None
+    """
+    num_vertices = get_property_graphalytics(properties_filename, 'num_vertices')
+    num_edges = get_property_graphalytics(properties_filename, 'num_edges')
+    num_edge_threads = min(import_info.num_threads - 1,
+                           max(1, round(import_info.num_threads * import_info.edge_share)))
+    num_vertex_threads = import_info.num_threads - num_edge_threads
+    vertex_pool = InsertPool(db_info, num_vertex_threads)
+    edge_pool = InsertPool(db_info, num_edge_threads, max_threads=import_info.num_threads)
+    vertex_progress = _PhaseProgress(num_vertices)
+    # each phase counts the sizes of the encoded values in its own copy of the encoder
+    vertex_encoder = import_info.numeric_encoder.copy()
+    edge_encoder = import_info.numeric_encoder.copy()
+    weight_kind = get_weight_kind_graphalytics(properties_filename)
+    to_v = get_to_vertex_graphalytics(db_info, partition)
+    if be_verbose:
+        print(f'Number of vertices: {num_vertices}, number of edges: {num_edges}, '
+              f'insert threads for vertices/edges: {num_vertex_threads}/{num_edge_threads}')
+
+    def import_vertices():
+        start_v = time.monotonic()
+        with tqdm(total=num_vertices, desc='Importing vertices', mininterval=1.0, unit='vertices', ncols=100,
+                  position=0, disable=not be_verbose) as pbar:
+            failed = True
+            try:
+                for num_read, vids in graphalytics_vertex_batches(vertices_filename, bulk_size, sampler,
+                                                                  import_info.statistics, cache):
+                    vertex_pool.submit(make_vertices_graphalytics(vids, db_info, vertex_encoder, partition),
+                                       db_info.vertices_coll_name)
+                    vertex_progress.update(num_read)
+                    pbar.update(num_read)
+                vertex_pool.join()
+                vertex_encoder.flush()
+                failed = False
+            finally:
+                vertex_progress.finish(failed)
+        # the vertex phase is over, give its capacity to the edges
+        edge_pool.add_threads(num_vertex_threads)
+        return time.monotonic() - start_v
+
+    def import_edges():
+        start_e = time.monotonic()
+        num_done = 0
+        with tqdm(total=num_edges, desc='Importing edges', mininterval=1.0, unit='edges', ncols=100,
+                  position=1, disable=not be_verbose) as pbar:
+            edge_batches = graphalytics_edge_batches(edges_filename, bulk_size, be_verbose, to_v, edge_encoder,
+                                                     weight_kind, import_info.edge_preprocessing, sampler,
+                                                     import_info.statistics, cache)
+            while True:
+                if not import_info.edges_ahead:
+                    vertex_progress.wait_for(num_done / max(num_edges, 1))
+                if vertex_progress.failed:  # the error of the vertex phase is raised below
+                    break
+                num_read, edges = next(edge_batches, (0, None))
+                if edges is None:
+                    break
+                edge_pool.submit(edges, db_info.edge_coll_name)
+                num_done += num_read
+                pbar.update(num_read)
+            edge_pool.join()
+            edge_encoder.flush()
+        return time.monotonic() - start_e
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        vertices_future = executor.submit(import_vertices)
+        edges_future = executor.submit(import_edges)
+        time_v = vertices_future.result()
+        time_e = edges_future.result()
+    if be_verbose:
+        print('Time for vertices: ' + get_time_difference_string(time_v))
+        print('Time for edges: ' + get_time_difference_string(time_e))
 
 
 def import_graphalytics(db_info: DatabaseInfo, vertices_filename, edges_filename,
-                        properties_filename, bulk_size, be_verbose: bool):
+                        properties_filename, bulk_size, be_verbose: bool, import_info: Optional[ImportInfo] = None):
     """
     Create a new smart graph with vertices v_coll and edges edge_coll_name with given parameters.
      If db_info.overwrite is True and the graph and/or the vertex/edge collection exist, they are dropped first.
@@ -162,15 +423,45 @@ def import_graphalytics(db_info: DatabaseInfo, vertices_filename, edges_filename
     :param edges_filename: the name of the file to read edges from
     :param properties_filename: the name of the file containing information about whether the graph should be directed
     :param bulk_size: the num_vertices of bulks
+    :param import_info: further import options, e.g., whether vertices and edges are imported concurrently
     :return: None
     """
+    import_info = import_info or ImportInfo()
 
     if graph_exists(db_info) and not db_info.overwrite:
         if be_verbose:
             print('The graph exists already, not importing it.')
         return
     else:
+        cache = None
+        if import_info.use_cache:
+            cache = get_graphalytics_cache(vertices_filename, edges_filename, bulk_size, be_verbose,
+                                           import_info.cache_dir)
+        partition = None
+        if db_info.isSmart and import_info.partitioning.method:
+            partition = partition_graphalytics(vertices_filename, edges_filename, import_info.partitioning,
+                                               bulk_size, be_verbose, cache)
         create_graph(db_info)
-        read_and_create_vertices_graphalytics(vertices_filename, properties_filename, db_info, bulk_size, be_verbose)
-        read_and_create_edges_graphalytics(edges_filename, properties_filename, db_info, bulk_size, be_verbose)
+        if cache is None:
+            sampler = get_sampler(import_info.sampling, edges_filename, bulk_size, be_verbose)
+        else:
+            sampler = get_sampler(import_info.sampling)
+            if sampler:
+                sampler.prepare_from_adjacency(cache.ids, cache.offsets, cache.targets, be_verbose)
+        if import_info.concurrent_phases:
+            read_and_create_vertices_and_edges_concurrently_graphalytics(vertices_filename, edges_filename,
+                                                                         properties_filename, db_info, bulk_size,
+                                                                         import_info, be_verbose, sampler, partition,
+                                                                         cache)
+        else:
+            read_and_create_vertices_graphalytics(vertices_filename, properties_filename, db_info, bulk_size,
+                                                  be_verbose, import_info.numeric_encoder, sampler,
+                                                  import_info.statistics, partition, cache)
+            read_and_create_edges_graphalytics(edges_filename, properties_filename, db_info, bulk_size, be_verbose,
+                                               import_info.numeric_encoder, import_info.edge_preprocessing, sampler,
+                                               import_info.statistics, partition, cache)
+        if be_verbose and sampler:
+            print(sampler.summary_string())
+        if be_verbose and import_info.numeric_encoder.track_size:
+            print(import_info.numeric_encoder.size_reduction_string())
 
@@ -1,5 +1,7 @@
 from typing import List, Optional
 
+from attribute_encoding import NumericEncoder
+
 
 class DatabaseInfo:
     def __init__(self, endpoint: str,
@@ -13,7 +15,8 @@ class DatabaseInfo:
                  smart_attribute: Optional[str] = None,
                  additional_vertex_attribute: Optional[str] = None,
                  edge_attribute: Optional[str] = None,
-                 username: str = 'root', password: str = ''
+                 username: str = 'root', password: str = '',
+                 dump_writer=None
                  ):
         self.replication_factor = replication_factor
         self.number_of_shards = number_of_shards
@@ -28,12 +31,14 @@ class DatabaseInfo:
         self.vertices_coll_name = vertices_coll_name
         self.graph_name = graph_name
         self.endpoint = endpoint
+        # a DumpWriter if the graph is written into an arangodump directory instead of the database at endpoint
+        self.dump_writer = dump_writer
 
     def copy(self):
         return DatabaseInfo(self.endpoint, self.graph_name, self.vertices_coll_name, self.edge_coll_name,
                             self.isSmart, self.replication_factor, self.number_of_shards, self.overwrite,
                             self.smart_attribute, self.additional_vertex_attribute, self.edge_attribute, self.username,
-                            self.password)
+                            self.password, self.dump_writer)
 
 
 class VertexOrEdgeProperty:
@@ -71,22 +76,208 @@ class CliquesGraphInfo:
         self.prob_missing_all = prob_missing_all
 
 
+class RmatGraphInfo:
+    def __init__(self, scale: int, edge_factor: int, probabilities: List[float], permute_vertices: bool = False):
+        """
+        Information for R-MAT graph construction as in the Graph 500 benchmark: the graph has 2^scale vertices and
+        edge_factor * 2^scale edges. Every edge is placed into the adjacency matrix by choosing one of its quadrants
+        with the probabilities a, b, c, d (top left, top right, bottom left, bottom right) scale times recursively.
+        :param scale:
+        :param edge_factor:
+        :param probabilities: [a, b, c, d], their sum is 1
+        :param permute_vertices: whether the vertex ids are permuted, so that the ids of the vertices with high degrees
+            are not the small ones
+        """
+        self.scale = scale
+        self.edge_factor = edge_factor
+        self.probabilities = probabilities
+        self.permute_vertices = permute_vertices
+
+
+class ErdosRenyiGraphInfo:
+    def __init__(self, num_vertices: int, directed: bool = False, prob_edge: Optional[float] = None,
+                 num_edges: Optional[int] = None):
+        """
+        Information for Erdős–Rényi graph construction: the graph has num_vertices vertices and no self-loops. In
+        G(n, p), every possible edge is present with probability prob_edge, in G(n, m), num_edges edges are chosen
+        uniformly among all possible edges.
+        :param num_vertices:
+        :param directed: whether (i, j) and (j, i) are different possible edges, otherwise, every pair of vertices is
+            at most one edge from the smaller to the larger id
+        :param prob_edge: for G(n, p)
+        :param num_edges: for G(n, m), if given, prob_edge is ignored
+        """
+        self.num_vertices = num_vertices
+        self.directed = directed
+        self.prob_edge = prob_edge
+        self.num_edges = num_edges
+
+
+class BarabasiAlbertGraphInfo:
+    def __init__(self, num_vertices: int, edges_per_vertex: int):
+        """
+        Information for Barabási–Albert graph construction by preferential attachment: the vertices are added one
+        after the other and every new vertex gets edges_per_vertex edges to vertices chosen with probabilities
+        proportional to their degrees.
+        :param num_vertices:
+        :param edges_per_vertex: m, the graph has num_vertices * m edges
+        """
+        self.num_vertices = num_vertices
+        self.edges_per_vertex = edges_per_vertex
+
+
 class GraphInfo:
     def __init__(self,
                  vertex_property: VertexOrEdgeProperty,
-                 edge_property: VertexOrEdgeProperty
+                 edge_property: VertexOrEdgeProperty,
+                 numeric_encoder: Optional[NumericEncoder] = None,
+                 statistics=None,
+                 seed: Optional[int] = None
                  ):
         """
         Information for graph construction.
         :param vertex_property:
         :param edge_property:
+        :param numeric_encoder: how numeric attributes are stored, as strings by default
+        :param statistics: a GraphStatistics collecting statistics of the generated graph or None
+        :param seed: if not None, the random values are derived from it, so that the same graph is generated again
         """
         self.vertex_property = vertex_property
         self.edge_property = edge_property
+        self.numeric_encoder = numeric_encoder or NumericEncoder()
+        self.statistics = statistics
+        self.seed = seed
         self.next_id: int = 0
 
     def copy(self):
-        return GraphInfo(self.vertex_property, self.edge_property)
+        """
+        A copy for another process. Its statistics are empty and must be merged into the original ones.
+        """
+        statistics = self.statistics.empty_copy() if self.statistics is not None else None
+        return GraphInfo(self.vertex_property, self.edge_property, self.numeric_encoder.copy(), statistics, self.seed)
+
+
+class EdgePreprocessingInfo:
+    def __init__(self,
+                 sort: bool = False,
+                 deduplicate: bool = False,
+                 canonicalize_undirected: bool = False,
+                 drop_self_loops: bool = False,
+                 run_size: int = 1000000,
+                 tmp_dir: Optional[str] = None
+                 ):
+        """
+        Information for preprocessing edge files before the import. If any of the flags is True, the edges are sorted
+        in runs of run_size edges that are spilled to disk (into tmp_dir) and merged.
+        :param sort: sort the edges by (from id, to id)
+        :param deduplicate: remove duplicate edges
+        :param canonicalize_undirected: write every edge with the smaller id first
+        :param drop_self_loops: remove edges from a vertex to itself
+        :param run_size: the number of edges sorted in memory at once
+        :param tmp_dir: the directory for the sorted runs, the system default if None
+        """
+        self.sort = sort
+        self.deduplicate = deduplicate
+        self.canonicalize_undirected = canonicalize_undirected
+        self.drop_self_loops = drop_self_loops
+        self.run_size = run_size
+        self.tmp_dir = tmp_dir
+
+    def enabled(self) -> bool:
+        return self.sort or self.deduplicate or self.canonicalize_undirected or self.drop_self_loops
+
+
+class SamplingInfo:
+    def __init__(self,
+                 method: Optional[str] = None,
+                 fraction: float = 0.1,
+                 seeds: Optional[List[str]] = None,
+                 hops: int = 2,
+                 max_vertices: int = 1000000,
+                 random_seed: int = 0
+                 ):
+        """
+        Information for importing a sampled subgraph instead of the whole graph.
+        :param method: None (no sampling), 'edges', 'vertices' or 'snowball'
+        :param fraction: for 'edges' and 'vertices', the fraction of edges or vertices to keep
+        :param seeds: for 'snowball', the ids of the vertices to start from
+        :param hops: for 'snowball', the maximum distance from the seeds
+        :param max_vertices: for 'snowball', the maximum number of vertices to keep
+        :param random_seed: the seed for the random choices and the hash of vertex ids
+        """
+        self.method = method
+        self.fraction = fraction
+        self.seeds = seeds or []
+        self.hops = hops
+        self.max_vertices = max_vertices
+        self.random_seed = random_seed
+
+
+class PartitioningInfo:
+    def __init__(self,
+                 method: Optional[str] = None,
+                 num_parts: int = 5,
+                 imbalance: float = 0.05,
+                 passes: int = 1
+                 ):
+        """
+        Information for assigning the values of the smart attribute so that few edges connect different shards.
+        :param method: None (the vertex id is the smart value) or 'ldg'
+        :param num_parts: the number of parts, i.e., of different smart values
+        :param imbalance: a part may have up to (1 + imbalance) times the average number of vertices
+        :param passes: how often the vertices are streamed through the partitioner
+        """
+        self.method = method
+        self.num_parts = num_parts
+        self.imbalance = imbalance
+        self.passes = passes
+
+
+class ImportInfo:
+    def __init__(self,
+                 concurrent_phases: bool = False,
+                 num_threads: int = 4,
+                 edge_share: float = 0.5,
+                 edges_ahead: bool = False,
+                 numeric_encoder: Optional[NumericEncoder] = None,
+                 edge_preprocessing: Optional[EdgePreprocessingInfo] = None,
+                 sampling: Optional[SamplingInfo] = None,
+                 incremental: bool = False,
+                 metadata_collection: str = 'importer_metadata',
+                 statistics=None,
+                 partitioning: Optional[PartitioningInfo] = None,
+                 use_cache: bool = False,
+                 cache_dir: Optional[str] = None
+                 ):
+        """
+        Information for importing graphs from files.
+        :param concurrent_phases: import vertices and edges at the same time instead of one after another
+        :param num_threads: the number of insert requests in flight at the same time during concurrent import
+        :param edge_share: the share of num_threads used for edges while vertices are being imported
+        :param edges_ahead: if False, the edge import does not get relatively further in its file than the vertex import
+        :param numeric_encoder: how numeric attributes are stored, as strings by default
+        :param edge_preprocessing: how edge files are preprocessed, not at all by default
+        :param sampling: which subgraph is imported, the whole graph by default
+        :param incremental: for edge lists, import only the lines appended since the last import
+        :param metadata_collection: the collection storing how far the files have been imported
+        :param statistics: a GraphStatistics collecting statistics of the imported graph or None
+        :param partitioning: how the values of the smart attribute are assigned, from the vertex ids by default
+        :param use_cache: for Graphalytics files, read the graph from a binary cache, which is written if necessary
+        :param cache_dir: the directory containing the caches, by default the directory of the edge file
+        """
+        self.concurrent_phases = concurrent_phases
+        self.num_threads = num_threads
+        self.edge_share = edge_share
+        self.edges_ahead = edges_ahead
+        self.numeric_encoder = numeric_encoder or NumericEncoder()
+        self.edge_preprocessing = edge_preprocessing or EdgePreprocessingInfo()
+        self.sampling = sampling or SamplingInfo()
+        self.incremental = incremental
+        self.metadata_collection = metadata_collection
+        self.statistics = statistics
+        self.partitioning = partitioning or PartitioningInfo()
+        self.use_cache = use_cache
+        self.cache_dir = cache_dir
 
 
 class CliquesHelper:
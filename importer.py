@@ -2,11 +2,17 @@
 import argparse
 import time
 
-from arguments import make_global_parameters, make_database_parameters, make_importer_files_parameters
+from arguments import make_global_parameters, make_database_parameters, make_importer_files_parameters, \
+    make_import_parameters, make_numeric_encoding_parameters, make_edge_preprocessing_parameters, \
+    make_sampling_parameters, make_incremental_parameters, make_metadata_parameters, make_statistics_parameters, \
+    make_partitioning_parameters, make_cache_parameters, database_mult_collections, make_dump_parameters
+from binary_importer import import_binary_edges, BINARY_SOURCE_TYPES
+from dump_writer import get_dump_writer
 from edge_list import import_edge_list
-from general import get_time_difference_string
+from general import get_time_difference_string, get_import_info, write_statistics
 from graphalytics_importer import import_graphalytics_get_files, import_graphalytics
 from helper_classes import DatabaseInfo, GraphInfo, VertexOrEdgeProperty
+from multi_collection_importer import import_multi_collection_graph
 
 
 def get_arguments():
@@ -14,10 +20,21 @@ def get_arguments():
 
     make_global_parameters(parser)
     make_database_parameters(parser)
+    database_mult_collections(parser)
     make_importer_files_parameters(parser)
+    make_import_parameters(parser)
+    make_numeric_encoding_parameters(parser)
+    make_edge_preprocessing_parameters(parser)
+    make_sampling_parameters(parser)
+    make_incremental_parameters(parser)
+    make_metadata_parameters(parser)
+    make_statistics_parameters(parser)
+    make_partitioning_parameters(parser)
+    make_cache_parameters(parser)
+    make_dump_parameters(parser)
 
     parser.add_argument('sourcetype', type=str, nargs='?', default='edge-list',
-                        choices=['edge-list', 'graphalytics'],
+                        choices=['edge-list', 'graphalytics', 'multi-collection'] + BINARY_SOURCE_TYPES,
                         help='Source kind')
 
     arguments = parser.parse_args()
@@ -32,6 +49,25 @@ def get_arguments():
     if arguments.sourcetype == 'edge-list' and not arguments.edges_file_edge_list:
         raise Exception(
             'With sourcetype edge-list, edges_file_edge_list must be given.')
+    if arguments.sourcetype in BINARY_SOURCE_TYPES and not arguments.edges_file_binary:
+        raise Exception(
+            f'With sourcetype {arguments.sourcetype}, edges_file_binary must be given.')
+    if arguments.sourcetype == 'multi-collection' and not arguments.manifest:
+        raise Exception('With sourcetype multi-collection, manifest must be given.')
+    if arguments.sourcetype == 'multi-collection' and (arguments.sample or arguments.statistics_file or
+                                                       arguments.statistics_to_db):
+        raise Exception('Sampling and statistics are not supported for sourcetype multi-collection.')
+    if arguments.incremental and arguments.sourcetype != 'edge-list':
+        raise Exception('--incremental is only supported for sourcetype edge-list.')
+    if arguments.smart_partitioner and (arguments.sourcetype != 'graphalytics' or not arguments.make_smart):
+        raise Exception('--smart_partitioner is only supported for sourcetype graphalytics with --make_smart.')
+    if arguments.dump_dir and (arguments.incremental or arguments.statistics_to_db):
+        raise Exception('--dump_dir cannot be combined with --incremental and --statistics_to_db.')
+    if arguments.dump_dir and (arguments.vertex_collections or arguments.edge_collections):
+        raise Exception('--dump_dir cannot be combined with --vertex_collections and --edge_collections, a dump '
+                        'always contains the whole graph.')
+    if arguments.cache and arguments.sourcetype != 'graphalytics':
+        raise Exception('--cache is only supported for sourcetype graphalytics.')
 
     return arguments
 
@@ -43,11 +79,12 @@ if __name__ == "__main__":
     db_info = DatabaseInfo(args.endpoint, args.graphname, args.vertex_collection_name,
                            args.edge_collection_name, args.make_smart,
                            args.repl_factor, args.num_shards, args.overwrite, args.smart_attribute,
-                           '', 'weight', args.user, args.pwd)
+                           '', 'weight', args.user, args.pwd, get_dump_writer(args))
 
     vertex_property = VertexOrEdgeProperty('none')
     edge_property = VertexOrEdgeProperty('none')
     graph_info = GraphInfo(vertex_property=vertex_property, edge_property=edge_property)
+    import_info = get_import_info(args)
 
     if args.sourcetype == 'graphalytics':
         if args.dir_graphalytics:
@@ -60,13 +97,39 @@ if __name__ == "__main__":
 
         start = time.monotonic()
         import_graphalytics(db_info, vertices_filename, edges_filename, properties_filename, args.bulk_size,
-                            not args.silent)
+                            not args.silent, import_info)
+        if db_info.dump_writer:
+            db_info.dump_writer.finish()
+        write_statistics(import_info.statistics, args, db_info, not args.silent)
         if not args.silent:
             print('Total time: ' + get_time_difference_string(time.monotonic() - start))
         exit(0)
     if args.sourcetype == 'edge-list':
         start = time.monotonic()
-        import_edge_list(db_info, args.edges_file_edge_list, args.bulk_size, not args.silent)
+        import_edge_list(db_info, args.edges_file_edge_list, args.bulk_size, not args.silent, import_info)
+        if db_info.dump_writer:
+            db_info.dump_writer.finish()
+        write_statistics(import_info.statistics, args, db_info, not args.silent)
+        if not args.silent:
+            print('Total time: ' + get_time_difference_string(time.monotonic() - start))
+        exit(0)
+    if args.sourcetype == 'multi-collection':
+        start = time.monotonic()
+        import_multi_collection_graph(db_info, args.manifest, args.bulk_size, not args.silent, import_info,
+                                      args.vertex_collections, args.edge_collections)
+        if db_info.dump_writer:
+            db_info.dump_writer.finish()
+        if not args.silent:
+            print('Total time: ' + get_time_difference_string(time.monotonic() - start))
+        exit(0)
+    if args.sourcetype in BINARY_SOURCE_TYPES:
+        start = time.monotonic()
+        import_binary_edges(db_info, args.sourcetype, args.edges_file_binary, args.bulk_size, not args.silent,
+                            args.binary_id_type, args.source_column, args.target_column, args.weight_column,
+                            args.property_columns, import_info)
+        if db_info.dump_writer:
+            db_info.dump_writer.finish()
+        write_statistics(import_info.statistics, args, db_info, not args.silent)
         if not args.silent:
             print('Total time: ' + get_time_difference_string(time.monotonic() - start))
         exit(0)
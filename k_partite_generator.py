@@ -1,40 +1,33 @@
 import random
-from tqdm import trange
+from typing import Optional, Tuple
 
-from edges_generator import make_edges_connect_parts
-from general import create_graph, insert_documents, graph_exists
+from generator_pool import PartsGenerator, generate_graph, prepare_graph
 from helper_classes import DatabaseInfo, GraphInfo, CliquesGraphInfo, CliquesHelper
-from vertices_generator import make_and_insert_vertices
 
 
 def create_k_partite_graph(db_info: DatabaseInfo,
                            graph_info: GraphInfo,
                            parts_graph_info: CliquesGraphInfo,
                            bulk_size: int,
+                           num_processes: Optional[int] = None,
+                           num_insert_threads: int = 0,
+                           shard: Optional[Tuple[int, int]] = None,
                            be_verbose=True
                            ) -> None:
-    if db_info.overwrite or not graph_exists(db_info):
-        create_graph(db_info)
-    else:
-        if be_verbose:
-            print(f'The graph {db_info.graph_name} exists already, skipping. To overwrite, use \'--overwrite\'.')
+    """
+    Create a k-partite graph with parts_graph_info.num_cliques parts with random sizes. The vertices and the edges
+    between the parts (size1 * size2 pairs per pair of parts, each missing with probability
+    parts_graph_info.prob_missing_one_between) are split into tasks by their expected number of documents and made by
+    num_processes processes (by default, one per core) and sent by num_insert_threads threads, see generator_pool.py.
+    With shard = (i, n), only the slice i of n slices of the graph is made.
+    """
+    if not prepare_graph(db_info, shard, be_verbose):
         return
 
-    # create the cliques
-
+    sizes = random.Random(graph_info.seed)
     c_helper = CliquesHelper()
-    if be_verbose:
-        generator_ = trange(parts_graph_info.num_cliques, total=parts_graph_info.num_cliques,
-                            desc='Creating parts',
-                            mininterval=1.0,
-                            unit='parts', ncols=100)
-    else:
-        generator_ = range(parts_graph_info.num_cliques)
-    for i in generator_:
-        size = random.randint(parts_graph_info.min_size_clique, parts_graph_info.max_size_clique)
-        make_and_insert_vertices(db_info, graph_info, size, bulk_size, add_part=True, c_helper=c_helper)
+    for _ in range(parts_graph_info.num_cliques):
+        c_helper.update(sizes.randint(parts_graph_info.min_size_clique, parts_graph_info.max_size_clique))
 
-    # create edges between cliques
-    # todo finish making parallel
-    for edges in make_edges_connect_parts(c_helper, bulk_size, 0.0, 0.0, db_info, graph_info, be_verbose):
-        insert_documents(db_info, edges, db_info.edge_coll_name)
+    generate_graph(db_info, graph_info, PartsGenerator(c_helper, parts_graph_info, with_cliques=False), bulk_size,
+                   num_processes, num_insert_threads, shard, be_verbose)
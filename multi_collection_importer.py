@@ -0,0 +1,192 @@
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Dict
+
+from tqdm import tqdm
+
+from attribute_encoding import NumericEncoder
+from edge_preprocessing import read_edge_lines
+from general import file_reader, create_graph_with_collections, get_time_difference_string, graph_exists, InsertPool, \
+    collection_exists, truncate_collection
+from graphalytics_importer import make_vertices_graphalytics
+from helper_classes import DatabaseInfo, ImportInfo
+from vertices_generator import ConverterToVertex
+
+
+class CollectionFile:
+    def __init__(self, collection: str, filename: str, from_collection: Optional[str] = None,
+                 to_collection: Optional[str] = None):
+        """
+        A file of a manifest and the collection it is imported into. Vertex files contain one vertex id per line,
+        edge files one edge per line in the form <from id> <to id> [<weight>], where the from vertex is in
+        from_collection and the to vertex in to_collection.
+        :param collection: the name of the collection
+        :param filename: the name of the file
+        :param from_collection: for edge files, the vertex collection of the from vertices, None for vertex files
+        :param to_collection: for edge files, the vertex collection of the to vertices, None for vertex files
+        """
+        self.collection = collection
+        self.filename = filename
+        self.from_collection = from_collection
+        self.to_collection = to_collection
+
+    def is_edge_file(self) -> bool:
+        return self.from_collection is not None
+
+
+def read_manifest(manifest_filename: str) -> List[CollectionFile]:
+    """
+    Read the JSON manifest of a graph with several collections, e.g.,
+        {"vertices": [{"collection": "persons", "file": "persons.v"},
+                      {"collection": "companies", "file": "companies.v"}],
+         "edges": [{"collection": "knows", "file": "knows.e", "from": "persons", "to": "persons"},
+                   {"collection": "worksAt", "file": "works_at.e", "from": "persons", "to": "companies"}]}
+    Relative file names are relative to the directory of the manifest. Several files may go into the same collection.
+    :param manifest_filename:
+    :return: the vertex files followed by the edge files
+    """
+    with open(manifest_filename, 'r') as f:
+        manifest = json.load(f)
+    directory = os.path.dirname(os.path.abspath(manifest_filename))
+    files = []
+    for entry in manifest.get('vertices', []):
+        if 'collection' not in entry or 'file' not in entry:
+            raise RuntimeError(f'Every vertex entry of the manifest needs "collection" and "file": {entry}')
+        files.append(CollectionFile(entry['collection'], os.path.join(directory, entry['file'])))
+    for entry in manifest.get('edges', []):
+        if any(key not in entry for key in ['collection', 'file', 'from', 'to']):
+            raise RuntimeError(f'Every edge entry of the manifest needs "collection", "file", "from" and "to": '
+                               f'{entry}')
+        files.append(CollectionFile(entry['collection'], os.path.join(directory, entry['file']), entry['from'],
+                                    entry['to']))
+    vertex_collections = {f.collection for f in files if not f.is_edge_file()}
+    edge_collections = {f.collection for f in files if f.is_edge_file()}
+    if vertex_collections & edge_collections:
+        raise RuntimeError(f'The collections {sorted(vertex_collections & edge_collections)} are given as vertex and '
+                           f'as edge collections in the manifest.')
+    if not files:
+        raise RuntimeError(f'The manifest {manifest_filename} contains no files.')
+    return files
+
+
+def get_graph_collections(files: List[CollectionFile]):
+    """
+    Return the names of the vertex collections (the ones with vertex files and the ones edges point to) and the edge
+    definitions of the graph. If several edge files go into the same collection, its definition contains the from
+    and to collections of all of them.
+    """
+    vertex_collections: List[str] = []
+    definitions: Dict[str, dict] = dict()
+    for file in files:
+        if file.is_edge_file():
+            definition = definitions.setdefault(file.collection, {"collection": file.collection, "from": [], "to": []})
+            if file.from_collection not in definition['from']:
+                definition['from'].append(file.from_collection)
+            if file.to_collection not in definition['to']:
+                definition['to'].append(file.to_collection)
+            new_collections = [file.from_collection, file.to_collection]
+        else:
+            new_collections = [file.collection]
+        vertex_collections += [c for c in new_collections if c not in vertex_collections]
+    return vertex_collections, list(definitions.values())
+
+
+def make_edges_multi_collection(eids, from_v, to_v, numeric_encoder: NumericEncoder):
+    edges = list()
+    for i in eids:
+        if i[0] == '#' or i[0] == '/' or i[0] == '%':
+            continue
+        e = i.split(' ', 2)
+        if len(e) == 2:  # no weight given
+            f, t = e
+            edges.append({"_from": from_v(f), "_to": to_v(t)})  # Null will be inserted
+        else:
+            f, t, w = e
+            edges.append({"_from": from_v(f), "_to": to_v(t), "weight": numeric_encoder.token_value(w, 'auto')})
+    return edges
+
+
+def import_multi_collection_graph(db_info: DatabaseInfo, manifest_filename: str, bulk_size, be_verbose: bool,
+                                  import_info: Optional[ImportInfo] = None,
+                                  vertex_collections: Optional[List[str]] = None,
+                                  edge_collections: Optional[List[str]] = None):
+    """
+    Create the graph db_info.graph_name with the vertex collections and edge definitions of the manifest (see
+    read_manifest()) and import all its files at the same time. The files share the insert capacity of
+    import_info.num_threads requests in flight; at most that many files are read at the same time, the largest ones
+    first. As ArangoDB does not require that _from and _to exist when an edge is inserted, vertex and edge files are
+    not ordered. The vertex documents are made as for Graphalytics graphs.
+    If vertex_collections and/or edge_collections are given, only the files of the collections in them are imported,
+    also into an existing graph, e.g., one imported with another selection before; with db_info.overwrite, only the
+    selected collections are truncated first.
+    :param db_info: database info, the collection names in it are not used
+    :param manifest_filename:
+    :param bulk_size:
+    :param be_verbose:
+    :param import_info: further import options, the number of threads, the numeric encoding and edge preprocessing
+           are used
+    :param vertex_collections: the vertex collections whose files are imported, see above
+    :param edge_collections: the edge collections whose files are imported, see above
+    :return: None
+    """
+    import_info = import_info or ImportInfo()
+    files = read_manifest(manifest_filename)
+    graph_vertex_collections, edge_definitions = get_graph_collections(files)
+
+    selected = vertex_collections is not None or edge_collections is not None
+    if selected:
+        selected_collections = set((vertex_collections or []) + (edge_collections or []))
+        files = [f for f in files if f.collection in selected_collections]
+    if not graph_exists(db_info):
+        create_graph_with_collections(db_info, graph_vertex_collections, edge_definitions)
+    elif not selected:
+        if not db_info.overwrite:
+            if be_verbose:
+                print('The graph exists already, not importing it.')
+            return
+        create_graph_with_collections(db_info, graph_vertex_collections, edge_definitions)
+    else:  # import the selected collections into the existing graph, leave the others alone
+        for collection in sorted({f.collection for f in files}):
+            if not collection_exists(db_info, collection):
+                raise RuntimeError(f'The collection {collection} is not in the existing graph {db_info.graph_name}, '
+                                   f'import the whole manifest into a new graph.')
+            if db_info.overwrite:
+                truncate_collection(db_info, collection)
+    files.sort(key=lambda f: os.path.getsize(f.filename), reverse=True)
+
+    pool = InsertPool(db_info, import_info.num_threads)
+    if be_verbose:
+        print(f'Importing {len(files)} files into {len(graph_vertex_collections)} vertex and '
+              f'{len(edge_definitions)} edge collections with {import_info.num_threads} insert threads.')
+
+    def import_file(file: CollectionFile, pbar: tqdm):
+        start = time.monotonic()
+        encoder = import_info.numeric_encoder.copy()
+        if file.is_edge_file():
+            from_v = ConverterToVertex(file.from_collection).idx_to_smart_vertex
+            to_v = ConverterToVertex(file.to_collection).idx_to_smart_vertex
+            for eids in read_edge_lines(file.filename, bulk_size, import_info.edge_preprocessing, be_verbose):
+                pool.submit(make_edges_multi_collection(eids, from_v, to_v, encoder), file.collection)
+                pbar.update(len(eids))
+        else:
+            for vids in file_reader(file.filename, bulk_size):
+                pool.submit(make_vertices_graphalytics(vids, db_info, encoder), file.collection)
+                pbar.update(len(vids))
+        encoder.flush()
+        return time.monotonic() - start
+
+    start_import = time.monotonic()
+    with tqdm(desc='Importing documents', mininterval=1.0, unit='documents', ncols=100,
+              disable=not be_verbose) as pbar:
+        with ThreadPoolExecutor(max_workers=max(1, min(len(files), import_info.num_threads))) as executor:
+            futures = [executor.submit(import_file, file, pbar) for file in files]
+            times = [future.result() for future in futures]
+        pool.join()
+    if be_verbose:
+        for file, t in zip(files, times):
+            print(f'Time for {file.filename} ({file.collection}): {get_time_difference_string(t)}')
+        print('Time for all files: ' + get_time_difference_string(time.monotonic() - start_import))
+        if import_info.numeric_encoder.track_size:
+            print(import_info.numeric_encoder.size_reduction_string())
@@ -0,0 +1,187 @@
+import math
+import time
+from typing import Tuple, List, Optional
+
+import numpy as np
+from tqdm import tqdm
+
+from edge_preprocessing import COMMENT_CHARACTERS
+from general import file_reader, get_time_difference_string
+from graph_cache import GraphCache
+from helper_classes import PartitioningInfo
+
+PARTITIONERS = ['ldg']
+LDG_BLOCK_SIZE = 256  # the vertices placed at the same time by ldg_partition()
+
+
+class VertexPartition:
+    """
+    An assignment of the vertices (given by their integer ids) to the parts 0..num_parts-1. The part of a vertex is
+    used as the value of its smart attribute, so that the vertices of a part are in the same shard.
+    """
+
+    def __init__(self, ids: np.ndarray, parts: np.ndarray, num_parts: int):
+        """
+        :param ids: the sorted vertex ids
+        :param parts: parts[i] is the part of the vertex ids[i]
+        :param num_parts:
+        """
+        self.ids = ids
+        self.parts = parts
+        self.num_parts = num_parts
+        self.dense_parts = None
+        # Graphalytics ids are usually (almost) 0..n-1, then a part is looked up without a search
+        if len(parts) and ids[0] >= 0 and ids[-1] < 2 * len(ids) + 1024:
+            self.dense_parts = np.full(ids[-1] + 1, -1, dtype=np.int32)
+            self.dense_parts[ids] = parts
+            self.dense_parts = self.dense_parts.tolist()
+
+    def indexes(self, ids: np.ndarray) -> np.ndarray:
+        """
+        The positions of the given vertex ids in self.ids. Raises a RuntimeError if an id is unknown.
+        """
+        indexes = np.minimum(np.searchsorted(self.ids, ids), len(self.ids) - 1)
+        if len(ids) and not np.array_equal(self.ids[indexes], ids):
+            unknown = ids[self.ids[indexes] != ids][0]
+            raise RuntimeError(f'The vertex {unknown} of an edge is not in the vertex file.')
+        return indexes
+
+    def part_of(self, vertex_id: str) -> str:
+        if self.dense_parts is not None:
+            vid = int(vertex_id)
+            if 0 <= vid < len(self.dense_parts) and self.dense_parts[vid] >= 0:
+                return str(self.dense_parts[vid])
+            raise RuntimeError(f'The vertex {vertex_id} of an edge is not in the vertex file.')
+        return str(self.parts[self.indexes(np.array([int(vertex_id)], dtype=np.int64))[0]])
+
+    def smart_values(self, vertex_ids: List[str]) -> List[str]:
+        indexes = self.indexes(np.array(vertex_ids, dtype=np.int64))
+        return [str(part) for part in self.parts[indexes].tolist()]
+
+
+def read_edges_as_indexes(edges_filename: str, ids: np.ndarray, bulk_size: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Read the edge file (lines <from id> <to id> [<weight>]) and return the from and to vertices as positions in ids.
+    """
+    partition = VertexPartition(ids, np.zeros(0, dtype=np.int32), 0)
+    sources, targets = [], []
+    for lines in file_reader(edges_filename, bulk_size):
+        pairs = [line.split(' ', 2)[:2] for line in lines if line and line[0] not in COMMENT_CHARACTERS]
+        if not pairs:
+            continue
+        pairs = np.array(pairs, dtype=np.int64)
+        sources.append(partition.indexes(pairs[:, 0]).astype(np.int32))
+        targets.append(partition.indexes(pairs[:, 1]).astype(np.int32))
+    if not sources:
+        return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32)
+    return np.concatenate(sources), np.concatenate(targets)
+
+
+def undirected_adjacency(num_vertices: int, sources: np.ndarray, targets: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    The adjacency of the underlying undirected graph in CSR form: the neighbours of v are
+    neighbours[offsets[v]:offsets[v + 1]].
+    """
+    ends = np.concatenate((sources, targets))
+    others = np.concatenate((targets, sources))
+    order = np.argsort(ends, kind='stable')
+    offsets = np.zeros(num_vertices + 1, dtype=np.int64)
+    np.cumsum(np.bincount(ends, minlength=num_vertices), out=offsets[1:])
+    return offsets, others[order]
+
+
+def ldg_partition(offsets: np.ndarray, neighbours: np.ndarray, num_parts: int, imbalance: float, passes: int,
+                  be_verbose: bool) -> np.ndarray:
+    """
+    Linear deterministic greedy partitioning: the vertices are streamed in the order of their ids, every vertex is put
+    into the part that contains most of its already placed neighbours, weighted by how much room the part has left.
+    No part gets more than (1 + imbalance) * num_vertices / num_parts vertices. Further passes stream the vertices
+    again, now knowing the parts of all neighbours, which usually reduces the edge-cut considerably.
+    To vectorize the stream, the vertices are placed in blocks of LDG_BLOCK_SIZE consecutive ids that do not see the
+    placements of each other in the same pass. If more vertices of a block choose a part than it has room for, the
+    ones with the smaller ids are put there and the others choose again. Vertices without placed neighbours fill up
+    the smallest parts.
+    :return: the parts of the vertices
+    """
+    num_vertices = len(offsets) - 1
+    capacity = max(1, int(math.ceil((1 + imbalance) * num_vertices / num_parts)))
+    parts = np.full(num_vertices, -1, dtype=np.int32)
+    sizes = np.zeros(num_parts, dtype=np.int64)
+    for p in range(passes):
+        with tqdm(total=num_vertices, desc=f'Partitioning (pass {p + 1}/{passes})', mininterval=1.0,
+                  unit='vertices', ncols=100, disable=not be_verbose) as pbar:
+            for first in range(0, num_vertices, LDG_BLOCK_SIZE):
+                end = min(first + LDG_BLOCK_SIZE, num_vertices)
+                old_parts = parts[first:end]
+                sizes -= np.bincount(old_parts[old_parts >= 0], minlength=num_parts)
+                # counts[i, q]: the number of neighbours of the vertex first + i in the part q
+                owners = np.repeat(np.arange(end - first), np.diff(offsets[first:end + 1]))
+                neighbour_parts = parts[neighbours[offsets[first]:offsets[end]]]
+                placed = neighbour_parts >= 0
+                counts = np.bincount(owners[placed] * num_parts + neighbour_parts[placed],
+                                     minlength=(end - first) * num_parts).reshape(end - first, num_parts)
+                pending = np.arange(end - first)
+                while len(pending):
+                    room = capacity - sizes
+                    scores = counts[pending] * (1.0 - sizes / capacity)
+                    scores[:, room <= 0] = -1.0
+                    best_scores = scores.max(axis=1)
+                    # among the best, the smallest part
+                    chosen = np.where(scores == best_scores[:, None], sizes, np.iinfo(np.int64).max).argmin(axis=1)
+                    free = best_scores <= 0
+                    num_free = int(np.count_nonzero(free))
+                    if num_free:
+                        by_size = np.argsort(sizes, kind='stable')
+                        chosen[free] = np.repeat(by_size, np.clip(room[by_size], 0, num_free))[:num_free]
+                    # the first vertices choosing a part are put there, as many as it has room for
+                    order = np.argsort(chosen, kind='stable')
+                    ranks = np.empty(len(chosen), dtype=np.int64)
+                    ranks[order] = np.arange(len(chosen)) - np.searchsorted(chosen[order], chosen[order])
+                    accepted = ranks < room[chosen]
+                    parts[first + pending[accepted]] = chosen[accepted]
+                    sizes += np.bincount(chosen[accepted], minlength=num_parts)
+                    pending = pending[~accepted]
+                pbar.update(end - first)
+    return parts
+
+
+def edge_cut(parts: np.ndarray, sources: np.ndarray, targets: np.ndarray) -> float:
+    """
+    The fraction of the edges whose endpoints are in different parts.
+    """
+    if len(sources) == 0:
+        return 0.0
+    return float(np.count_nonzero(parts[sources] != parts[targets])) / len(sources)
+
+
+def partition_graphalytics(vertices_filename: str, edges_filename: str, info: PartitioningInfo, bulk_size: int,
+                           be_verbose: bool, cache: Optional[GraphCache] = None) -> VertexPartition:
+    """
+    Partition the vertices of a Graphalytics graph according to info. The partition and the edge-cut it predicts are
+    computed on the client before anything is imported. This needs memory for the edges as two integer arrays (in both
+    directions).
+    :param vertices_filename:
+    :param edges_filename:
+    :param info:
+    :param bulk_size:
+    :param be_verbose:
+    :param cache: if given, the graph is taken from the cache instead of the files
+    :return: the partition
+    """
+    start = time.monotonic()
+    if cache is not None:
+        ids, sources, targets = cache.ids, cache.source_indexes(), cache.targets
+    else:
+        vertex_ids = [np.array(vids, dtype=np.int64) for vids in file_reader(vertices_filename, bulk_size)]
+        ids = np.sort(np.concatenate(vertex_ids)) if vertex_ids else np.zeros(0, dtype=np.int64)
+        sources, targets = read_edges_as_indexes(edges_filename, ids, bulk_size)
+    offsets, neighbours = undirected_adjacency(len(ids), sources, targets)
+    parts = ldg_partition(offsets, neighbours, info.num_parts, info.imbalance, info.passes, be_verbose)
+    if be_verbose:
+        cut = edge_cut(parts, sources, targets)
+        sizes = np.bincount(parts, minlength=info.num_parts)
+        print(f'Partitioned {len(ids)} vertices into {info.num_parts} parts in '
+              f'{get_time_difference_string(time.monotonic() - start)}. Predicted edge-cut: {cut:.1%} of '
+              f'{len(sources)} edges cross parts (with the vertex ids as smart values: about '
+              f'{1 - 1 / info.num_parts:.1%}). Part sizes: {sizes.min()} to {sizes.max()} vertices.')
+    return VertexPartition(ids, parts, info.num_parts)
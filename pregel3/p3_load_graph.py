@@ -9,7 +9,7 @@ import requests
 
 from arguments import make_global_parameters, make_database_input_parameters, make_pregel_parameters, \
     database_parameters, database_mult_collections, query_parameters
-from general import arangodIsRunning
+from general import arangodIsReachable
 from helper_classes import DatabaseInfo
 
 
@@ -46,8 +46,8 @@ if __name__ == "__main__":
     db_info = DatabaseInfo(args.endpoint, args.graphname,
                            isSmart=True, username=args.user, password=args.pwd)
 
-    if not arangodIsRunning():
-        raise RuntimeError('The process "arangod" is not running, please, run it first.')
+    if not arangodIsReachable(args.endpoint):
+        raise RuntimeError(f'No server answers at {args.endpoint}, please, start arangod first.')
 
     print(args)
 
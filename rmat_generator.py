@@ -0,0 +1,118 @@
+import random
+from typing import List, Optional, Tuple, Iterable
+
+import numpy as np
+
+from edges_generator import MIN_BLOCK_SIZE, in_bulks, make_edge_documents, vertex_id_list
+from generator_pool import Task, create_generated_graph, make_range_tasks, make_range_vertices, RMAT_VERTICES_TASK, \
+    RMAT_EDGES_TASK
+from helper_classes import DatabaseInfo, GraphInfo, RmatGraphInfo
+
+NUM_PERMUTATION_ROUNDS = 3
+
+
+def rmat_edges(num_edges: int, scale: int, probabilities: List[float],
+               rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Return the from and to vertices of num_edges R-MAT edges: for every edge, one bit of both vertices is chosen per
+    level by choosing a quadrant with probabilities a, b, c, d, for all edges at once.
+    """
+    a, b, c, _ = probabilities
+    froms = np.zeros(num_edges, dtype=np.int64)
+    tos = np.zeros(num_edges, dtype=np.int64)
+    for _ in range(scale):
+        r = rng.random(num_edges)
+        from_bits = r >= a + b  # the bottom quadrants c and d
+        to_bits = ((r >= a) & (r < a + b)) | (r >= a + b + c)  # the right quadrants b and d
+        froms = (froms << 1) | from_bits
+        tos = (tos << 1) | to_bits
+    return froms, tos
+
+
+def permute_ids(ids: np.ndarray, scale: int, keys: List[Tuple[int, int]]) -> np.ndarray:
+    """
+    Map ids in [0, 2^scale) by a bijection of [0, 2^scale) given by keys: in every round, the ids are multiplied by an
+    odd number and shifted modulo 2^scale and their upper half is xor-ed into their lower half. So no table of 2^scale
+    ids is needed.
+    """
+    mask = np.uint64((1 << scale) - 1)
+    shift = np.uint64(max(1, scale // 2))
+    x = ids.astype(np.uint64)
+    for multiplier, offset in keys:
+        x = (x * np.uint64(multiplier) + np.uint64(offset)) & mask
+        x ^= x >> shift
+    return x.astype(np.int64)
+
+
+class RmatGenerator:
+    """
+    Make the documents of an R-MAT graph described in rmat_info with generator_pool.run_generator_tasks(): the
+    vertices 0, ..., 2^scale - 1 and the edges, split into tasks by their indexes. The edges are made in blocks as
+    NumPy arrays. As in the Graph 500 benchmark, duplicate edges and self-loops are kept. If the vertices are permuted,
+    the permutation is drawn from permutation_seed (if not None) when the generator is made and is the same in all
+    processes.
+    """
+
+    def __init__(self, rmat_info: RmatGraphInfo, permutation_seed: Optional[int] = None):
+        self.rmat_info = rmat_info
+        keys = random.Random(permutation_seed)
+        self.permutation_keys = [(keys.getrandbits(61) | 1, keys.getrandbits(61))
+                                 for _ in range(NUM_PERMUTATION_ROUNDS)] if rmat_info.permute_vertices else None
+
+    def num_vertices(self) -> int:
+        return 1 << self.rmat_info.scale
+
+    def num_edges(self) -> int:
+        return self.rmat_info.edge_factor << self.rmat_info.scale
+
+    def make_tasks(self, num_tasks: int) -> List[Tuple[float, Task]]:
+        """
+        Split the vertices and the edges into tasks of at most about 1 / num_tasks of all documents and return them
+        with their costs, the numbers of documents, the most expensive ones first.
+        """
+        return make_range_tasks([(RMAT_VERTICES_TASK, self.num_vertices()), (RMAT_EDGES_TASK, self.num_edges())],
+                                num_tasks)
+
+    def make_documents(self, task: Task, db_info: DatabaseInfo, graph_info: GraphInfo, bulk_size: int,
+                       rng: np.random.Generator) -> Iterable[Tuple[bool, List[dict]]]:
+        """
+        Yield the documents of the task in lists of (at most) bulk_size documents, each with True for edges and False
+        for vertices.
+        """
+        kind, first, end, _ = task
+        if kind == RMAT_VERTICES_TASK:
+            yield from make_range_vertices(db_info, graph_info, first, end, bulk_size)
+            return
+
+        rmat_info = self.rmat_info
+        block_size = max(bulk_size, MIN_BLOCK_SIZE)
+
+        def edge_blocks():
+            for start in range(first, end, block_size):
+                froms, tos = rmat_edges(min(block_size, end - start), rmat_info.scale, rmat_info.probabilities, rng)
+                if self.permutation_keys:
+                    froms = permute_ids(froms, rmat_info.scale, self.permutation_keys)
+                    tos = permute_ids(tos, rmat_info.scale, self.permutation_keys)
+                yield make_edge_documents(vertex_id_list(db_info, froms), vertex_id_list(db_info, tos), db_info,
+                                          graph_info, rng)
+
+        for edges in in_bulks(edge_blocks(), bulk_size):
+            yield True, edges
+
+
+def create_rmat_graph(db_info: DatabaseInfo,
+                      graph_info: GraphInfo,
+                      rmat_info: RmatGraphInfo,
+                      bulk_size: int,
+                      num_processes: Optional[int] = None,
+                      num_insert_threads: int = 0,
+                      shard: Optional[Tuple[int, int]] = None,
+                      be_verbose: bool = True
+                      ) -> None:
+    """
+    Create an R-MAT graph as described in rmat_info. The vertices and the edges are made by num_processes processes
+    (by default, one per core) and sent by num_insert_threads threads, see generator_pool.py. With shard = (i, n),
+    only the slice i of n slices of the graph is made.
+    """
+    create_generated_graph(db_info, graph_info, RmatGenerator(rmat_info, graph_info.seed), bulk_size, num_processes,
+                           num_insert_threads, shard, be_verbose)
@@ -0,0 +1,218 @@
+import hashlib
+import random
+from typing import Iterable, List, Optional, Set
+
+import numpy as np
+
+from edge_preprocessing import COMMENT_CHARACTERS
+from general import file_reader
+from helper_classes import SamplingInfo
+
+SAMPLING_METHODS = ['edges', 'vertices', 'snowball']
+
+_MASK_64 = (1 << 64) - 1
+
+
+def _mix64(x: int) -> int:
+    """
+    The finalizer of splitmix64, a bijection on 64-bit integers that spreads the bits of x.
+    """
+    x = (x + 0x9E3779B97F4A7C15) & _MASK_64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK_64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK_64
+    return x ^ (x >> 31)
+
+
+def _mix64_array(x: np.ndarray) -> np.ndarray:
+    """
+    _mix64 for an array of integers. Multiplications of uint64 arrays wrap around as needed.
+    """
+    x = x.astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+class Sampler:
+    """
+    Choose a subgraph of a graph while its files are streamed:
+    - 'edges': every edge is kept independently with probability info.fraction, all vertices are kept;
+    - 'vertices': every vertex is kept if a hash of its id is below info.fraction, an edge is kept if both its endpoints
+      are kept. As the decision only depends on the id, vertices and edges are consistent in a single pass.
+    - 'snowball': the vertices at distance at most info.hops from info.seeds (in both directions), but at most
+      info.max_vertices of them, and the edges between them. The vertices are collected in prepare() with one pass
+      over the edge file per hop or, for a cached graph, in prepare_from_adjacency() without reading the file.
+    """
+
+    def __init__(self, info: SamplingInfo):
+        self.info = info
+        self.random = random.Random(info.random_seed)
+        self.salt = _mix64(info.random_seed & _MASK_64)
+        self.threshold = int(info.fraction * _MASK_64)
+        self.vertices: Optional[Set[str]] = None  # for snowball sampling
+        self.vertex_array: Optional[np.ndarray] = None  # the same as sorted integers, if prepared from an adjacency
+        self.num_edges_read = 0
+        self.num_edges_kept = 0
+
+    def _hash(self, vertex_id: str) -> int:
+        if vertex_id.isdigit():
+            return _mix64(int(vertex_id) & _MASK_64 ^ self.salt)
+        digest = hashlib.blake2b(vertex_id.encode(), digest_size=8).digest()
+        return _mix64(int.from_bytes(digest, 'little') ^ self.salt)
+
+    def keep_vertex(self, vertex_id: str) -> bool:
+        if self.info.method == 'vertices':
+            return self._hash(vertex_id) < self.threshold
+        if self.info.method == 'snowball':
+            return vertex_id in self.vertices
+        return True
+
+    def keep_edge(self, f: str, t: str) -> bool:
+        if self.info.method == 'edges':
+            return self.random.random() < self.info.fraction
+        return self.keep_vertex(f) and self.keep_vertex(t)
+
+    def prepare(self, edges_filename: str, bulk_size: int, be_verbose: bool = False):
+        """
+        For snowball sampling, collect the vertices by streaming the edge file once per hop. Only the current frontier
+        and the collected vertices are kept in memory.
+        """
+        if self.info.method != 'snowball':
+            return
+        if not self.info.seeds:
+            raise RuntimeError('Snowball sampling needs at least one seed vertex, use --sample_seeds.')
+        self.vertices = set(self.info.seeds)
+        frontier = set(self.info.seeds)
+        for hop in range(self.info.hops):
+            if not frontier or len(self.vertices) >= self.info.max_vertices:
+                break
+            next_frontier = set()
+            for lines in file_reader(edges_filename, bulk_size):
+                for line in lines:
+                    if not line or line[0] in COMMENT_CHARACTERS:
+                        continue
+                    f, t = line.split(' ', 2)[:2]
+                    for u, v in ((f, t), (t, f)):
+                        if u in frontier and v not in self.vertices and len(self.vertices) < self.info.max_vertices:
+                            self.vertices.add(v)
+                            next_frontier.add(v)
+            frontier = next_frontier
+            if be_verbose:
+                print(f'Snowball sampling, hop {hop + 1}: {len(self.vertices)} vertices.')
+
+    def prepare_from_adjacency(self, ids: np.ndarray, offsets: np.ndarray, targets: np.ndarray,
+                               be_verbose: bool = False):
+        """
+        For snowball sampling, collect the vertices of a graph given in compressed sparse row form (see
+        graph_cache.GraphCache) with one pass over the arrays per hop. If there are more vertices at the last hop than
+        allowed by info.max_vertices, those with the smallest ids are taken.
+        """
+        if self.info.method != 'snowball':
+            return
+        if not self.info.seeds:
+            raise RuntimeError('Snowball sampling needs at least one seed vertex, use --sample_seeds.')
+        seeds = np.array([int(seed) for seed in self.info.seeds if seed.isdigit()], dtype=np.int64)
+        seed_indexes = np.minimum(np.searchsorted(ids, seeds), max(len(ids) - 1, 0))
+        seed_indexes = seed_indexes[ids[seed_indexes] == seeds] if len(ids) else seed_indexes[:0]
+        sources = np.repeat(np.arange(len(ids), dtype=targets.dtype), np.diff(offsets))
+        kept = np.zeros(len(ids), dtype=np.bool_)
+        kept[seed_indexes] = True
+        frontier = kept.copy()
+        num_kept = len(self.info.seeds)
+        for hop in range(self.info.hops):
+            if not frontier.any() or num_kept >= self.info.max_vertices:
+                break
+            reached = np.zeros(len(ids), dtype=np.bool_)
+            reached[targets[frontier[sources]]] = True
+            reached[sources[frontier[targets]]] = True
+            new = np.flatnonzero(reached & ~kept)[:self.info.max_vertices - num_kept]
+            kept[new] = True
+            num_kept += len(new)
+            frontier = np.zeros(len(ids), dtype=np.bool_)
+            frontier[new] = True
+            if be_verbose:
+                print(f'Snowball sampling, hop {hop + 1}: {num_kept} vertices.')
+        self.vertex_array = np.unique(np.concatenate((ids[kept], seeds)))
+        self.vertices = set(self.info.seeds) | {str(v) for v in self.vertex_array.tolist()}
+
+    def vertex_mask(self, ids: np.ndarray) -> np.ndarray:
+        """
+        For vertices given by integer ids, the mask of the vertices to keep. Gives the same result as keep_vertex.
+        """
+        if self.info.method == 'vertices':
+            return _mix64_array(ids.astype(np.int64).astype(np.uint64) ^ np.uint64(self.salt)) < np.uint64(
+                self.threshold)
+        if self.info.method == 'snowball':
+            return np.isin(ids, self._snowball_vertex_array())
+        return np.ones(len(ids), dtype=np.bool_)
+
+    def _snowball_vertex_array(self) -> np.ndarray:
+        if self.vertex_array is None:
+            raise RuntimeError('Snowball sampling is only supported for edge lists and Graphalytics graphs.')
+        return self.vertex_array
+
+    def vertex_lines(self, vids: List[str]) -> List[str]:
+        if self.info.method == 'edges':
+            return vids
+        return [vid for vid in vids if self.keep_vertex(vid)]
+
+    def edge_lines(self, lines: List[str]) -> List[str]:
+        kept = []
+        for line in lines:
+            if not line or line[0] in COMMENT_CHARACTERS:
+                continue
+            self.num_edges_read += 1
+            f, t = line.split(' ', 2)[:2]
+            if self.keep_edge(f, t):
+                kept.append(line)
+        self.num_edges_kept += len(kept)
+        return kept
+
+    def filter_vertex_lines(self, batches: Iterable[List[str]]) -> Iterable[List[str]]:
+        for vids in batches:
+            kept = self.vertex_lines(vids)
+            if kept:
+                yield kept
+
+    def filter_edge_lines(self, batches: Iterable[List[str]]) -> Iterable[List[str]]:
+        for lines in batches:
+            kept = self.edge_lines(lines)
+            if kept:
+                yield kept
+
+    def edge_mask(self, sources: np.ndarray, targets: np.ndarray) -> np.ndarray:
+        """
+        For edges given as integer columns, the mask of the edges to keep. Gives the same result as keep_edge for
+        'vertices' and, if the sampler was prepared with prepare_from_adjacency(), for 'snowball'.
+        """
+        self.num_edges_read += len(sources)
+        if self.info.method == 'edges':
+            mask = np.random.default_rng(self.random.getrandbits(64)).random(len(sources)) < self.info.fraction
+        else:
+            mask = self.vertex_mask(sources) & self.vertex_mask(targets)
+        self.num_edges_kept += int(mask.sum())
+        return mask
+
+    def summary_string(self) -> str:
+        return f'Sampling ({self.info.method}): kept {self.num_edges_kept} of {self.num_edges_read} edges.'
+
+
+def get_sampler(info: Optional[SamplingInfo], edges_filename: Optional[str] = None, bulk_size: int = 10000,
+                be_verbose: bool = False) -> Optional[Sampler]:
+    """
+    Return a prepared sampler for the given sampling information or None if nothing should be sampled.
+    """
+    if info is None or not info.method:
+        return None
+    sampler = Sampler(info)
+    if edges_filename:
+        sampler.prepare(edges_filename, bulk_size, be_verbose)
+    return sampler
+
+
+def sample_vertex_lines(batches: Iterable[List[str]], sampler: Optional[Sampler]) -> Iterable[List[str]]:
+    return batches if sampler is None else sampler.filter_vertex_lines(batches)
+
+
+def sample_edge_lines(batches: Iterable[List[str]], sampler: Optional[Sampler]) -> Iterable[List[str]]:
+    return batches if sampler is None else sampler.filter_edge_lines(batches)
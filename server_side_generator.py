@@ -0,0 +1,306 @@
+import json
+import os
+import random
+import time
+from typing import List, Tuple, Optional
+
+import requests
+from tqdm import tqdm
+
+from general import create_graph, graph_exists, get_time_difference_string, split_balanced
+from helper_classes import DatabaseInfo, GraphInfo, CliquesGraphInfo, CliquesHelper
+
+POLL_INTERVAL = 0.5  # seconds between two requests for the state of a running job
+
+ServerJob = Tuple[str, dict]  # an AQL query and its bind variables
+
+
+class AqlGraphCompiler:
+    """
+    Make the AQL expressions for the vertex and edge documents of the generated graphs. The documents are the ones the
+    generators in vertices_generator and edges_generator make on the client, the random values are computed by the
+    server with RAND().
+    """
+
+    def __init__(self, db_info: DatabaseInfo, graph_info: GraphInfo):
+        self.db_info = db_info
+        self.graph_info = graph_info
+
+    def _float(self, expression: str) -> str:
+        encoder = self.graph_info.numeric_encoder
+        if not encoder.typed:
+            return f'TO_STRING({expression})'
+        if encoder.precision is None:
+            return expression
+        scale = 10 ** encoder.precision
+        return f'ROUND(({expression}) * {scale}) / {scale}'
+
+    def _int(self, expression: str) -> str:
+        return expression if self.graph_info.numeric_encoder.typed else f'TO_STRING({expression})'
+
+    def _random(self, vertex_or_edge_property) -> str:
+        low = float(vertex_or_edge_property.min)
+        high = float(vertex_or_edge_property.max)
+        return self._float(f'{low!r} + RAND() * {high - low!r}')
+
+    def vertex_document(self, vid: str, part: Optional[str]) -> str:
+        """
+        The vertex document of the vertex with the (integer) id vid in the part with the (integer) label part, which
+        is None if the graph has no parts.
+        """
+        db_info = self.db_info
+        if db_info.isSmart and db_info.smart_attribute != 'part':
+            fields = [f'{json.dumps(db_info.smart_attribute)}: TO_STRING({vid})', f'_key: CONCAT({vid}, ":", {vid})']
+            if part is not None:
+                fields.append(f'part: {self._int(part)}')
+        elif db_info.isSmart:  # the values of the smart attribute must be strings
+            part_value = '""' if part is None else f'TO_STRING({part})'
+            fields = [f'_key: CONCAT({part_value}, ":", {vid})', f'part: {part_value}']
+        else:
+            fields = [f'_key: TO_STRING({vid})']
+            if part is not None:
+                fields.append(f'part: {self._int(part)}')
+        vertex_property = self.graph_info.vertex_property
+        if vertex_property is not None and vertex_property.type == 'random':
+            fields.append(f'{json.dumps(db_info.additional_vertex_attribute)}: {self._random(vertex_property)}')
+        return '{' + ', '.join(fields) + '}'
+
+    def vertex_id(self, vid: str, part: Optional[str]) -> str:
+        """
+        The _id of the vertex made by vertex_document(vid, part).
+        """
+        prefix = json.dumps(self.db_info.vertices_coll_name + '/')
+        if self.db_info.isSmart and self.db_info.smart_attribute == 'part':
+            part_value = '""' if part is None else part
+            return f'CONCAT({prefix}, {part_value}, ":", {vid})'
+        if self.db_info.isSmart:
+            return f'CONCAT({prefix}, {vid}, ":", {vid})'
+        return f'CONCAT({prefix}, {vid})'
+
+    def edge_document(self, f: str, t: str, part_f: Optional[str], part_t: Optional[str]) -> str:
+        fields = [f'_from: {self.vertex_id(f, part_f)}', f'_to: {self.vertex_id(t, part_t)}']
+        edge_property = self.graph_info.edge_property
+        if edge_property is not None and edge_property.type == 'random':
+            fields.append(f'{json.dumps(self.db_info.edge_attribute)}: {self._random(edge_property)}')
+        return '{' + ', '.join(fields) + '}'
+
+    @staticmethod
+    def _missing_filter(variable_indent: str, prob_missing: float) -> str:
+        return f'{variable_indent}FILTER RAND() >= {float(prob_missing)!r}\n' if prob_missing > 0 else ''
+
+    def clique_vertices_query(self) -> str:
+        """
+        Insert the vertices with ids in [@lo, @hi), without parts.
+        """
+        return (f'FOR vid IN @lo..(@hi - 1)\n'
+                f'  INSERT {self.vertex_document("vid", None)} INTO @@vertices')
+
+    def clique_edges_query(self, prob_missing: float) -> str:
+        """
+        Insert the edges (i, j) with i in [@lo, @hi) and i < j < @end, each one missing with probability prob_missing.
+        """
+        return (f'FOR i IN @lo..(@hi - 1)\n'
+                f'  FOR j IN (i + 1)..@end\n'
+                f'    FILTER j < @end\n'
+                f'{self._missing_filter("    ", prob_missing)}'
+                f'    INSERT {self.edge_document("i", "j", None, None)} INTO @@edges')
+
+    def parts_vertices_query(self) -> str:
+        """
+        Insert the vertices of the parts with indexes in [@lo, @hi), part c has the ids in [@starts[c], @starts[c + 1])
+        and the label @starts[c].
+        """
+        return (f'FOR c IN @lo..(@hi - 1)\n'
+                f'  LET part = @starts[c]\n'
+                f'  FOR vid IN part..(@starts[c + 1] - 1)\n'
+                f'    INSERT {self.vertex_document("vid", "part")} INTO @@vertices')
+
+    def parts_cliques_edges_query(self, prob_missing: float) -> str:
+        """
+        Insert the edges of the cliques on the parts with indexes in [@lo, @hi), each one missing with probability
+        prob_missing.
+        """
+        return (f'FOR c IN @lo..(@hi - 1)\n'
+                f'  LET part = @starts[c]\n'
+                f'  LET part_end = @starts[c + 1]\n'
+                f'  FOR i IN part..(part_end - 1)\n'
+                f'    FOR j IN (i + 1)..part_end\n'
+                f'      FILTER j < part_end\n'
+                f'{self._missing_filter("      ", prob_missing)}'
+                f'      INSERT {self.edge_document("i", "j", "part", "part")} INTO @@edges')
+
+    def connect_parts_query(self, prob_missing_all: float, prob_missing_one: float) -> str:
+        """
+        Connect the parts with indexes in [@lo, @hi) with the parts with greater indexes (less than @n): two parts are
+        not connected at all with probability prob_missing_all, otherwise, every edge between them is missing with
+        probability prob_missing_one.
+        """
+        return (f'FOR c1 IN @lo..(@hi - 1)\n'
+                f'  LET part1 = @starts[c1]\n'
+                f'  FOR c2 IN (c1 + 1)..@n\n'
+                f'    FILTER c2 < @n\n'
+                f'{self._missing_filter("    ", prob_missing_all)}'
+                f'    LET part2 = @starts[c2]\n'
+                f'    FOR f IN part1..(@starts[c1 + 1] - 1)\n'
+                f'      FOR t IN part2..(@starts[c2 + 1] - 1)\n'
+                f'{self._missing_filter("        ", prob_missing_one)}'
+                f'        INSERT {self.edge_document("f", "t", "part1", "part2")} INTO @@edges')
+
+
+def _collections(db_info: DatabaseInfo, with_vertices: bool) -> dict:
+    key = '@vertices' if with_vertices else '@edges'
+    return {key: db_info.vertices_coll_name if with_vertices else db_info.edge_coll_name}
+
+
+def compile_clique_jobs(db_info: DatabaseInfo, graph_info: GraphInfo, num_vertices: int, num_jobs: int,
+                        prob_missing: float = 0.0) -> List[ServerJob]:
+    """
+    The jobs generating a clique with num_vertices vertices, each edge is missing with probability prob_missing. The
+    vertices and the edges are split into num_jobs ranges each, the edge ranges have about the same number of edges.
+    """
+    compiler = AqlGraphCompiler(db_info, graph_info)
+    jobs = []
+    vertex_query = compiler.clique_vertices_query()
+    for lo, hi in split_balanced([1] * num_vertices, num_jobs):
+        jobs.append((vertex_query, {'lo': lo, 'hi': hi, **_collections(db_info, True)}))
+    edge_query = compiler.clique_edges_query(prob_missing)
+    for lo, hi in split_balanced([num_vertices - 1 - i for i in range(num_vertices - 1)], num_jobs):
+        jobs.append((edge_query, {'lo': lo, 'hi': hi, 'end': num_vertices, **_collections(db_info, False)}))
+    return jobs
+
+
+def compile_parts_jobs(db_info: DatabaseInfo, graph_info: GraphInfo, c_helper: CliquesHelper, num_jobs: int,
+                       prob_missing_in_parts: Optional[float], prob_missing_all: float,
+                       prob_missing_one_between: float) -> List[ServerJob]:
+    """
+    The jobs generating the vertices of the parts given in c_helper, the edges of the cliques on the parts (unless
+    prob_missing_in_parts is None) and the edges between the parts. Every kind of job is split into num_jobs ranges of
+    parts with about the same number of vertices or (expected) edges.
+    """
+    compiler = AqlGraphCompiler(db_info, graph_info)
+    starts = c_helper.starts_of_cliques
+    n = c_helper.num_cliques()
+    sizes = [c_helper.size_of_clique(c) for c in range(n)]
+    jobs = []
+    vertex_query = compiler.parts_vertices_query()
+    for lo, hi in split_balanced(sizes, num_jobs):
+        jobs.append((vertex_query, {'lo': lo, 'hi': hi, 'starts': starts, **_collections(db_info, True)}))
+    if prob_missing_in_parts is not None:
+        clique_query = compiler.parts_cliques_edges_query(prob_missing_in_parts)
+        for lo, hi in split_balanced([s * (s - 1) // 2 for s in sizes], num_jobs):
+            jobs.append((clique_query, {'lo': lo, 'hi': hi, 'starts': starts, **_collections(db_info, False)}))
+    connect_query = compiler.connect_parts_query(prob_missing_all, prob_missing_one_between)
+    for lo, hi in split_balanced([s * (starts[-1] - starts[c + 1]) for c, s in enumerate(sizes)], num_jobs):
+        jobs.append((connect_query, {'lo': lo, 'hi': hi, 'n': n, 'starts': starts,
+                                     **_collections(db_info, False)}))
+    return jobs
+
+
+def _submit_job(db_info: DatabaseInfo, job: ServerJob, bulk_size: int) -> str:
+    query, bind_vars = job
+    url = os.path.join(db_info.endpoint, '_api/cursor')
+    response = requests.post(url, auth=(db_info.username, db_info.password), headers={'x-arango-async': 'store'},
+                             json={'query': query, 'bindVars': bind_vars,
+                                   'options': {'intermediateCommitCount': bulk_size}})
+    if response.status_code != 202:
+        raise RuntimeError(f'Invalid response from server when submitting a generation job: {response.text}')
+    return response.headers['x-arango-async-id']
+
+
+def _fetch_job(db_info: DatabaseInfo, job_id: str) -> Optional[int]:
+    """
+    Return None if the job is still running and the number of inserted documents otherwise.
+    """
+    url = os.path.join(db_info.endpoint, '_api/job', job_id)
+    response = requests.put(url, auth=(db_info.username, db_info.password))
+    if response.status_code == 204:
+        return None
+    if response.status_code != 201:
+        raise RuntimeError(f'Generation job {job_id} failed: {response.text}')
+    return response.json()['extra']['stats']['writesExecuted']
+
+
+def run_server_jobs(db_info: DatabaseInfo, jobs: List[ServerJob], num_parallel: int, bulk_size: int,
+                    be_verbose: bool):
+    """
+    Run the jobs as asynchronous AQL queries on the server, at most num_parallel at the same time, and wait until all
+    of them are done. The server commits the inserted documents every bulk_size documents.
+    """
+    start = time.monotonic()
+    waiting = list(reversed(jobs))
+    running: List[str] = []
+    num_inserted = 0
+    with tqdm(total=len(jobs), desc='Running generation jobs', mininterval=1.0, unit='jobs', ncols=100,
+              disable=not be_verbose) as pbar:
+        while waiting or running:
+            while waiting and len(running) < num_parallel:
+                running.append(_submit_job(db_info, waiting.pop(), bulk_size))
+            time.sleep(POLL_INTERVAL)
+            still_running = []
+            for job_id in running:
+                result = _fetch_job(db_info, job_id)
+                if result is None:
+                    still_running.append(job_id)
+                else:
+                    num_inserted += result
+                    pbar.update(1)
+            running = still_running
+    if be_verbose:
+        print(f'Inserted {num_inserted} documents on the server in '
+              f'{get_time_difference_string(time.monotonic() - start)}.')
+
+
+def _make_parts(min_size: int, max_size: int, num_parts: int) -> CliquesHelper:
+    if min_size < 1 or max_size < min_size:
+        raise RuntimeError('The sizes of the cliques or parts must be positive, the minimum at most the maximum.')
+    c_helper = CliquesHelper()
+    for _ in range(num_parts):
+        c_helper.update(random.randint(min_size, max_size))
+    return c_helper
+
+
+def _create_graph_if_new(db_info: DatabaseInfo, be_verbose: bool) -> bool:
+    if db_info.overwrite or not graph_exists(db_info):
+        create_graph(db_info)
+        return True
+    if be_verbose:
+        print(f'The graph {db_info.graph_name} exists already, skipping. To overwrite, use \'--overwrite\'.')
+    return False
+
+
+def create_one_clique_graph_server_side(db_info: DatabaseInfo, bulk_size: int, num_vertices: int,
+                                        graph_info: GraphInfo, num_jobs: int, be_verbose: bool = True):
+    """
+    As create_one_clique_graph, but the vertices and edges are generated by num_jobs parallel AQL queries on the server.
+    """
+    if _create_graph_if_new(db_info, be_verbose):
+        run_server_jobs(db_info, compile_clique_jobs(db_info, graph_info, num_vertices, num_jobs), num_jobs,
+                        bulk_size, be_verbose)
+
+
+def create_cliques_graph_server_side(db_info: DatabaseInfo, graph_info: GraphInfo, c_graph_info: CliquesGraphInfo,
+                                     bulk_size: int, num_jobs: int, be_verbose: bool = True):
+    """
+    As create_cliques_graph, but the vertices and edges are generated by num_jobs parallel AQL queries on the server.
+    Only the sizes of the cliques are chosen on the client.
+    """
+    if _create_graph_if_new(db_info, be_verbose):
+        c_helper = _make_parts(c_graph_info.min_size_clique, c_graph_info.max_size_clique, c_graph_info.num_cliques)
+        jobs = compile_parts_jobs(db_info, graph_info, c_helper, num_jobs, c_graph_info.prob_missing_one,
+                                  c_graph_info.prob_missing_all, c_graph_info.prob_missing_one_between)
+        run_server_jobs(db_info, jobs, num_jobs, bulk_size, be_verbose)
+
+
+def create_k_partite_graph_server_side(db_info: DatabaseInfo, graph_info: GraphInfo,
+                                       parts_graph_info: CliquesGraphInfo, bulk_size: int, num_jobs: int,
+                                       be_verbose: bool = True):
+    """
+    As create_k_partite_graph, but the vertices and edges are generated by num_jobs parallel AQL queries on the
+    server. Only the sizes of the parts are chosen on the client.
+    """
+    if _create_graph_if_new(db_info, be_verbose):
+        c_helper = _make_parts(parts_graph_info.min_size_clique, parts_graph_info.max_size_clique,
+                               parts_graph_info.num_cliques)
+        jobs = compile_parts_jobs(db_info, graph_info, c_helper, num_jobs, None, 0.0,
+                                  parts_graph_info.prob_missing_one_between)
+        run_server_jobs(db_info, jobs, num_jobs, bulk_size, be_verbose)
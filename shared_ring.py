@@ -0,0 +1,56 @@
+import multiprocessing
+from multiprocessing import shared_memory
+from typing import Optional, Tuple
+
+
+class SharedRing:
+    """
+    Pass byte strings, e.g., encoded bulks of documents, from processes to other processes or threads without pickling
+    them. A block of shared memory is divided into num_slots slots of slot_size bytes that are used in turn: put()
+    waits for a free slot, copies the bytes into it and announces it, get() copies the bytes of the next announced
+    slot and frees it. Only the numbers of the slots go through queues. The ring must be created before the processes
+    using it are started; the creating process calls close() after all of them have finished.
+    """
+
+    def __init__(self, num_slots: int, slot_size: int):
+        self.slot_size = slot_size
+        self.memory = shared_memory.SharedMemory(create=True, size=num_slots * slot_size)
+        self.free = multiprocessing.Queue()
+        self.filled = multiprocessing.Queue()
+        for slot in range(num_slots):
+            self.free.put(slot)
+
+    def put(self, data: bytes, tag: str):
+        """
+        Copy data, which must fit into a slot, into the ring, tag is given to the reader with it.
+        """
+        if len(data) > self.slot_size:
+            raise ValueError(f'SharedRing.put: {len(data)} bytes do not fit into a slot of {self.slot_size} bytes.')
+        slot = self.free.get()
+        offset = slot * self.slot_size
+        self.memory.buf[offset:offset + len(data)] = data
+        self.filled.put((slot, len(data), tag))
+
+    def get(self) -> Optional[Tuple[bytes, str]]:
+        """
+        Return the bytes and the tag of the next put() or None if stop_readers() was called before.
+        """
+        item = self.filled.get()
+        if item is None:
+            return None
+        slot, size, tag = item
+        offset = slot * self.slot_size
+        data = bytes(self.memory.buf[offset:offset + size])
+        self.free.put(slot)
+        return data, tag
+
+    def stop_readers(self, num_readers: int):
+        """
+        Let num_readers calls of get() return None after the bytes put so far, e.g., to end the reading threads.
+        """
+        for _ in range(num_readers):
+            self.filled.put(None)
+
+    def close(self):
+        self.memory.close()
+        self.memory.unlink()
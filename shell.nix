@@ -7,7 +7,7 @@ let
     # other python packages you want
     zstandard
     tqdm
-    psutil
+    numpy
   ]);
 in
 pkgs.mkShell {
@@ -7,8 +7,9 @@ from typing import Optional
 
 import requests
 
-from arguments import make_global_parameters, make_database_input_parameters, make_pregel_parameters
-from general import arangodIsRunning
+from arguments import make_global_parameters, make_database_input_parameters, make_pregel_parameters, \
+    make_warm_up_parameters
+from general import arangodIsReachable
 from helper_classes import DatabaseInfo
 
 
@@ -20,6 +21,7 @@ def get_arguments():
 
     make_database_input_parameters(parser)
     make_pregel_parameters(parser)
+    make_warm_up_parameters(parser)
 
     arguments = parser.parse_args()
     return arguments
@@ -170,8 +172,8 @@ if __name__ == "__main__":
     db_info = DatabaseInfo(args.endpoint, args.graphname,
                            isSmart=True, username=args.user, password=args.pwd)
 
-    if not arangodIsRunning():
-        raise RuntimeError('The process "arangod" is not running, please, run it first.')
+    if not arangodIsReachable(args.endpoint):
+        raise RuntimeError(f'No server answers at {args.endpoint}, please, start arangod first.')
 
     params = dict()
 
@@ -205,6 +207,11 @@ if __name__ == "__main__":
         if args.sssp_resultField:
             params['_resultField'] = args.sssp_resultField
 
+    if args.warm_up:
+        from warm_up import warm_up_graph
+
+        warm_up_graph(db_info, args.warm_up_sample, args.warm_up_timeout, not args.silent)
+
     algorithm_id = call_pregel_algorithm(db_info, args.algorithm, params).strip('"')
     if not args.silent:
         print(f'Pregel algorithm with id {algorithm_id} started.')
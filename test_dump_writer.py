@@ -0,0 +1,130 @@
+import gzip
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import shutil
+import threading
+
+import pytest
+
+from dump_writer import DumpWriter, DOCUMENT_COLLECTION, EDGE_COLLECTION
+
+
+def data_files(directory: str, collection_name: str, suffix: str):
+    """
+    The numbers of the data files of a collection, checking the names arangorestore looks for.
+    """
+    prefix = f'{collection_name}_{hashlib.md5(collection_name.encode()).hexdigest()}'
+    pattern = re.compile(re.escape(prefix) + r'\.(\d+)' + re.escape(suffix))
+    return sorted(int(m.group(1)) for m in map(pattern.fullmatch, os.listdir(directory)) if m)
+
+
+def read_documents(directory: str, collection_name: str, compressed: bool = True):
+    suffix = '.data.json.gz' if compressed else '.data.json'
+    documents = []
+    for n in data_files(directory, collection_name, suffix):
+        filename = os.path.join(directory, f'{DumpWriter.data_file_prefix(collection_name)}.{n}{suffix}')
+        with (gzip.open(filename, 'rt') if compressed else open(filename, 'r')) as f:
+            documents += [json.loads(line) for line in f]
+    return documents
+
+
+def write_graph(directory: str, compress: bool = True, num_vertices: int = 25, num_edges: int = 31):
+    writer = DumpWriter(directory, compress, num_threads=2, database='graphs', docs_per_file=10)
+    writer.write_structure('g', ['v'], [{'collection': 'e', 'from': ['v'], 'to': ['v']}], True, 'region', 3, 2)
+    for i in range(0, num_vertices, 4):
+        vertices = [{'_key': f'{j % 3}:{j}', 'region': str(j % 3)} for j in range(i, min(i + 4, num_vertices))]
+        writer.write_documents(vertices, 'v')
+    writer.write_documents([{'_from': f'v/0:{i}', '_to': f'v/1:{i + 1}'} for i in range(num_edges)], 'e')
+    writer.finish()
+    return writer
+
+
+@pytest.mark.parametrize('compress', [True, False])
+def test_layout(tmp_path, compress):
+    directory = str(tmp_path)
+    write_graph(directory, compress)
+    suffix = '.data.json.gz' if compress else '.data.json'
+
+    with open(os.path.join(directory, 'dump.json')) as f:
+        dump = json.load(f)
+    assert dump['database'] == 'graphs' and dump['properties']['name'] == 'graphs'
+    with open(os.path.join(directory, 'ENCRYPTION')) as f:
+        assert f.read() == 'none'
+
+    with open(os.path.join(directory, 'v.structure.json')) as f:
+        vertices = json.load(f)['parameters']
+    assert vertices['type'] == DOCUMENT_COLLECTION and vertices['isSmart']
+    assert vertices['smartGraphAttribute'] == 'region'
+    assert vertices['numberOfShards'] == 3 and vertices['replicationFactor'] == 2
+    with open(os.path.join(directory, 'e.structure.json')) as f:
+        edges = json.load(f)['parameters']
+    assert edges['type'] == EDGE_COLLECTION and edges['distributeShardsLike'] == 'v'
+
+    # the data files of every collection are numbered 0, 1, 2, ... without gaps and no temporary file is left
+    assert data_files(directory, 'v', suffix) == [0, 1, 2]
+    assert data_files(directory, 'e', suffix) == [0, 1, 2, 3]
+    assert not [name for name in os.listdir(directory) if name.endswith('.part')]
+    assert sorted(d['_key'] for d in read_documents(directory, 'v', compress)) == \
+        sorted(f'{j % 3}:{j}' for j in range(25))
+    assert len(read_documents(directory, 'e', compress)) == 31
+
+    graphs = read_documents(directory, '_graphs', compress)
+    assert len(graphs) == 1 and graphs[0]['_key'] == 'g' and graphs[0]['orphanCollections'] == ['v']
+    assert graphs[0]['edgeDefinitions'] == [{'collection': 'e', 'from': ['v'], 'to': ['v']}]
+
+
+def test_rewrite_removes_earlier_dump(tmp_path):
+    directory = str(tmp_path)
+    write_graph(directory, num_vertices=25)
+    write_graph(directory, num_vertices=5)
+    assert data_files(directory, 'v', '.data.json.gz') == [0]
+    assert len(read_documents(directory, 'v')) == 5
+
+
+def write_in_worker(writer: DumpWriter):
+    assert writer.writes is None
+    writer.write_documents([{'_key': str(i)} for i in range(15)], 'v')
+    writer.flush()
+
+
+def test_worker_processes_write_directly(tmp_path):
+    directory = str(tmp_path)
+    writer = DumpWriter(directory, docs_per_file=10)
+    writer.write_structure('g', ['v'], [])
+    worker = multiprocessing.get_context('spawn').Process(target=write_in_worker, args=(writer,))
+    worker.start()
+    worker.join()
+    assert worker.exitcode == 0
+    writer.write_documents([{'_key': str(i)} for i in range(15, 20)], 'v')
+    writer.finish()
+    assert data_files(directory, 'v', '.data.json.gz') == [0, 1, 2]
+    assert sorted(int(d['_key']) for d in read_documents(directory, 'v')) == list(range(20))
+
+
+def test_errors_are_raised_without_losing_threads(tmp_path):
+    directory = str(tmp_path / 'dump')
+    writer = DumpWriter(directory, num_threads=1, docs_per_file=1)
+    writer.write_structure('g', ['v'], [])
+    shutil.rmtree(directory)  # every data file write fails from now on
+    raised = []
+
+    def write():
+        # with a leaked slot, the second failing call would block for good
+        for i in range(5):
+            try:
+                writer.write_documents([{'_key': str(i)}], 'v')
+            except OSError:
+                raised.append(i)
+        try:
+            writer.finish()
+        except OSError:
+            raised.append('finish')
+
+    thread = threading.Thread(target=write, daemon=True)
+    thread.start()
+    thread.join(timeout=10)
+    assert not thread.is_alive()
+    assert raised and raised[-1] == 'finish'
@@ -0,0 +1,185 @@
+import json
+import random
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pytest
+
+import server_side_generator
+from edges_generator import vertex_id_list
+from helper_classes import DatabaseInfo, GraphInfo, VertexOrEdgeProperty, CliquesHelper
+from server_side_generator import compile_clique_jobs, compile_parts_jobs, run_server_jobs
+from vertices_generator import prepare_vertices
+
+
+def aql_range(low: int, high: int):
+    return range(low, high + 1) if low <= high else range(low, high - 1, -1)
+
+
+AQL_FUNCTIONS = {
+    'aql_range': aql_range,
+    'CONCAT': lambda *values: ''.join(str(v) for v in values),
+    'TO_STRING': str,
+    'RAND': random.random,
+    'ROUND': round,
+}
+
+
+def run_aql(query: str, bind_vars: dict, collections: dict) -> int:
+    """
+    Run the AQL queries of AqlGraphCompiler in Python: nested FOR loops over ranges with LET, FILTER and INSERT. Return
+    the number of inserted documents.
+    """
+    lines = []
+    depth = 0
+    for line in query.splitlines():
+        line = re.sub(r'@(@?\w+)', r"bind_vars['\1']", line.strip())
+        line = re.sub(r'([{,]\s*)(\w+):', r'\1"\2":', line)  # quote the attribute names of object literals
+        if line.startswith('FOR '):
+            variable, expression = re.fullmatch(r'FOR (\w+) IN (.+)', line).groups()
+            low, high = expression.split('..')
+            lines.append('  ' * depth + f'for {variable} in aql_range({low}, {high}):')
+            depth += 1
+        elif line.startswith('LET '):
+            lines.append('  ' * depth + line[len('LET '):])
+        elif line.startswith('FILTER '):
+            lines.append('  ' * depth + f'if not ({line[len("FILTER "):]}): continue')
+        elif line.startswith('INSERT '):
+            document, collection = re.fullmatch(r'INSERT (.+) INTO (.+)', line).groups()
+            lines.append('  ' * depth + f'collections.setdefault({collection}, []).append({document})')
+        else:
+            raise AssertionError(f'Unexpected AQL: {line}')
+    before = sum(len(documents) for documents in collections.values())
+    exec('\n'.join(lines), dict(AQL_FUNCTIONS), {'bind_vars': bind_vars, 'collections': collections})
+    return sum(len(documents) for documents in collections.values()) - before
+
+
+class CursorServer(ThreadingHTTPServer):
+    """
+    A stand-in for the cursor and job endpoints of ArangoDB: every query is run as soon as it is submitted, its
+    documents are collected in self.collections.
+    """
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), CursorHandler)
+        self.collections = dict()
+        self.results = dict()
+        self.lock = threading.Lock()
+
+    @property
+    def endpoint(self) -> str:
+        return f'http://127.0.0.1:{self.server_port}/_db/_system'
+
+
+class CursorHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status: int, body: dict, headers: dict = None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        for key, value in (headers or dict()).items():
+            self.send_header(key, value)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        assert self.path == '/_db/_system/_api/cursor' and self.headers['x-arango-async'] == 'store'
+        request = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        with self.server.lock:
+            try:
+                num_inserted = run_aql(request['query'], request['bindVars'], self.server.collections)
+            except Exception as e:  # the generator raises an error with this message
+                self._reply(400, {'error': True, 'errorMessage': f'{e!r} in {request["query"]}'})
+                return
+            job_id = str(len(self.server.results) + 1)
+            self.server.results[job_id] = num_inserted
+        self._reply(202, dict(), {'x-arango-async-id': job_id})
+
+    def do_PUT(self):
+        job_id = self.path.rpartition('/')[2]
+        self._reply(201, {'extra': {'stats': {'writesExecuted': self.server.results[job_id]}}})
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(server_side_generator, 'POLL_INTERVAL', 0.0)
+    cursor_server = CursorServer()
+    thread = threading.Thread(target=cursor_server.serve_forever, args=(0.01,), daemon=True)
+    thread.start()
+    yield cursor_server
+    cursor_server.shutdown()
+    cursor_server.server_close()
+
+
+def make_infos(endpoint: str, smart_attribute):
+    db_info = DatabaseInfo(endpoint, 'g', 'v', 'e', smart_attribute is not None, smart_attribute=smart_attribute)
+    return db_info, GraphInfo(None, VertexOrEdgeProperty('none'))
+
+
+def vertex_ids(db_info: DatabaseInfo, vertices: list, first: int, part_label: str) -> list:
+    """
+    The _ids of the vertices with ids first, first + 1, ... as the client generators make them, checked against the
+    keys of the vertices.
+    """
+    idxs = np.arange(first, first + len(vertices))
+    smart_values = np.full(len(idxs), part_label) if db_info.isSmart and db_info.smart_attribute == 'part' else None
+    ids = vertex_id_list(db_info, idxs, smart_values)
+    assert ids == [f'{db_info.vertices_coll_name}/{v["_key"]}' for v in vertices]
+    return ids
+
+
+def sorted_documents(documents):
+    return sorted(documents, key=lambda d: json.dumps(d, sort_keys=True))
+
+
+# plain, smart with an own smart attribute and smart with the part as smart attribute
+SMART_ATTRIBUTES = [None, 'region', 'part']
+
+
+@pytest.mark.parametrize('smart_attribute', SMART_ATTRIBUTES)
+def test_clique(server, smart_attribute):
+    db_info, graph_info = make_infos(server.endpoint, smart_attribute)
+    num_vertices = 23
+    run_server_jobs(db_info, compile_clique_jobs(db_info, graph_info, num_vertices, 4), 2, 1000, False)
+
+    vertices = prepare_vertices(db_info, graph_info, '', 0, num_vertices)
+    assert sorted_documents(server.collections['v']) == sorted_documents(vertices)
+    ids = vertex_ids(db_info, vertices, 0, '')
+    expected_edges = [{'_from': f, '_to': t} for k, f in enumerate(ids) for t in ids[k + 1:]]
+    assert sorted_documents(server.collections['e']) == sorted_documents(expected_edges)
+
+
+@pytest.mark.parametrize('smart_attribute', SMART_ATTRIBUTES)
+@pytest.mark.parametrize('with_cliques', [True, False])
+def test_parts(server, smart_attribute, with_cliques):
+    db_info, graph_info = make_infos(server.endpoint, smart_attribute)
+    c_helper = CliquesHelper()
+    for size in [3, 1, 5, 4, 2]:
+        c_helper.update(size)
+    jobs = compile_parts_jobs(db_info, graph_info, c_helper, 3, 0.0 if with_cliques else None, 0.0, 0.0)
+    run_server_jobs(db_info, jobs, 2, 1000, False)
+
+    starts = c_helper.starts_of_cliques
+    parts = [prepare_vertices(db_info, graph_info, str(first), first, end) for first, end in zip(starts, starts[1:])]
+    assert sorted_documents(server.collections['v']) == sorted_documents([v for part in parts for v in part])
+    ids = [vertex_ids(db_info, part, first, str(first)) for part, first in zip(parts, starts)]
+    expected_edges = []
+    for c, part_ids in enumerate(ids):
+        if with_cliques:
+            expected_edges += [{'_from': f, '_to': t} for k, f in enumerate(part_ids) for t in part_ids[k + 1:]]
+        for other_ids in ids[c + 1:]:
+            expected_edges += [{'_from': f, '_to': t} for f in part_ids for t in other_ids]
+    assert sorted_documents(server.collections['e']) == sorted_documents(expected_edges)
+
+
+def test_missing_edges(server):
+    db_info, graph_info = make_infos(server.endpoint, None)
+    c_helper = CliquesHelper()
+    for size in [4, 4, 4]:
+        c_helper.update(size)
+    run_server_jobs(db_info, compile_parts_jobs(db_info, graph_info, c_helper, 2, 1.0, 1.0, 0.0), 2, 1000, False)
+    assert len(server.collections['v']) == 12 and 'e' not in server.collections
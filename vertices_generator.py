@@ -20,23 +20,24 @@ def prepare_vertices(db_info: DatabaseInfo, graph_info: GraphInfo, part_label: s
     :return:
     """
     docs = []
+    encoder = graph_info.numeric_encoder
     for vid in range(start_idx, end_idx):
         if db_info.isSmart:  # smart_attribute exists and makes sense
             if db_info.smart_attribute != 'part':
                 doc = {f'{db_info.smart_attribute}': str(vid), "_key": f'{vid}:{vid}'}
                 if part_label != "":
-                    doc['part'] = part_label
-            else:  # db_info.smart_attribute == 'part'
+                    doc['part'] = encoder.token_value(part_label, 'int')
+            else:  # db_info.smart_attribute == 'part', the values of the smart attribute must be strings
                 doc = {'_key': f'{part_label}:{vid}', 'part': f'{part_label}'}
-            if graph_info.vertex_property.type == 'random':
-                doc[db_info.additional_vertex_attribute] = str(random.uniform(float(graph_info.vertex_property.min),
-                                                                              float(graph_info.vertex_property.max)))
+            if graph_info.vertex_property is not None and graph_info.vertex_property.type == 'random':
+                doc[db_info.additional_vertex_attribute] = encoder.float_value(
+                    random.uniform(float(graph_info.vertex_property.min), float(graph_info.vertex_property.max)))
         else:
             doc = {'_key': str(vid)}
             if part_label != "":
-                doc['part'] = part_label
-            if graph_info.vertex_property.type == 'random':
-                doc[db_info.additional_vertex_attribute] = str(
+                doc['part'] = encoder.token_value(part_label, 'int')
+            if graph_info.vertex_property is not None and graph_info.vertex_property.type == 'random':
+                doc[db_info.additional_vertex_attribute] = encoder.float_value(
                     random.uniform(float(graph_info.vertex_property.min), float(graph_info.vertex_property.max)))
         docs.append(doc)
     return docs
@@ -91,10 +92,12 @@ def make_and_insert_vertices(db_info: DatabaseInfo, graph_info: GraphInfo, size:
         pbar = tqdm.tqdm(total=size, desc='Creating vertices', mininterval=1.0, unit='vertices', ncols=100)
     for vertices in make_vertices(graph_info, db_info, size, bulk_size, add_part):
         insert_documents(db_info, vertices, db_info.vertices_coll_name)
+        if graph_info.statistics:
+            graph_info.statistics.add_vertex_documents(vertices, db_info.isSmart)
         if be_verbose:
             pbar.update(len(vertices))
-        if c_helper:
-            c_helper.update(size)
+    if c_helper:
+        c_helper.update(size)
     if be_verbose:
         pbar.close()
 
@@ -129,6 +132,11 @@ def insert_vertices_unique(db_info: DatabaseInfo, vertices):
     """
     doc = dict()
     vertices = list(vertices)
+    if db_info.dump_writer:
+        new_vertices = db_info.dump_writer.unseen(db_info.vertices_coll_name, vertices)
+        db_info.dump_writer.write_documents([{db_info.smart_attribute: v} for v in new_vertices],
+                                            db_info.vertices_coll_name)
+        return
     q = f'''
     let vertex_ids = (
             FOR vertex IN @@vertex_coll
@@ -0,0 +1,100 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+
+import requests
+
+from general import get_time_difference_string
+from graph_clone import cursor_batches, get_graph_definition
+from helper_classes import DatabaseInfo
+
+POLL_INTERVAL = 0.5
+
+
+def get_graph_collections(db_info: DatabaseInfo) -> Tuple[List[str], List[str]]:
+    """
+    Return the names of the vertex collections and of the edge collections of the graph db_info.graph_name.
+    """
+    definition = get_graph_definition(db_info)
+    edge_collections = [d['collection'] for d in definition['edgeDefinitions']]
+    vertex_collections = list(definition.get('orphanCollections', []))
+    for d in definition['edgeDefinitions']:
+        for c in d['from'] + d['to']:
+            if c not in vertex_collections:
+                vertex_collections.append(c)
+    return vertex_collections, edge_collections
+
+
+def load_indexes_into_memory(db_info: DatabaseInfo, collection_name: str):
+    """
+    Load the edge index (for edge collections) and the primary index of the collection into the in-memory cache.
+    """
+    url = os.path.join(db_info.endpoint, '_api/collection', collection_name, 'loadIndexesIntoMemory')
+    response = requests.put(url, auth=(db_info.username, db_info.password))
+    if response.status_code != 200:
+        raise RuntimeError(f'load_indexes_into_memory error: Error Code: {response.status_code}. '
+                           f'Message: {response.text}')
+
+
+def get_cache_usage(db_info: DatabaseInfo, collection_name: str) -> int:
+    """
+    Return the number of bytes the in-memory cache of the indexes of the collection uses.
+    """
+    url = os.path.join(db_info.endpoint, '_api/collection', collection_name, 'figures')
+    response = requests.get(url, auth=(db_info.username, db_info.password))
+    if response.status_code != 200:
+        raise RuntimeError(f'get_cache_usage error: Error Code: {response.status_code}. '
+                           f'Message: {response.text}')
+    return response.json()['figures'].get('cacheUsage', 0)
+
+
+def scan_sample(db_info: DatabaseInfo, collection_name: str, sample_size: int):
+    """
+    Read the first sample_size documents of the collection on the server, so that their blocks are in the block cache.
+    """
+    # summing up the lengths makes the server read every document, counting them alone could use the index only
+    query = 'FOR d IN @@collection LIMIT @sample_size COLLECT AGGREGATE s = SUM(LENGTH(d)) RETURN s'
+    for _ in cursor_batches(db_info, query, {'@collection': collection_name, 'sample_size': sample_size}, 1):
+        pass
+
+
+def wait_for_cache(db_info: DatabaseInfo, collection_names: List[str], timeout: float):
+    """
+    Wait until the cache usage of the collections does not change between two polls or timeout seconds have passed.
+    """
+    deadline = time.monotonic() + timeout
+    usage = [get_cache_usage(db_info, c) for c in collection_names]
+    while time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        new_usage = [get_cache_usage(db_info, c) for c in collection_names]
+        if new_usage == usage:
+            return
+        usage = new_usage
+
+
+def warm_up_graph(db_info: DatabaseInfo, sample_size: int = 0, timeout: float = 600.0,
+                  be_verbose: bool = True) -> float:
+    """
+    Warm up the server for an algorithm on the graph db_info.graph_name, e.g., a Pregel run, so that its time does not
+    include filling cold caches. The indexes of all collections of the graph are loaded into memory at the same time,
+    if sample_size > 0, the first sample_size documents of every collection are read, and then the cache usage is
+    polled until it does not change any more (at most timeout seconds).
+    :param db_info:
+    :param sample_size: the number of documents to read per collection, 0 for no scan
+    :param timeout: the maximum time in seconds to wait for the cache usage to settle
+    :param be_verbose:
+    :return: the time of the warm-up in seconds
+    """
+    start = time.monotonic()
+    vertex_collections, edge_collections = get_graph_collections(db_info)
+    collections = edge_collections + vertex_collections
+    with ThreadPoolExecutor(max_workers=len(collections)) as executor:
+        list(executor.map(lambda c: load_indexes_into_memory(db_info, c), collections))
+        if sample_size > 0:
+            list(executor.map(lambda c: scan_sample(db_info, c, sample_size), collections))
+    wait_for_cache(db_info, collections, timeout)
+    warm_up_time = time.monotonic() - start
+    if be_verbose:
+        print(f'Warm-up of {len(collections)} collections: ' + get_time_difference_string(warm_up_time))
+    return warm_up_time
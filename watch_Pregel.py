@@ -2,7 +2,7 @@
 import argparse
 
 from arguments import make_global_parameters, make_pregel_watch_parameters, make_database_input_parameters
-from general import arangodIsRunning
+from general import arangodIsReachable
 from helper_classes import DatabaseInfo
 from start_Pregel import print_pregel_status
 
@@ -27,7 +27,7 @@ if __name__ == "__main__":
     db_info = DatabaseInfo(args.endpoint, graph_name='dummy',
                            isSmart=True, username=args.user, password=args.pwd)
 
-    if not arangodIsRunning():
-        raise RuntimeError('The process "arangod" is not running, please, run it first.')
+    if not arangodIsReachable(args.endpoint):
+        raise RuntimeError(f'No server answers at {args.endpoint}, please, start arangod first.')
 
     print_pregel_status(db_info, args.algorithm_id, args.sleep_time, args.extended_info)
@@ -0,0 +1,136 @@
+import hashlib
+import os
+import time
+from typing import Optional, Iterable, List
+
+import requests
+
+from general import collection_exists, create_collection, replace_document
+from helper_classes import DatabaseInfo
+
+HASH_CHUNK_SIZE = 1 << 20
+
+
+class Watermark:
+    """
+    How far an append-only edge file has been imported: the byte offset of the first line that has not been imported
+    and the SHA-256 hash of the bytes before it. If the hash of the first offset bytes of the file is still the same,
+    the file has only been appended to and the lines after offset are new.
+    """
+
+    def __init__(self, offset: int = 0, prefix_hash: str = hashlib.sha256().hexdigest(), num_lines: int = 0):
+        self.offset = offset
+        self.prefix_hash = prefix_hash
+        self.num_lines = num_lines
+
+    def to_document(self, key: str, filename: str) -> dict:
+        return {'_key': key, 'source': os.path.basename(filename), 'offset': self.offset,
+                'prefixHash': self.prefix_hash, 'numLines': self.num_lines,
+                'updated': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())}
+
+    @staticmethod
+    def from_document(document: dict):
+        return Watermark(document['offset'], document['prefixHash'], document['numLines'])
+
+
+def read_watermark(db_info: DatabaseInfo, metadata_collection: str) -> Optional[Watermark]:
+    """
+    Return the watermark of the graph db_info.graph_name stored in metadata_collection or None if there is none.
+    """
+    url = os.path.join(db_info.endpoint, '_api/document', metadata_collection, db_info.graph_name)
+    response = requests.get(url, auth=(db_info.username, db_info.password))
+    if response.status_code == 404:
+        return None
+    if response.status_code != 200:
+        raise RuntimeError(f'Could not read the watermark of {db_info.graph_name}: {response.text}')
+    return Watermark.from_document(response.json())
+
+
+def write_watermark(db_info: DatabaseInfo, metadata_collection: str, watermark: Watermark, filename: str):
+    """
+    Store the watermark as the document with key db_info.graph_name in metadata_collection, replacing an older one.
+    """
+    replace_document(db_info, metadata_collection, watermark.to_document(db_info.graph_name, filename))
+
+
+class AppendedLinesReader:
+    """
+    Read the lines of an append-only file that were appended after a watermark. Only complete lines (ending with a
+    newline) are read, a line that is still being written is left for the next run. The hash of the prefix is
+    continued over the new lines, so the new watermark needs no second pass over the file. After every batch has been
+    processed by the consumer (i.e., when the next batch is requested), the new watermark is stored, so an interrupted
+    import resumes after the last complete batch.
+    """
+
+    def __init__(self, db_info: DatabaseInfo, metadata_collection: str, filename: str, watermark: Watermark):
+        self.db_info = db_info
+        self.metadata_collection = metadata_collection
+        self.filename = filename
+        self.watermark = watermark
+        self.num_new_lines = 0
+
+    def _check_prefix(self, f, hasher):
+        """
+        Hash the first watermark.offset bytes of the opened file f into hasher and compare with the watermark.
+        """
+        remaining = self.watermark.offset
+        if os.fstat(f.fileno()).st_size < remaining:
+            raise RuntimeError(f'{self.filename} is shorter than at the last import, it was not only appended to. '
+                               f'To import it completely, use --overwrite.')
+        while remaining > 0:
+            chunk = f.read(min(HASH_CHUNK_SIZE, remaining))
+            hasher.update(chunk)
+            remaining -= len(chunk)
+        if hasher.hexdigest() != self.watermark.prefix_hash:
+            raise RuntimeError(f'{self.filename} was changed before the last imported line, it was not only '
+                               f'appended to. To import it completely, use --overwrite.')
+
+    def _checkpoint(self, offset: int, hasher, num_lines: int):
+        self.watermark = Watermark(offset, hasher.hexdigest(), num_lines)
+        write_watermark(self.db_info, self.metadata_collection, self.watermark, self.filename)
+
+    def batches(self, bulk_size: int) -> Iterable[List[str]]:
+        """
+        Yield the new lines in lists of (at most) bulk_size lines, as file_reader does.
+        """
+        hasher = hashlib.sha256()
+        with open(self.filename, 'rb') as f:
+            self._check_prefix(f, hasher)
+            offset = self.watermark.offset
+            num_lines = self.watermark.num_lines
+            res = list()
+            for line in f:
+                if not line.endswith(b'\n'):  # still being written
+                    break
+                hasher.update(line)
+                offset += len(line)
+                num_lines += 1
+                res.append(line.decode('utf-8').strip())
+                if len(res) == bulk_size:
+                    self.num_new_lines += len(res)
+                    yield res
+                    self._checkpoint(offset, hasher, num_lines)
+                    res = list()
+            if len(res) != 0:
+                self.num_new_lines += len(res)
+                yield res
+                self._checkpoint(offset, hasher, num_lines)
+            elif self.num_new_lines == 0:
+                self._checkpoint(offset, hasher, num_lines)  # store the watermark of a new or empty file, too
+
+
+def get_watermark(db_info: DatabaseInfo, metadata_collection: str, new_graph: bool) -> Watermark:
+    """
+    Return the watermark to continue an incremental import from. For a new (or overwritten) graph, this is the start of
+    the file. The metadata collection is created if necessary.
+    """
+    if not collection_exists(db_info, metadata_collection):
+        create_collection(db_info, metadata_collection)
+    if new_graph:
+        return Watermark()
+    watermark = read_watermark(db_info, metadata_collection)
+    if watermark is None:
+        raise RuntimeError(f'The graph {db_info.graph_name} exists, but there is no watermark for it in '
+                           f'{metadata_collection}, so it is unknown which edges have been imported. To import it '
+                           f'completely, use --overwrite.')
+    return watermark